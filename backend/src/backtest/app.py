@@ -0,0 +1,198 @@
+"""Backtest Graham-style screens across the stored universe.
+
+Daily closes come from the price_bars table and quarterly statements from
+the data_api cache. Both are loaded once into an engine.Panel. Every
+parameter set in the grid then runs in worker processes forked after the
+load, so the panel arrays are shared copy-on-write instead of pickled.
+Workers use plain Process/Pipe because Lambda has no /dev/shm for
+multiprocessing.Pool.
+
+Invoke with
+    {"grid": {"max_pe": [10, 15], "max_pb": [1, 1.5], "rebalance_days": [21, 63]},
+     "start": "2025-01-01", "sort_by": "sharpe", "limit": 20}
+or locally (with PYTHONPATH=../layers/shared):
+    python app.py --grid '{"max_pe": [10, 15]}' --start 2025-01-01
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+
+import boto3
+import numpy as np
+from dynamodb_batch import batch_get
+
+import engine
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+price_bars_table = dynamodb.Table(os.environ['PRICE_BARS_TABLE'])
+company_overview_table = dynamodb.Table(os.environ['COMPANY_OVERVIEW_TABLE'])
+
+# Only the quarterly statements feed the point-in-time fundamentals
+STATEMENT_PROJECTION = 'symbol, financials.balanceSheet.quarterlyReports, financials.incomeStatement.quarterlyReports'
+SORT_KEYS = ('sharpe', 'cagr', 'total_return', 'max_drawdown')
+DEFAULT_LIMIT = 20
+# The equal-weight universe every result is compared against
+BENCHMARK_PARAMS = {parameter: None for _, parameter, _ in engine.SCREENS}
+
+
+def _scan(table, projection):
+    items = []
+    scan_params = {'ProjectionExpression': projection}
+    while True:
+        response = table.scan(**scan_params)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items
+
+
+def load_panel(symbols=None):
+    """Panel over the given symbols, or every symbol with stored daily bars"""
+    if symbols:
+        keys = [{'symbol': symbol} for symbol in sorted(set(symbols))]
+        price_items = batch_get(dynamodb, price_bars_table, keys, 'symbol, dates, closes')
+        statement_items = batch_get(dynamodb, company_overview_table, keys, STATEMENT_PROJECTION)
+    else:
+        price_items = _scan(price_bars_table, 'symbol, dates, closes')
+        statement_items = _scan(company_overview_table, STATEMENT_PROJECTION)
+    price_items.sort(key=lambda item: item['symbol'])
+    return engine.Panel(price_items, statement_items)
+
+
+# Set before forking so workers inherit it instead of receiving a copy
+_panel = None
+
+
+def _evaluate(params, start, end):
+    try:
+        return {'params': params, **engine.run(_panel, params, start, end)}
+    except Exception as e:
+        return {'params': params, 'error': str(e)}
+
+
+def _worker(param_sets, start, end, sender):
+    sender.send([_evaluate(params, start, end) for params in param_sets])
+    sender.close()
+
+
+def run_grid(panel, param_sets, start=None, end=None, workers=None):
+    """Evaluate every parameter set, spread over worker processes; results keep the input order"""
+    global _panel
+    _panel = panel
+    workers = max(1, min(workers or os.cpu_count() or 1, len(param_sets)))
+    if workers == 1:
+        return [_evaluate(params, start, end) for params in param_sets]
+    context = multiprocessing.get_context('fork')
+    processes, receivers = [], []
+    for worker in range(workers):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_worker, args=(param_sets[worker::workers], start, end, sender))
+        process.start()
+        sender.close()
+        processes.append(process)
+        receivers.append(receiver)
+    results = [None] * len(param_sets)
+    try:
+        for worker, receiver in enumerate(receivers):
+            results[worker::workers] = receiver.recv()
+    except EOFError:
+        raise RuntimeError('A backtest worker exited without returning results')
+    finally:
+        for process in processes:
+            process.join()
+    return results
+
+
+def _clean(value):
+    """JSON-safe: NumPy scalars to floats rounded to 6 places, NaN/inf to null"""
+    if isinstance(value, dict):
+        return {key: _clean(inner) for key, inner in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(inner) for inner in value]
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 6) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def backtest(grid=None, symbols=None, start=None, end=None, sort_by='sharpe', limit=DEFAULT_LIMIT, workers=None):
+    """Run the grid and return the best `limit` results plus the benchmark"""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Invalid sort_by '{sort_by}', expected one of: {', '.join(SORT_KEYS)}")
+    param_sets = engine.parameter_grid(grid or {})
+    started = time.time()
+    panel = load_panel(symbols)
+    loaded = time.time()
+    if not panel.symbols:
+        raise ValueError('No stored price history to backtest')
+    results = run_grid(panel, param_sets, start, end, workers)
+    benchmark = _evaluate({**engine.DEFAULT_PARAMS, **BENCHMARK_PARAMS}, start, end)
+
+    failed = [result for result in results if 'error' in result]
+    ranked = sorted(
+        (result for result in results if 'error' not in result),
+        key=lambda result: result[sort_by] if result[sort_by] is not None and np.isfinite(result[sort_by]) else -np.inf,
+        reverse=True
+    )[:limit]
+    # Curves only for the results returned, to keep the response small
+    summary = {
+        'symbols': len(panel.symbols),
+        'days': len(panel.dates),
+        'parameter_sets': len(param_sets),
+        'failed': len(failed),
+        'errors': sorted({result['error'] for result in failed}),
+        'load_seconds': loaded - started,
+        'run_seconds': time.time() - loaded,
+        'benchmark': benchmark,
+        'results': ranked
+    }
+    logger.info(f"Backtested {len(param_sets)} parameter sets over {len(panel.symbols)} symbols "
+                f"in {summary['run_seconds']:.2f}s (load {summary['load_seconds']:.2f}s)")
+    return _clean(summary)
+
+
+def lambda_handler(event, context):
+    try:
+        summary = backtest(
+            grid=event.get('grid'),
+            symbols=event.get('symbols'),
+            start=event.get('start'),
+            end=event.get('end'),
+            sort_by=event.get('sort_by', 'sharpe'),
+            limit=int(event.get('limit') or DEFAULT_LIMIT),
+            workers=event.get('workers')
+        )
+        return {
+            'statusCode': 200,
+            'body': json.dumps(summary)
+        }
+
+    except Exception as e:
+        logger.error(f"Backtest failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Backtest failed: {str(e)}'
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest screens over stored prices and statements')
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--grid', default='{}', help='JSON object of parameter name -> list of values')
+    parser.add_argument('--start', help='YYYY-MM-DD')
+    parser.add_argument('--end', help='YYYY-MM-DD')
+    parser.add_argument('--sort-by', default='sharpe', choices=SORT_KEYS)
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    logging.basicConfig()
+    print(json.dumps(backtest(json.loads(args.grid), args.symbols, args.start, args.end,
+                              args.sort_by, args.limit, args.workers), indent=2))
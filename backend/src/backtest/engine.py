@@ -0,0 +1,244 @@
+"""Vectorized backtests of Graham-style screens.
+
+A Panel holds dates x symbols NumPy arrays: daily closes, and the quarterly
+statement figures each symbol had published as of every date. A report
+counts from its reportedDate when it has one, else from fiscalDateEnding
+plus REPORT_LAG_DAYS, so screens never see numbers before they were public.
+Valuation metrics (P/E, P/B, current ratio, ...) are computed for the whole
+panel at once; a backtest then only indexes the rebalance rows.
+
+Between rebalances the portfolio is equal-weighted buy-and-hold, so each
+holding period is one slice of the cumulative growth array.
+"""
+import itertools
+from datetime import date, timedelta
+
+import numpy as np
+
+# 10-Q filing deadlines are 40-45 days after quarter end
+REPORT_LAG_DAYS = 45
+TRADING_DAYS = 252
+
+# Point-in-time balance sheet figures (latest published quarter)
+BALANCE_FIELDS = {
+    'shares': 'commonStockSharesOutstanding',
+    'equity': 'totalShareholderEquity',
+    'current_assets': 'totalCurrentAssets',
+    'current_liabilities': 'totalCurrentLiabilities',
+    'total_liabilities': 'totalLiabilities',
+    'long_term_debt': 'longTermDebt'
+}
+# Income statement figures summed over the trailing four quarters
+TTM_FIELDS = {'net_income': 'netIncome', 'revenue': 'totalRevenue'}
+
+DEFAULT_PARAMS = {
+    'rebalance_days': 63,
+    'max_pe': 15.0,
+    'max_pb': 1.5,
+    # Graham's combined test: P/E x P/B <= 22.5
+    'max_pe_pb': 22.5,
+    'min_current_ratio': 2.0,
+    'max_debt_to_equity': None,
+    'min_ncav_ratio': None,
+    'rank_by': 'earnings_yield',
+    'top_n': None,
+    'cost_bps': 10.0
+}
+# Rank direction: higher is better (1) or lower is better (-1)
+RANKINGS = {'earnings_yield': 1, 'pb': -1, 'pe': -1, 'ncav_ratio': 1, 'current_ratio': 1}
+# Screens as (metric, parameter, comparison); a None parameter switches the screen off
+SCREENS = [
+    ('pe', 'max_pe', np.less_equal),
+    ('pb', 'max_pb', np.less_equal),
+    ('pe_pb', 'max_pe_pb', np.less_equal),
+    ('current_ratio', 'min_current_ratio', np.greater_equal),
+    ('debt_to_equity', 'max_debt_to_equity', np.less_equal),
+    ('ncav_ratio', 'min_ncav_ratio', np.greater_equal)
+]
+
+
+def _number(value):
+    """float from a cached value (Decimal, number or legacy string); NaN when missing"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _forward_fill(values):
+    """Carry each column's last non-NaN value down the rows"""
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def _available_on(report):
+    if report.get('reportedDate'):
+        return str(report['reportedDate'])
+    return (date.fromisoformat(str(report['fiscalDateEnding'])) + timedelta(days=REPORT_LAG_DAYS)).isoformat()
+
+
+def _trailing_sums(values):
+    """Sum of each value and the three before it; NaN unless all four are present"""
+    values = np.asarray(values, dtype=float)
+    sums = np.full(len(values), np.nan)
+    if len(values) >= 4:
+        windows = np.lib.stride_tricks.sliding_window_view(values, 4)
+        sums[3:] = windows.sum(axis=1)
+    return sums
+
+
+class Panel:
+    """Closes, point-in-time fundamentals and derived metrics, all dates x symbols"""
+    __slots__ = ('dates', 'symbols', 'closes', 'growth', 'fields', 'metrics')
+
+    def __init__(self, price_items, statement_items):
+        price_items = [item for item in price_items if item.get('dates')]
+        self.symbols = [item['symbol'] for item in price_items]
+        self.dates = np.array(sorted(set().union(*(item['dates'] for item in price_items))), dtype='datetime64[D]')
+        shape = (len(self.dates), len(self.symbols))
+
+        closes = np.full(shape, np.nan)
+        for column, item in enumerate(price_items):
+            rows = np.searchsorted(self.dates, np.array(item['dates'], dtype='datetime64[D]'))
+            closes[rows, column] = [_number(value) for value in item['closes']]
+        # Halted days and symbols that stopped trading keep their last close
+        self.closes = _forward_fill(closes)
+        daily = np.ones(shape)
+        with np.errstate(invalid='ignore'):
+            daily[1:] = np.where(np.isnan(self.closes[:-1]), 1.0, self.closes[1:] / self.closes[:-1])
+        self.growth = np.cumprod(np.nan_to_num(daily, nan=1.0), axis=0)
+
+        self.fields = {name: np.full(shape, np.nan) for name in [*BALANCE_FIELDS, *TTM_FIELDS]}
+        statements = {item['symbol']: item.get('financials') or {} for item in statement_items}
+        for column, symbol in enumerate(self.symbols):
+            self._place_reports(column, statements.get(symbol, {}))
+        self.fields = {name: _forward_fill(values) for name, values in self.fields.items()}
+        self.metrics = self._metrics()
+
+    def _place_reports(self, column, financials):
+        """Write each quarter's figures on the first trading day it was public"""
+        for statement, fields in (('balanceSheet', BALANCE_FIELDS), ('incomeStatement', TTM_FIELDS)):
+            reports = sorted(
+                (report for report in (financials.get(statement) or {}).get('quarterlyReports') or []
+                 if report.get('fiscalDateEnding')),
+                key=lambda report: str(report['fiscalDateEnding'])
+            )
+            if not reports:
+                continue
+            rows = np.searchsorted(self.dates, np.array([_available_on(report) for report in reports], dtype='datetime64[D]'))
+            keep = rows < len(self.dates)
+            for name, source in fields.items():
+                values = np.array([_number(report.get(source)) for report in reports])
+                if statement == 'incomeStatement':
+                    values = _trailing_sums(values)
+                # Later quarters overwrite earlier ones published on the same day
+                self.fields[name][rows[keep], column] = values[keep]
+
+    def _metrics(self):
+        f = self.fields
+        market_cap = self.closes * f['shares']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            positive_equity = np.where(f['equity'] > 0, f['equity'], np.nan)
+            pe = np.where(f['net_income'] > 0, market_cap / f['net_income'], np.nan)
+            pb = market_cap / positive_equity
+            return {
+                'market_cap': market_cap,
+                'pe': pe,
+                'pb': pb,
+                'pe_pb': pe * pb,
+                'earnings_yield': f['net_income'] / market_cap,
+                'current_ratio': f['current_assets'] / f['current_liabilities'],
+                'debt_to_equity': np.nan_to_num(f['long_term_debt']) / positive_equity,
+                'ncav_ratio': (f['current_assets'] - f['total_liabilities']) / market_cap
+            }
+
+    def row(self, day):
+        """First panel row on or after a YYYY-MM-DD date"""
+        return int(np.searchsorted(self.dates, np.datetime64(day, 'D')))
+
+
+def parameter_grid(grid):
+    """Every combination of the listed values, over DEFAULT_PARAMS"""
+    unknown = set(grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    names = sorted(grid)
+    choices = [value if isinstance(value, list) else [value] for value in (grid[name] for name in names)]
+    return [{**DEFAULT_PARAMS, **dict(zip(names, combination))} for combination in itertools.product(*choices)]
+
+
+def select(panel, row, params):
+    """Symbols held from a rebalance row, as a boolean mask"""
+    selected = ~np.isnan(panel.closes[row])
+    with np.errstate(invalid='ignore'):
+        for metric, parameter, compare in SCREENS:
+            if params.get(parameter) is not None:
+                selected &= compare(panel.metrics[metric][row], params[parameter])
+    top_n = params.get('top_n')
+    if top_n and selected.sum() > top_n:
+        score = panel.metrics[params['rank_by']][row] * RANKINGS[params['rank_by']]
+        ranked = np.argsort(np.where(selected & ~np.isnan(score), -score, np.inf), kind='stable')[:top_n]
+        selected = np.zeros_like(selected)
+        selected[ranked] = True
+    return selected
+
+
+def run(panel, params, start=None, end=None):
+    """Backtest one parameter set; returns summary statistics and the equity curve"""
+    params = {**DEFAULT_PARAMS, **params}
+    if params['rank_by'] not in RANKINGS:
+        raise ValueError(f"Invalid rank_by '{params['rank_by']}', expected one of: {', '.join(RANKINGS)}")
+    first = panel.row(start) if start else 0
+    last = min(panel.row(end), len(panel.dates) - 1) if end else len(panel.dates) - 1
+    if last - first < 2:
+        raise ValueError('Backtest window has fewer than three trading days')
+    rebalances = list(range(first, last, int(params['rebalance_days'])))
+
+    equity = np.ones(last - first + 1)
+    weights = np.zeros(len(panel.symbols))
+    holdings, turnover = [], []
+    for period, start_row in enumerate(rebalances):
+        end_row = rebalances[period + 1] if period + 1 < len(rebalances) else last
+        base = equity[start_row - first]
+        # Previous weights after drifting with prices since the last rebalance
+        if period:
+            drifted = weights * panel.growth[start_row] / panel.growth[rebalances[period - 1]]
+            weights = drifted / drifted.sum() if drifted.sum() > 0 else drifted
+        selected = select(panel, start_row, params)
+        target = selected / selected.sum() if selected.any() else np.zeros(len(panel.symbols))
+        traded = np.abs(target - weights).sum()
+        base *= 1 - traded * params['cost_bps'] / 10000
+        window = panel.growth[start_row:end_row + 1] / panel.growth[start_row]
+        relative = window @ target if selected.any() else np.ones(end_row - start_row + 1)
+        equity[start_row - first:end_row - first + 1] = base * relative
+        weights = target
+        holdings.append(int(selected.sum()))
+        turnover.append(traded)
+
+    return _statistics(panel, equity, first, rebalances, holdings, turnover)
+
+
+def _statistics(panel, equity, first, rebalances, holdings, turnover):
+    dates = panel.dates[first:first + len(equity)]
+    daily = equity[1:] / equity[:-1] - 1
+    years = max((dates[-1] - dates[0]).astype(int) / 365.25, 1 / 365.25)
+    volatility = daily.std() * np.sqrt(TRADING_DAYS)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(equity[:trough + 1]))
+    return {
+        'start': str(dates[0]),
+        'end': str(dates[-1]),
+        'total_return': equity[-1] - 1,
+        'cagr': equity[-1] ** (1 / years) - 1,
+        'volatility': volatility,
+        'sharpe': daily.mean() * TRADING_DAYS / volatility if volatility > 0 else None,
+        'max_drawdown': drawdown[trough],
+        'drawdown_peak': str(dates[peak]),
+        'drawdown_trough': str(dates[trough]),
+        'rebalances': len(rebalances),
+        'avg_holdings': float(np.mean(holdings)),
+        'avg_turnover': float(np.mean(turnover)),
+        'curve': [[str(dates[row - first]), equity[row - first]] for row in rebalances] + [[str(dates[-1]), equity[-1]]]
+    }
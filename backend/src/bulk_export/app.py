@@ -0,0 +1,338 @@
+import os
+import csv
+import json
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import threading
+from decimal import Decimal
+
+import boto3
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for format=parquet
+    pa = None
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+# Exportable datasets: table env var, projection (None = whole item), and how rows are flattened
+DATASETS = {
+    'overview': {
+        'table_env': 'COMPANY_OVERVIEW_TABLE',
+        # The statements and pre-rendered bodies are large and not tabular
+        'projection': 'symbol, overview_data, overview_updated, price_stats, next_report_date, financials_updated',
+        'flatten': ['overview_data', 'price_stats']
+    },
+    'symbols': {
+        'table_env': 'SYMBOLS_TABLE',
+        'projection': None,
+        'flatten': []
+    },
+    'metrics': {
+        'table_env': 'METRICS_TABLE',
+        'projection': None,
+        'flatten': None
+    }
+}
+DEFAULT_SEGMENTS = 4
+# Pages buffered between the scan threads and the writer; bounds memory
+MAX_BUFFERED_PAGES = 8
+# Rows per CSV flush / Parquet row group
+CHUNK_ROWS = 5000
+# Rows per output part file
+PART_ROWS = 250000
+
+
+def _scalar(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (list, dict, set)):
+        return json.dumps(value, default=_scalar)
+    if isinstance(value, bytes) or hasattr(value, 'value'):
+        return None
+    return value
+
+
+def _flatten(item, nested):
+    """One export row: top-level scalars plus the listed maps as dotted columns.
+
+    nested=None flattens every map; other lists and maps become JSON strings.
+    """
+    row = {}
+    for key, value in item.items():
+        if isinstance(value, dict) and (nested is None or key in nested):
+            for inner_key, inner_value in value.items():
+                if isinstance(inner_value, dict):
+                    for leaf_key, leaf_value in inner_value.items():
+                        row[f"{key}.{inner_key}.{leaf_key}"] = _scalar(leaf_value)
+                else:
+                    row[f"{key}.{inner_key}"] = _scalar(inner_value)
+        else:
+            row[key] = _scalar(value)
+    return row
+
+
+def parallel_scan(table, segments, projection=None):
+    """Yield items from a parallel segment scan of table.
+
+    Each segment scans in its own thread and hands pages to the consumer
+    through a bounded queue, so at most MAX_BUFFERED_PAGES pages (1MB each)
+    are held in memory however large the table is.
+    """
+    pages = queue.Queue(maxsize=MAX_BUFFERED_PAGES)
+    done = object()
+    stop = threading.Event()
+
+    def _scan_segment(segment):
+        scan_params = {'Segment': segment, 'TotalSegments': segments}
+        if projection:
+            names = {f"#p{i}": name.strip() for i, name in enumerate(projection.split(','))}
+            scan_params['ProjectionExpression'] = ', '.join(names)
+            scan_params['ExpressionAttributeNames'] = names
+        try:
+            while not stop.is_set():
+                response = table.scan(**scan_params)
+                pages.put(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
+
+    threads = [threading.Thread(target=_scan_segment, args=(segment,), daemon=True) for segment in range(segments)]
+    for thread in threads:
+        thread.start()
+    finished = 0
+    try:
+        while finished < segments:
+            page = pages.get()
+            if page is done:
+                finished += 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        # Unblock producers if the consumer stops early
+        stop.set()
+        while finished < segments:
+            if pages.get() is done:
+                finished += 1
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def spool_rows(rows, spool):
+    """Stage rows in a JSON-lines file while collecting the export's columns and types.
+
+    Parts can only be written once every row has been seen: a column may
+    first appear late in the scan, and one legacy string in an otherwise
+    numeric column makes it a string column. Returns (columns in first-seen
+    order, {column: 'float64' or 'string'}, row count). Columns are float64
+    when every value is numeric, and string otherwise (including all-null).
+    """
+    columns = {}
+    numeric = {}
+    count = 0
+    for row in rows:
+        for column, value in row.items():
+            if value is not None:
+                numeric[column] = numeric.get(column, True) and _is_number(value)
+            columns.setdefault(column, None)
+        spool.write(json.dumps(row))
+        spool.write('\n')
+        count += 1
+    types = {column: 'float64' if numeric.get(column) else 'string' for column in columns}
+    return list(columns), types, count
+
+
+def read_spool(spool):
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _PartWriter:
+    """Writes row chunks to numbered part files under a local directory or s3:// prefix.
+
+    columns and types (from spool_rows) cover every row, so every part has
+    the same header or schema; a value that doesn't fit its column's type
+    fails the export.
+    """
+
+    def __init__(self, destination, dataset, file_format, columns, types):
+        self.destination = destination.rstrip('/')
+        self.dataset = dataset
+        self.file_format = file_format
+        self.columns = columns
+        self.schema = pa.schema([
+            pa.field(column, pa.float64() if types[column] == 'float64' else pa.string()) for column in columns
+        ]) if file_format == 'parquet' else None
+        self.parts = []
+        self._file = None
+        self._writer = None
+        self._part_rows = 0
+
+    def _part_path(self):
+        name = f"{self.dataset}-part-{len(self.parts):05d}.{self.file_format}"
+        if self.destination.startswith('s3://'):
+            # Parts are staged in /tmp and uploaded as soon as they're complete
+            return f"/tmp/{name}", f"{self.destination}/{name}"
+        os.makedirs(self.destination, exist_ok=True)
+        return os.path.join(self.destination, name), None
+
+    def _open(self):
+        self._local_path, self._remote_path = self._part_path()
+        if self.file_format == 'csv':
+            self._file = open(self._local_path, 'w', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+            self._writer.writeheader()
+        else:
+            self._writer = pq.ParquetWriter(self._local_path, self.schema, compression='zstd')
+        self._part_rows = 0
+
+    def _close(self):
+        if self._writer is None:
+            return
+        if self.file_format == 'csv':
+            self._file.close()
+        else:
+            self._writer.close()
+        location = self._local_path
+        if self._remote_path:
+            bucket, _, key = self._remote_path[len('s3://'):].partition('/')
+            s3.upload_file(self._local_path, bucket, key)
+            os.remove(self._local_path)
+            location = self._remote_path
+        self.parts.append({'location': location, 'rows': self._part_rows})
+        self._writer = None
+
+    def _parquet_table(self, chunk):
+        arrays = []
+        for field in self.schema:
+            values = [row.get(field.name) for row in chunk]
+            if pa.types.is_floating(field.type):
+                mismatched = next((value for value in values if value is not None and not _is_number(value)), None)
+                if mismatched is not None:
+                    raise ValueError(f"Column {field.name} is float64 but a row has {mismatched!r}")
+                values = [None if value is None else float(value) for value in values]
+            else:
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def write(self, chunk):
+        if self._writer is None:
+            self._open()
+        if self.file_format == 'csv':
+            self._writer.writerows(chunk)
+        else:
+            self._writer.write_table(self._parquet_table(chunk))
+        self._part_rows += len(chunk)
+        if self._part_rows >= PART_ROWS:
+            self._close()
+
+    def finish(self):
+        self._close()
+        return self.parts
+
+
+def export_dataset(dataset, file_format, destination, segments=DEFAULT_SEGMENTS):
+    """Stream one dataset into part files and a manifest; returns the manifest"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}', expected one of: {', '.join(DATASETS)}")
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError(f"Unknown format '{file_format}', expected csv or parquet")
+    if file_format == 'parquet' and pa is None:
+        raise ValueError("Parquet export requires pyarrow")
+
+    config = DATASETS[dataset]
+    table = dynamodb.Table(os.environ[config['table_env']])
+    started = time.time()
+    rows = (_flatten(item, config['flatten']) for item in parallel_scan(table, segments, config['projection']))
+    # Lambda's writable space is /tmp, where the parts are staged too
+    with tempfile.TemporaryFile('w+', suffix='.jsonl') as spool:
+        columns, types, total = spool_rows(rows, spool)
+        writer = _PartWriter(destination, dataset, file_format, columns, types)
+        for chunk in chunked(read_spool(spool), CHUNK_ROWS):
+            writer.write(chunk)
+        parts = writer.finish()
+
+    manifest = {
+        'dataset': dataset,
+        'format': file_format,
+        'table': table.table_name,
+        'rows': total,
+        'columns': columns,
+        'types': types,
+        'parts': parts,
+        'exported_at': int(started),
+        'duration_sec': round(time.time() - started, 2)
+    }
+    manifest_body = json.dumps(manifest, indent=2)
+    if destination.startswith('s3://'):
+        bucket, _, prefix = destination[len('s3://'):].rstrip('/').partition('/')
+        s3.put_object(Bucket=bucket, Key=f"{prefix}/{dataset}-manifest.json".lstrip('/'), Body=manifest_body.encode('utf-8'))
+    else:
+        os.makedirs(destination, exist_ok=True)
+        with open(os.path.join(destination, f"{dataset}-manifest.json"), 'w') as f:
+            f.write(manifest_body)
+    logger.info(f"Exported {total} {dataset} rows in {len(parts)} {file_format} parts to {destination}")
+    return manifest
+
+
+def lambda_handler(event, context):
+    try:
+        file_format = event.get('format', 'csv')
+        segments = int(event.get('segments') or os.environ.get('EXPORT_SEGMENTS', DEFAULT_SEGMENTS))
+        destination = event.get('destination') or \
+            f"s3://{os.environ['EXPORT_BUCKET']}/exports/{time.strftime('%Y-%m-%dT%H%M%S', time.gmtime())}"
+        datasets = event.get('datasets') or [event.get('dataset', 'overview')]
+        manifests = [export_dataset(dataset, file_format, destination, segments) for dataset in datasets]
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'destination': destination, 'exports': manifests})
+        }
+
+    except Exception as e:
+        logger.error(f"Bulk export failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Bulk export failed: {str(e)}'
+        }
+
+
+if __name__ == '__main__':
+    # Local runs, e.g.: python app.py overview symbols --format parquet --destination ./export
+    parser = argparse.ArgumentParser(description='Export DynamoDB datasets to CSV/Parquet')
+    parser.add_argument('datasets', nargs='+', choices=list(DATASETS))
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet'])
+    parser.add_argument('--destination', required=True, help='Local directory or s3://bucket/prefix')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS)
+    args = parser.parse_args()
+    logging.basicConfig()
+    for name in args.datasets:
+        print(json.dumps(export_dataset(name, args.format, args.destination, args.segments), indent=2))
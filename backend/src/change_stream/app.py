@@ -0,0 +1,477 @@
+import os
+import gzip
+import json
+import time
+import base64
+import hashlib
+import logging
+import argparse
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from symbol_search import normalize_name, search_index_entries
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb', endpoint_url=os.environ.get('DYNAMODB_ENDPOINT_URL') or None)
+s3 = boto3.client('s3')
+lambda_client = boto3.client('lambda')
+
+# Stream sources by table name; records from other tables are ignored
+SOURCES = {
+    os.environ.get('SYMBOLS_TABLE'): 'symbols',
+    os.environ.get('COMPANY_OVERVIEW_TABLE'): 'overview'
+}
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_PREFIX = 'snapshots/symbol-universe'
+CHANGELOG_PREFIX = 'exports/changes'
+# Overview attributes carried into the change log (the bulk export's overview columns)
+CHANGELOG_OVERVIEW_FIELDS = ['symbol', 'overview_data', 'overview_updated', 'price_stats', 'next_report_date', 'financials_updated']
+REBUILD_PAGE_ITEMS = 500
+
+# One net change per item in a batch: the image before the batch's first
+# record and after its last (None when the item didn't exist)
+Change = namedtuple('Change', ['source', 'key', 'old', 'new', 'sequence'])
+
+
+class _StreamDeserializer(TypeDeserializer):
+    """Stream events carry binary attributes base64-encoded"""
+
+    def _deserialize_b(self, value):
+        return super()._deserialize_b(base64.b64decode(value) if isinstance(value, str) else value)
+
+    def _deserialize_bs(self, value):
+        return set(self._deserialize_b(v) for v in value)
+
+
+_deserializer = _StreamDeserializer()
+
+
+def _image(typed):
+    return {name: _deserializer.deserialize(value) for name, value in typed.items()} if typed is not None else None
+
+
+def _source(record):
+    table_name = record.get('eventSourceARN', '').split(':table/')[-1].split('/')[0]
+    return SOURCES.get(table_name)
+
+
+def coalesce(records):
+    """Collapse a batch of stream records into one Change per item, in first-seen order.
+
+    Several writes to the same item within a batch cost one view update.
+    """
+    changes = {}
+    for record in records:
+        source = _source(record)
+        if not source:
+            continue
+        stream = record['dynamodb']
+        keys = _image(stream['Keys'])
+        key = (source, tuple(sorted(keys.items())))
+        new = _image(stream.get('NewImage')) if record['eventName'] != 'REMOVE' else None
+        if key in changes:
+            changes[key] = changes[key]._replace(new=new, sequence=stream['SequenceNumber'])
+        else:
+            changes[key] = Change(source, keys, _image(stream.get('OldImage')), new, stream['SequenceNumber'])
+    # A net no-op (e.g. inserted then removed within the batch) needs no work
+    return [change for change in changes.values() if change.old != change.new]
+
+
+def _snapshot_document(rows):
+    """Search universe for client-side typeahead.
+
+    symbols holds [symbol, name, exchange] rows sorted by symbol; names lists
+    row positions sorted by normalized name. prefix maps every 1- and
+    2-character prefix to [start, end) ranges in both orders, so a client
+    narrows any query to a small slice without scanning the whole list.
+    """
+    rows = sorted(rows, key=lambda row: (row[0].lower(), row[2]))
+    symbol_keys = [row[0].lower() for row in rows]
+    name_keys = [normalize_name(row[1]) for row in rows]
+    names = sorted(range(len(rows)), key=lambda i: (name_keys[i], rows[i][0]))
+    prefix = {}
+    # Keys sharing a prefix are contiguous in sorted order: [symbol start, end, name start, end]
+    for offset, keys in ((0, symbol_keys), (2, [name_keys[i] for i in names])):
+        for position, key in enumerate(keys):
+            for length in (1, 2):
+                if len(key) < length:
+                    continue
+                ranges = prefix.setdefault(key[:length], [0, 0, 0, 0])
+                if ranges[offset + 1] == 0:
+                    ranges[offset] = position
+                ranges[offset + 1] = position + 1
+    return {'version': SNAPSHOT_FORMAT_VERSION, 'symbols': rows, 'names': names, 'prefix': prefix}
+
+
+class DerivedView(ABC):
+    """Data kept up to date from stream changes.
+
+    apply() receives the net changes from the view's sources, possibly in
+    several calls, and finish() completes the batch (publishing anything
+    accumulated) and returns a summary. Both must be idempotent: a failed
+    batch is retried from its first record.
+    """
+    name = None
+    sources = ()
+    # Whether a rebuild (full-table replay of synthetic inserts) should reach this view
+    rebuildable = True
+
+    @abstractmethod
+    def apply(self, changes):
+        ...
+
+    def finish(self):
+        return {}
+
+    def reset(self):
+        """Forget derived state before a rebuild"""
+
+
+class SearchIndexView(DerivedView):
+    """Prefix search rows in the search index table (data_api /symbols?query=)"""
+    name = 'search_index'
+    sources = ('symbols',)
+
+    def __init__(self, table_name):
+        self.table = dynamodb.Table(table_name)
+        self.counts = {'put': 0, 'deleted': 0}
+
+    def apply(self, changes):
+        deletes, puts = {}, {}
+        for change in changes:
+            new_entries = {(e['bucket'], e['sort_key']): e for e in search_index_entries(change.new)} if change.new else {}
+            old_entries = {(e['bucket'], e['sort_key']): e for e in search_index_entries(change.old)} if change.old else {}
+            for key in old_entries.keys() - new_entries.keys():
+                deletes[key] = {'bucket': key[0], 'sort_key': key[1]}
+            for key, entry in new_entries.items():
+                if old_entries.get(key) != entry:
+                    puts[key] = entry
+        with self.table.batch_writer(overwrite_by_pkeys=['bucket', 'sort_key']) as batch:
+            for key, entry in deletes.items():
+                if key not in puts:
+                    batch.delete_item(Key=entry)
+            for entry in puts.values():
+                batch.put_item(Item=entry)
+        self.counts['put'] += len(puts)
+        self.counts['deleted'] += len(set(deletes) - set(puts))
+
+    def finish(self):
+        counts, self.counts = self.counts, {'put': 0, 'deleted': 0}
+        return counts
+
+
+class SymbolSnapshotView(DerivedView):
+    """Content-hashed symbol universe in S3 (data_api /symbols/snapshot).
+
+    The rows of the current snapshot are the view's state: each batch edits
+    them in memory and publishes a new object only if the content hash
+    changes, so no batch scans the symbols table.
+    """
+    name = 'symbol_snapshot'
+    sources = ('symbols',)
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.rows = None
+        self.hash = None
+        self.loaded = False
+
+    def reset(self):
+        self.rows, self.loaded = {}, True
+
+    def _get(self, key):
+        return s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def _load(self):
+        """Current snapshot rows; re-read only if another writer published since"""
+        try:
+            pointer = json.loads(self._get(f"{SNAPSHOT_PREFIX}/latest.json"))
+        except s3.exceptions.NoSuchKey:
+            pointer = {}
+        self.loaded = True
+        if self.rows is not None and pointer.get('hash') == self.hash:
+            return
+        if pointer.get('version') == SNAPSHOT_FORMAT_VERSION:
+            document = json.loads(gzip.decompress(self._get(pointer['key'])))
+            self.rows = {(row[0], row[2]): row for row in document['symbols']}
+            self.hash = pointer['hash']
+        else:
+            # No usable snapshot yet: seed from the table once
+            logger.info("No current symbol snapshot, seeding from the symbols table")
+            self.rows = {(item['symbol'], item['exchange']): [item['symbol'], item.get('name', ''), item['exchange']]
+                         for item in _scan(os.environ['SYMBOLS_TABLE'])}
+            self.hash = None
+
+    def apply(self, changes):
+        if not self.loaded:
+            self._load()
+        for change in changes:
+            if change.old:
+                self.rows.pop((change.old['symbol'], change.old['exchange']), None)
+            if change.new:
+                self.rows[(change.new['symbol'], change.new['exchange'])] = [
+                    change.new['symbol'], change.new.get('name', ''), change.new['exchange']
+                ]
+
+    def finish(self):
+        if not self.loaded:
+            return {}
+        self.loaded = False
+        return {'hash': self._publish(), 'symbols': len(self.rows)}
+
+    def _publish(self):
+        body = json.dumps(_snapshot_document(list(self.rows.values())), separators=(',', ':'), sort_keys=True).encode('utf-8')
+        content_hash = hashlib.sha256(body).hexdigest()[:20]
+        if content_hash == self.hash:
+            return content_hash
+        key = f"{SNAPSHOT_PREFIX}/v{SNAPSHOT_FORMAT_VERSION}/{content_hash}.json.gz"
+        s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=gzip.compress(body, compresslevel=9, mtime=0),
+            ContentType='application/json',
+            ContentEncoding='gzip',
+            CacheControl='public, max-age=31536000, immutable'
+        )
+        s3.put_object(
+            Bucket=self.bucket,
+            Key=f"{SNAPSHOT_PREFIX}/latest.json",
+            Body=json.dumps({
+                'hash': content_hash,
+                'key': key,
+                'version': SNAPSHOT_FORMAT_VERSION,
+                'count': len(self.rows),
+                'generated_at': int(time.time())
+            }).encode('utf-8'),
+            ContentType='application/json'
+        )
+        self.hash = content_hash
+        logger.info(f"Published symbol snapshot {content_hash} with {len(self.rows)} symbols ({len(body)} bytes raw)")
+        return content_hash
+
+
+class ValuationInputsView(DerivedView):
+    """Per-ounce valuations in the mining operating table.
+
+    Valuations depend on the cached market cap and latest quarterly balance
+    sheet; only symbols whose inputs changed are revalued, in one async
+    mining_metrics invocation per batch.
+    """
+    name = 'valuations'
+    sources = ('overview',)
+
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.symbols = set()
+
+    @staticmethod
+    def _inputs(item):
+        if not item:
+            return None
+        balance = ((item.get('financials') or {}).get('balanceSheet') or {}).get('quarterlyReports') or [{}]
+        return (
+            (item.get('overview_data') or {}).get('MarketCapitalization'),
+            balance[0].get('shortLongTermDebtTotal'),
+            balance[0].get('cashAndCashEquivalentsAtCarryingValue')
+        )
+
+    def apply(self, changes):
+        self.symbols.update(change.key['symbol'] for change in changes if self._inputs(change.old) != self._inputs(change.new))
+
+    def finish(self):
+        symbols, self.symbols = sorted(self.symbols), set()
+        if symbols:
+            lambda_client.invoke(
+                FunctionName=self.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({'symbols': symbols})
+            )
+        return {'revalued': len(symbols)}
+
+
+class ExportChangeLogView(DerivedView):
+    """Incremental companion to bulk_export: each batch's net changes as one gzipped JSONL object.
+
+    Applying the change log in order to the last full export reproduces the
+    tables without re-scanning them. Objects are named by sequence range, so
+    a retried batch overwrites its own object.
+    """
+    name = 'export_changelog'
+    sources = ('symbols', 'overview')
+    rebuildable = False
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.written = {}
+
+    def apply(self, changes):
+        for source in self.sources:
+            rows = []
+            for change in changes:
+                if change.source != source:
+                    continue
+                image = change.new
+                if image and source == 'overview':
+                    image = {name: image[name] for name in CHANGELOG_OVERVIEW_FIELDS if name in image}
+                rows.append(json.dumps({
+                    'op': 'upsert' if change.new else 'delete',
+                    'key': change.key,
+                    'item': image,
+                    'sequence': change.sequence
+                }, default=_json_default, separators=(',', ':')))
+            if not rows:
+                continue
+            sequences = sorted((change.sequence for change in changes if change.source == source), key=int)
+            day = datetime.now(timezone.utc).strftime('%Y/%m/%d')
+            key = f"{CHANGELOG_PREFIX}/{source}/{day}/{sequences[0]}-{sequences[-1]}.jsonl.gz"
+            s3.put_object(Bucket=self.bucket, Key=key, Body=gzip.compress('\n'.join(rows).encode('utf-8')))
+            self.written[source] = self.written.get(source, 0) + len(rows)
+
+    def finish(self):
+        written, self.written = self.written, {}
+        return written
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value, key=str)
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, 'value'):
+        return base64.b64encode(bytes(getattr(value, 'value', value))).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _registered_views():
+    """Views whose target is configured in this environment"""
+    views = []
+    if os.environ.get('SEARCH_INDEX_TABLE'):
+        views.append(SearchIndexView(os.environ['SEARCH_INDEX_TABLE']))
+    if os.environ.get('SNAPSHOT_BUCKET'):
+        views.append(SymbolSnapshotView(os.environ['SNAPSHOT_BUCKET']))
+    if os.environ.get('MINING_METRICS_FUNCTION'):
+        views.append(ValuationInputsView(os.environ['MINING_METRICS_FUNCTION']))
+    if os.environ.get('EXPORT_BUCKET'):
+        views.append(ExportChangeLogView(os.environ['EXPORT_BUCKET']))
+    return views
+
+
+# Built once per container, so view state (e.g. the snapshot rows) survives between batches
+VIEWS = _registered_views()
+
+
+def process(records, views=None):
+    """Apply one batch of stream records to every interested view; returns a per-view summary"""
+    changes = coalesce(records)
+    summary = {'records': len(records), 'changes': len(changes)}
+    for view in VIEWS if views is None else views:
+        relevant = [change for change in changes if change.source in view.sources]
+        if relevant:
+            view.apply(relevant)
+            summary[view.name] = view.finish()
+    return summary
+
+
+def _scan(table_name, projection=None):
+    table = dynamodb.Table(table_name)
+    scan_params = {}
+    if projection:
+        names = {f"#p{i}": name for i, name in enumerate(projection)}
+        scan_params.update(ProjectionExpression=', '.join(names), ExpressionAttributeNames=names)
+    while True:
+        response = table.scan(**scan_params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def rebuild(source):
+    """Replay a whole table through its views as inserts (initial backfill or repair)"""
+    table_name = next(name for name, value in SOURCES.items() if value == source)
+    views = [view for view in VIEWS if source in view.sources and view.rebuildable]
+    for view in views:
+        view.reset()
+    key_names = ['symbol', 'exchange'] if source == 'symbols' else ['symbol']
+    replayed = 0
+    page = []
+    for item in _scan(table_name):
+        page.append(Change(source, {name: item[name] for name in key_names}, None, item, None))
+        if len(page) >= REBUILD_PAGE_ITEMS:
+            for view in views:
+                view.apply(page)
+            replayed += len(page)
+            page = []
+    for view in views:
+        view.apply(page)
+        view.finish()
+    replayed += len(page)
+    logger.info(f"Rebuilt {', '.join(view.name for view in views)} from {replayed} {source} items")
+    return replayed
+
+
+def drain(stream, batch_size=500):
+    """Apply a FileStream until it is exhausted, committing after each batch"""
+    totals = {'batches': 0, 'records': 0}
+    while True:
+        records, offset = stream.read_batch(batch_size)
+        if not records:
+            return totals
+        summary = process(records)
+        stream.commit(records[-1]['dynamodb']['SequenceNumber'], offset)
+        logger.info(f"Applied stream batch: {json.dumps(summary, default=str)}")
+        totals['batches'] += 1
+        totals['records'] += len(records)
+
+
+def lambda_handler(event, context):
+    if event.get('action') == 'rebuild':
+        try:
+            replayed = {source: rebuild(source) for source in event.get('sources', ['symbols'])}
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'rebuilt': replayed})
+            }
+        except Exception as e:
+            logger.error(f"View rebuild failed: {str(e)}")
+            return {
+                'statusCode': 500,
+                'body': f'View rebuild failed: {str(e)}'
+            }
+
+    records = event.get('Records', [])
+    try:
+        summary = process(records)
+        logger.info(f"Applied stream batch: {json.dumps(summary, default=str)}")
+        return {'batchItemFailures': []}
+    except Exception as e:
+        logger.error(f"Stream batch failed: {str(e)}")
+        # The checkpoint stays before this batch and the whole batch is retried;
+        # views are idempotent, so re-applying the part that succeeded is safe
+        return {'batchItemFailures': [{'itemIdentifier': records[0]['dynamodb']['SequenceNumber']}] if records else []}
+
+
+if __name__ == '__main__':
+    # Local runs against a file stream, e.g.: PYTHONPATH=../layers/shared python app.py drain changes.jsonl
+    from file_stream import FileStream
+
+    parser = argparse.ArgumentParser(description='Apply stream changes to derived views')
+    commands = parser.add_subparsers(dest='command', required=True)
+    drain_parser = commands.add_parser('drain', help='Apply a JSON-lines stream file from its checkpoint')
+    drain_parser.add_argument('path')
+    drain_parser.add_argument('--checkpoint')
+    drain_parser.add_argument('--batch-size', type=int, default=500)
+    rebuild_parser = commands.add_parser('rebuild', help='Replay a whole table through its views')
+    rebuild_parser.add_argument('sources', nargs='+', choices=['symbols', 'overview'])
+    args = parser.parse_args()
+    logging.basicConfig()
+    if args.command == 'drain':
+        print(json.dumps(drain(FileStream(args.path, args.checkpoint), args.batch_size)))
+    else:
+        print(json.dumps({source: rebuild(source) for source in args.sources}))
@@ -0,0 +1,103 @@
+"""File-backed stand-in for a DynamoDB stream, for local runs and tests.
+
+Records are appended as JSON lines in the same shape Lambda receives from
+DynamoDB Streams (eventName, eventSourceARN, dynamodb.Keys/OldImage/NewImage
+as typed attribute values, SequenceNumber), so app.process handles both
+sources identically. A checkpoint file holds the sequence number and byte
+offset of the last committed record; reading resumes after it.
+"""
+import os
+import json
+import base64
+import threading
+
+from boto3.dynamodb.types import TypeSerializer
+
+# Zero-padded like typical DynamoDB sequence numbers; those vary in length, so consumers compare them as ints
+# Same width as DynamoDB's sequence numbers, so they compare as strings too
+SEQUENCE_DIGITS = 21
+
+
+def _typed(item):
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def _json_default(value):
+    # Binary attributes travel base64-encoded, as in Lambda stream events
+    if isinstance(value, (bytes, bytearray)) or hasattr(value, 'value'):
+        return base64.b64encode(bytes(getattr(value, 'value', value))).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FileStream:
+
+    def __init__(self, path, checkpoint_path=None):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+        self._lock = threading.Lock()
+        self._sequence = None
+
+    def _checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'sequence': None, 'offset': 0}
+
+    def _last_sequence(self):
+        last = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        last = int(json.loads(line)['dynamodb']['SequenceNumber'])
+        except FileNotFoundError:
+            pass
+        return last
+
+    def append(self, table_name, event_name, keys, old_image=None, new_image=None):
+        """Append one INSERT/MODIFY/REMOVE record; returns its sequence number"""
+        with self._lock:
+            if self._sequence is None:
+                self._sequence = self._last_sequence()
+            self._sequence += 1
+            sequence = str(self._sequence).zfill(SEQUENCE_DIGITS)
+            change = {'Keys': _typed(keys), 'SequenceNumber': sequence, 'StreamViewType': 'NEW_AND_OLD_IMAGES'}
+            if old_image is not None:
+                change['OldImage'] = _typed(old_image)
+            if new_image is not None:
+                change['NewImage'] = _typed(new_image)
+            record = {
+                'eventName': event_name,
+                'eventSource': 'aws:dynamodb',
+                'eventSourceARN': f"arn:aws:dynamodb:local:000000000000:table/{table_name}/stream/file",
+                'dynamodb': change
+            }
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, default=_json_default) + '\n')
+            return sequence
+
+    def read_batch(self, max_records):
+        """Up to max_records uncommitted records, plus the offset to commit after them"""
+        offset = self._checkpoint()['offset']
+        records = []
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                while len(records) < max_records:
+                    line = f.readline()
+                    if not line:
+                        break
+                    offset = f.tell()
+                    if line.strip():
+                        records.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        return records, offset
+
+    def commit(self, sequence, offset):
+        """Record that everything up to sequence (ending at byte offset) has been applied"""
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'sequence': sequence, 'offset': offset}, f)
+        os.replace(temporary, self.checkpoint_path)
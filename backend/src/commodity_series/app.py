@@ -0,0 +1,312 @@
+"""Commodity, FX and crypto series ingest, and miners' sensitivity to them.
+
+Each run refreshes the configured Alpha Vantage series (least recently
+updated first, within COMMODITY_CALL_BUDGET) into the commodity series
+table. It then rolls each window's beta/correlation grid (every symbol with
+stored daily bars against every series of that frequency) forward to the
+latest date all series have reached; a series more than STALE_DAYS behind
+is left out until it catches up. The window sums are kept on the
+per-symbol sensitivity items, so a normal run only adds the days that
+entered the window and subtracts the days that left it.
+
+Daily series are compared on daily log returns. Monthly series (copper,
+aluminum, the all-commodities index) are compared on month-over-month
+returns of the last close in each month. {"rebuild": true} recomputes every
+window from the stored history.
+"""
+import os
+import json
+import time
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+import boto3
+import numpy as np
+import alpha_vantage
+from dynamodb_batch import batch_get
+
+from rolling import RollingMoments, FIELDS, align, log_returns
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = boto3.client('s3')
+dynamodb = boto3.resource('dynamodb')
+commodity_series_table = dynamodb.Table(os.environ['COMMODITY_SERIES_TABLE'])
+sensitivity_table = dynamodb.Table(os.environ['SENSITIVITY_TABLE'])
+price_bars_table = dynamodb.Table(os.environ['PRICE_BARS_TABLE'])
+
+# How long a call may wait for a pooled key to come off its rate window
+KEY_WAIT_SEC = 20
+# Series name -> Alpha Vantage query parameters
+SERIES = {
+    'WTI': {'function': 'WTI', 'interval': 'daily'},
+    'BRENT': {'function': 'BRENT', 'interval': 'daily'},
+    'NATURAL_GAS': {'function': 'NATURAL_GAS', 'interval': 'daily'},
+    'COPPER': {'function': 'COPPER', 'interval': 'monthly'},
+    'ALUMINUM': {'function': 'ALUMINUM', 'interval': 'monthly'},
+    'ALL_COMMODITIES': {'function': 'ALL_COMMODITIES', 'interval': 'monthly'},
+    # Most producers report costs in CAD or AUD while selling metal in USD
+    'USDCAD': {'function': 'FX_DAILY', 'from_symbol': 'USD', 'to_symbol': 'CAD', 'outputsize': 'full'},
+    'AUDUSD': {'function': 'FX_DAILY', 'from_symbol': 'AUD', 'to_symbol': 'USD', 'outputsize': 'full'},
+    'BTC': {'function': 'DIGITAL_CURRENCY_DAILY', 'symbol': 'BTC', 'market': 'USD'}
+}
+# Window lengths in observations of each frequency
+WINDOWS = {'daily': [60, 250], 'monthly': [12]}
+# History kept per series; the miners' daily bars only go back 400 days
+RETAIN_DAYS = {'daily': 400, 'monthly': 3660}
+# Series this far behind the miners' latest close are left out rather than holding every window back
+STALE_DAYS = {'daily': 10, 'monthly': 95}
+
+
+def _frequency(config):
+    return 'monthly' if config.get('interval') == 'monthly' else 'daily'
+
+
+def _parse_series(config, data):
+    """Observations ascending as (YYYY-MM-DD, float)"""
+    if 'data' in data:
+        # Commodity endpoints; FRED marks missing days with "."
+        points = ((row.get('date'), row.get('value')) for row in data['data'])
+    else:
+        series = next((value for key, value in data.items() if key.startswith('Time Series')), None)
+        if not series:
+            raise RuntimeError(data.get('Information') or data.get('Note') or data.get('Error Message') or 'No series in response')
+        points = (
+            (day, next((value for key, value in bar.items() if 'close' in key), None))
+            for day, bar in series.items()
+        )
+    observations = []
+    for day, value in points:
+        try:
+            observations.append((day, float(value)))
+        except (TypeError, ValueError):
+            continue
+    return sorted(observations)
+
+
+def _fetch_series(name):
+    config = SERIES[name]
+    response = alpha_vantage.client().request(config, timeout=30, max_wait=KEY_WAIT_SEC)
+    return _parse_series(config, response.json())
+
+
+def _scan(table, projection=None, names=None):
+    items = []
+    scan_params = {}
+    if projection:
+        scan_params['ProjectionExpression'] = projection
+    if names:
+        scan_params['ExpressionAttributeNames'] = names
+    while True:
+        response = table.scan(**scan_params)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items
+
+
+def ingest(names, call_budget):
+    """Refresh up to call_budget series, least recently updated first"""
+    updated_at = {
+        item['series']: item.get('updated', 0)
+        for item in batch_get(dynamodb, commodity_series_table, [{'series': name} for name in names], 'series, updated')
+    }
+    updated = []
+    for name in sorted(names, key=lambda name: updated_at.get(name, 0))[:call_budget]:
+        try:
+            observations = _fetch_series(name)
+        except Exception as e:
+            logger.error(f"Commodity series fetch failed for {name}: {str(e)}")
+            continue
+        frequency = _frequency(SERIES[name])
+        cutoff = (date.today() - timedelta(days=RETAIN_DAYS[frequency])).isoformat()
+        observations = [(day, value) for day, value in observations if day > cutoff]
+        if not observations:
+            logger.warning(f"No observations for {name} since {cutoff}")
+            continue
+        commodity_series_table.put_item(Item={
+            'series': name,
+            'frequency': frequency,
+            'dates': [day for day, _ in observations],
+            'values': [Decimal(str(round(value, 6))) for _, value in observations],
+            'updated': int(time.time())
+        })
+        updated.append(name)
+    return updated
+
+
+def _key(frequency, day):
+    return day[:7] if frequency == 'monthly' else day
+
+
+def _keyed(frequency, dates, values):
+    """{calendar key: level}; for monthly keys the last observation in the month wins"""
+    return {_key(frequency, day): float(value) for day, value in zip(dates, values)}
+
+
+def _previous_month(key):
+    year, month = int(key[:4]), int(key[5:7])
+    return f"{year - (month == 1)}-{12 if month == 1 else month - 1:02d}"
+
+
+def _to_decimal(value):
+    # DynamoDB rejects NaN and numbers below 1E-130
+    if value is None or not np.isfinite(value):
+        return None
+    return Decimal(repr(float(value))) if abs(value) > 1e-100 else Decimal(0)
+
+
+def _load_sums(items, factors):
+    """Stored window sums as {field: (len(items) x M)} arrays"""
+    return {
+        field: np.array([[float(item['moments'][factor][i]) for factor in factors] for item in items]).reshape(len(items), len(factors))
+        for i, field in enumerate(FIELDS)
+    }
+
+
+def _roll_window(window, calendar, symbol_returns, factor_returns, symbols, factors, stored, rebuild):
+    """Moments for the window ending at the last calendar row, reusing stored sums where they line up"""
+    end = len(calendar) - 1
+    position = {key: row for row, key in enumerate(calendar)}
+    moments = RollingMoments(symbols, factors)
+    groups = {}
+    for column, symbol in enumerate(symbols):
+        item = stored.get(symbol)
+        previous = position.get(item.get('as_of')) if item and not rebuild else None
+        # Stored sums only carry forward over the same series and an as_of still inside the calendar
+        if previous is not None and (previous > end or sorted(item.get('moments', {})) != sorted(factors)):
+            previous = None
+        groups.setdefault(previous, []).append(column)
+
+    new_start = max(0, end - window + 1)
+    for previous, columns in groups.items():
+        if previous is None:
+            part = RollingMoments([symbols[c] for c in columns], factors)
+            part.add(symbol_returns[new_start:end + 1, columns], factor_returns[new_start:end + 1])
+        else:
+            part = RollingMoments([symbols[c] for c in columns], factors,
+                                  _load_sums([stored[symbols[c]] for c in columns], factors))
+            old_start = max(0, previous - window + 1)
+            leave_end = min(previous, new_start - 1)
+            enter_start = max(previous + 1, new_start)
+            # Rows that left the window since the stored as_of, then rows that entered it
+            part.add(symbol_returns[old_start:leave_end + 1, columns], factor_returns[old_start:leave_end + 1], sign=-1.0)
+            part.add(symbol_returns[enter_start:end + 1, columns], factor_returns[enter_start:end + 1])
+        moments.assign(columns, part)
+    return moments
+
+
+def update_sensitivity(rebuild=False):
+    """Roll every window forward and store per-symbol rows and the full matrix; returns rows written"""
+    price_items = [item for item in _scan(price_bars_table, 'symbol, dates, closes') if item.get('dates')]
+    series_items = {item['series']: item for item in _scan(commodity_series_table) if item['series'] in SERIES}
+    stored = {}
+    for item in _scan(sensitivity_table, 'symbol, #w, as_of, moments', {'#w': 'window'}):
+        stored.setdefault(item['window'], {})[item['symbol']] = item
+    symbols = sorted(item['symbol'] for item in price_items)
+    price_items.sort(key=lambda item: item['symbol'])
+    written = 0
+
+    for frequency, windows in WINDOWS.items():
+        if not symbols:
+            continue
+        latest_close = date.fromisoformat(max(item['dates'][-1] for item in price_items))
+        factors = []
+        for name, item in sorted(series_items.items()):
+            if item['frequency'] != frequency or not item.get('dates'):
+                continue
+            if (latest_close - date.fromisoformat(item['dates'][-1])).days > STALE_DAYS[frequency]:
+                logger.warning(f"Leaving {name} out of {frequency} sensitivity: last observation {item['dates'][-1]}")
+                continue
+            factors.append(name)
+        if not factors:
+            continue
+        symbol_levels = [_keyed(frequency, item['dates'], item['closes']) for item in price_items]
+        factor_levels = [_keyed(frequency, series_items[name]['dates'], series_items[name]['values']) for name in factors]
+        # Stop at the last key every series has reached, so no row is added before its data is final
+        settled = min([max(levels) for levels in factor_levels] + [max(max(levels) for levels in symbol_levels)])
+        if frequency == 'monthly':
+            # The miners' current month is still moving
+            settled = min(settled, _previous_month(max(max(levels) for levels in symbol_levels)))
+        calendar = sorted({key for levels in symbol_levels for key in levels if key <= settled})
+        if len(calendar) < 3:
+            continue
+        symbol_returns = log_returns(align(calendar, symbol_levels))
+        factor_returns = log_returns(align(calendar, factor_levels))
+
+        for window in windows:
+            label = f"{frequency}-{window}"
+            moments = _roll_window(window, calendar, symbol_returns, factor_returns, symbols, factors,
+                                   stored.get(label, {}), rebuild)
+            written += _store_window(label, frequency, window, calendar[-1], moments)
+    return written
+
+
+def _store_window(label, frequency, window, as_of, moments):
+    beta = moments.beta()
+    correlation = moments.correlation()
+    observations = moments.observations()
+    now = int(time.time())
+    with sensitivity_table.batch_writer() as batch:
+        for row, symbol in enumerate(moments.symbols):
+            batch.put_item(Item={
+                'symbol': symbol,
+                'window': label,
+                'frequency': frequency,
+                'window_length': window,
+                'as_of': as_of,
+                'betas': {factor: _to_decimal(beta[row, column]) for column, factor in enumerate(moments.factors)},
+                'correlations': {factor: _to_decimal(correlation[row, column]) for column, factor in enumerate(moments.factors)},
+                'observations': {factor: int(observations[row, column]) for column, factor in enumerate(moments.factors)},
+                'moments': {
+                    factor: [_to_decimal(moments.sums[field][row, column]) for field in FIELDS]
+                    for column, factor in enumerate(moments.factors)
+                },
+                'updated': now
+            })
+    bucket = os.environ.get('ANALYTICS_BUCKET')
+    if bucket:
+        # The whole N x M grid in one object, for exports and cross-sectional views
+        s3.put_object(
+            Bucket=bucket,
+            Key=f"analytics/sensitivity/{label}.json",
+            Body=json.dumps({
+                'window': label,
+                'as_of': as_of,
+                'symbols': moments.symbols,
+                'series': moments.factors,
+                'beta': [[_rounded(value) for value in row] for row in beta],
+                'correlation': [[_rounded(value) for value in row] for row in correlation]
+            }).encode('utf-8'),
+            ContentType='application/json'
+        )
+    logger.info(f"Stored {label} sensitivity for {len(moments.symbols)} symbols x {len(moments.factors)} series as of {as_of}")
+    return len(moments.symbols)
+
+
+def _rounded(value):
+    return round(float(value), 6) if np.isfinite(value) else None
+
+
+def lambda_handler(event, context):
+    try:
+        names = [name for name in (event.get('series') or SERIES) if name in SERIES]
+        updated = []
+        if not event.get('skip_ingest'):
+            call_budget = int(event.get('call_budget') or os.environ.get('COMMODITY_CALL_BUDGET', len(SERIES)))
+            updated = ingest(names, call_budget)
+        written = update_sensitivity(rebuild=bool(event.get('rebuild')))
+        return {
+            'statusCode': 200,
+            'body': f'Updated {len(updated)} commodity series, wrote {written} sensitivity rows'
+        }
+
+    except Exception as e:
+        logger.error(f"Commodity sensitivity update failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Commodity sensitivity update failed: {str(e)}'
+        }
@@ -0,0 +1,95 @@
+"""Sliding-window co-moments between N symbols and M factor series.
+
+Every (symbol, factor) pair keeps six sums over the window: the count and
+the sums of x, y, x^2, y^2 and xy, taken only over rows where both returns
+exist. Sliding the window is adding the rows that enter and subtracting the
+rows that leave. Both are matrix products over a block of rows, so one day's
+update for every pair costs a few (N x T) @ (T x M) products, however long
+the window. Betas and correlations for the whole N x M grid are then
+elementwise expressions over the sums.
+"""
+import numpy as np
+
+FIELDS = ('n', 'sx', 'sy', 'sxx', 'syy', 'sxy')
+
+
+class RollingMoments:
+
+    def __init__(self, symbols, factors, sums=None):
+        self.symbols = list(symbols)
+        self.factors = list(factors)
+        shape = (len(self.symbols), len(self.factors))
+        self.sums = sums if sums is not None else {field: np.zeros(shape) for field in FIELDS}
+
+    def add(self, y, x, sign=1.0):
+        """Add (sign=1) or remove (sign=-1) rows of symbol returns y (T x N) and factor returns x (T x M)"""
+        if not len(y):
+            return
+        y_valid = (~np.isnan(y)).astype(float)
+        x_valid = (~np.isnan(x)).astype(float)
+        y0 = np.nan_to_num(y)
+        x0 = np.nan_to_num(x)
+        self.sums['n'] += sign * (y_valid.T @ x_valid)
+        self.sums['sx'] += sign * (y_valid.T @ x0)
+        self.sums['sy'] += sign * (y0.T @ x_valid)
+        self.sums['sxx'] += sign * (y_valid.T @ (x0 * x0))
+        self.sums['syy'] += sign * ((y0 * y0).T @ x_valid)
+        self.sums['sxy'] += sign * (y0.T @ x0)
+
+    def _centered(self):
+        s = self.sums
+        # Counts are whole numbers; rounding drops add/subtract drift
+        n = np.round(s['n'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var_x = s['sxx'] - s['sx'] * s['sx'] / n
+            var_y = s['syy'] - s['sy'] * s['sy'] / n
+            cov = s['sxy'] - s['sx'] * s['sy'] / n
+        return n, var_x, var_y, cov
+
+    def observations(self):
+        return np.round(self.sums['n']).astype(int)
+
+    def beta(self, min_observations=2):
+        """Sensitivity of each symbol's returns to each factor's (N x M)"""
+        n, var_x, _, cov = self._centered()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where((n >= min_observations) & (var_x > 0), cov / var_x, np.nan)
+
+    def correlation(self, min_observations=2):
+        n, var_x, var_y, cov = self._centered()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where((n >= min_observations) & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+        return np.clip(corr, -1.0, 1.0)
+
+    def subset(self, rows):
+        """Moments for a subset of symbols (by row position)"""
+        return RollingMoments([self.symbols[i] for i in rows], self.factors,
+                              {field: values[rows] for field, values in self.sums.items()})
+
+    def assign(self, rows, other):
+        for field in FIELDS:
+            self.sums[field][rows] = other.sums[field]
+
+
+def log_returns(levels):
+    """Row-over-row log returns of a (T x K) level array; the first row is NaN"""
+    returns = np.full(levels.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = np.log(levels[1:] / levels[:-1])
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def align(calendar, keyed_series, fill=True):
+    """(T x K) levels of each {key: value} series on the calendar keys, forward-filled"""
+    position = {key: row for row, key in enumerate(calendar)}
+    levels = np.full((len(calendar), len(keyed_series)), np.nan)
+    for column, series in enumerate(keyed_series):
+        for key, value in series.items():
+            if key in position:
+                levels[position[key], column] = value
+    if fill:
+        rows = np.where(np.isnan(levels), 0, np.arange(len(calendar))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        levels = levels[rows, np.arange(levels.shape[1])]
+    return levels
@@ -0,0 +1,298 @@
+"""Insider transactions and dividend history from Alpha Vantage.
+
+Rows live in the corporate events table under one partition per symbol and
+dataset, sorted by date:
+
+    INSIDER#<symbol>   <transaction_date>#<hash>   executive, side, shares, price, value
+    DIVIDEND#<symbol>  <ex_dividend_date>#<hash>   amount, declared, record, paid
+    SUMMARY#<symbol>   SUMMARY                     high-water marks and aggregates
+
+so "insider trades in the last 12 months" or "dividends since 2015" is one
+Query. Alpha Vantage returns each symbol's full history, so only rows dated
+on or after the stored high-water mark are written (the mark's own day is
+re-put, since late filings for that day can appear; the content hash in the
+sort key makes that idempotent). After writing, the symbol's aggregates (net
+insider buying per window, trailing dividend yield, growth streaks) are
+recomputed from the stored rows and kept on the summary item.
+"""
+import os
+import time
+import hashlib
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+import boto3
+import alpha_vantage
+from boto3.dynamodb.conditions import Key
+from dynamodb_batch import batch_get
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+events_table = dynamodb.Table(os.environ['CORPORATE_EVENTS_TABLE'])
+company_overview_table = dynamodb.Table(os.environ['COMPANY_OVERVIEW_TABLE'])
+
+DATASETS = {'insider': 'INSIDER_TRANSACTIONS', 'dividend': 'DIVIDENDS'}
+# Net insider buying is summarised over these trailing windows
+INSIDER_WINDOWS_MONTHS = [3, 6, 12]
+# Calendar years of dividend totals kept on the summary
+ANNUAL_DIVIDEND_YEARS = 10
+# How long a call may wait for a pooled key to come off its rate window
+KEY_WAIT_SEC = 20
+
+
+def _row_hash(*values):
+    return hashlib.sha256('|'.join(str(value) for value in values).encode('utf-8')).hexdigest()[:10]
+
+
+def _number(value):
+    try:
+        number = Decimal(str(value).strip())
+    except Exception:
+        return None
+    return number if number.is_finite() else None
+
+
+def _date(value):
+    value = (value or '').strip()
+    return value if len(value) == 10 and value[4] == '-' else None
+
+
+def _universe(event):
+    """Symbols in the data_api cache, or those passed in"""
+    if event.get('symbols'):
+        return sorted({symbol.upper() for symbol in event['symbols']})
+    symbols = set()
+    scan_params = {'ProjectionExpression': 'symbol'}
+    while True:
+        response = company_overview_table.scan(**scan_params)
+        symbols.update(item['symbol'] for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return sorted(symbols)
+
+
+def _fetch(function, symbol):
+    response = alpha_vantage.client().request({'function': function, 'symbol': symbol}, timeout=15, max_wait=KEY_WAIT_SEC)
+    data = response.json()
+    if 'data' not in data:
+        raise RuntimeError(data.get('Information') or data.get('Note') or data.get('Error Message') or 'No data in response')
+    return data['data']
+
+
+def _insider_rows(symbol, records):
+    rows = []
+    for record in records:
+        day = _date(record.get('transaction_date'))
+        side = (record.get('acquisition_or_disposal') or '').strip().upper()
+        shares = _number(record.get('shares'))
+        if not day or side not in ('A', 'D') or not shares:
+            continue
+        price = _number(record.get('share_price'))
+        executive = (record.get('executive') or '').strip()
+        rows.append({
+            'pk': f"INSIDER#{symbol}",
+            'sk': f"{day}#{_row_hash(day, executive, side, shares, price, record.get('security_type'))}",
+            'executive': executive,
+            'title': (record.get('executive_title') or '').strip(),
+            'security': (record.get('security_type') or '').strip(),
+            'side': side,
+            'shares': shares,
+            # Grants and option exercises come through at a zero price
+            'price': price if price else None,
+            'value': (shares * price).quantize(Decimal('0.01')) if price else None
+        })
+    return rows
+
+
+def _dividend_rows(symbol, records):
+    rows = []
+    for record in records:
+        ex_date = _date(record.get('ex_dividend_date'))
+        amount = _number(record.get('amount'))
+        if not ex_date or amount is None:
+            continue
+        rows.append({
+            'pk': f"DIVIDEND#{symbol}",
+            'sk': f"{ex_date}#{_row_hash(ex_date, amount)}",
+            'amount': amount,
+            'declared': _date(record.get('declaration_date')),
+            'record': _date(record.get('record_date')),
+            'paid': _date(record.get('payment_date'))
+        })
+    return rows
+
+
+def _query(pk, since=None):
+    """Rows of one partition, oldest first, optionally from a YYYY-MM-DD date"""
+    condition = Key('pk').eq(pk)
+    if since:
+        condition &= Key('sk').gte(since)
+    rows = []
+    query_params = {'KeyConditionExpression': condition}
+    while True:
+        response = events_table.query(**query_params)
+        rows.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return rows
+
+
+def _months_ago(today, months):
+    month = today.month - months
+    year = today.year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return date(year, month, min(today.day, 28)).isoformat()
+
+
+def insider_summary(symbol, today):
+    """Priced buys vs sells per trailing window (one Query over the longest window)"""
+    rows = _query(f"INSIDER#{symbol}", _months_ago(today, max(INSIDER_WINDOWS_MONTHS)))
+    summary = {}
+    for months in INSIDER_WINDOWS_MONTHS:
+        since = _months_ago(today, months)
+        window = [row for row in rows if row['sk'] >= since and row.get('value') is not None]
+        buys = [row for row in window if row['side'] == 'A']
+        sells = [row for row in window if row['side'] == 'D']
+        buy_value = sum((row['value'] for row in buys), Decimal(0))
+        sell_value = sum((row['value'] for row in sells), Decimal(0))
+        summary[f"{months}m"] = {
+            'buys': len(buys),
+            'sells': len(sells),
+            'buyers': len({row['executive'] for row in buys}),
+            'sellers': len({row['executive'] for row in sells}),
+            'buy_shares': sum((row['shares'] for row in buys), Decimal(0)),
+            'sell_shares': sum((row['shares'] for row in sells), Decimal(0)),
+            'buy_value': buy_value,
+            'sell_value': sell_value,
+            'net_value': buy_value - sell_value
+        }
+    return summary
+
+
+def _streak(years, passes):
+    """How many of the most recent years in a row pass the test"""
+    streak = 0
+    for year in reversed(years):
+        if not passes(year):
+            break
+        streak += 1
+    return streak
+
+
+def dividend_summary(symbol, today, last_close=None, price_as_of=None):
+    """Trailing-twelve-month dividends and yield, annual totals and streaks"""
+    rows = _query(f"DIVIDEND#{symbol}")
+    if not rows:
+        return {'ttm_amount': Decimal(0), 'trailing_yield': None, 'growth_streak_years': 0, 'paid_streak_years': 0, 'annual': {}}
+    year_ago = (today - timedelta(days=365)).isoformat()
+    ttm = sum((row['amount'] for row in rows if row['sk'] >= year_ago), Decimal(0))
+    totals = {}
+    for row in rows:
+        year = int(row['sk'][:4])
+        totals[year] = totals.get(year, Decimal(0)) + row['amount']
+    # The current year is still in progress, so streaks run over complete years
+    complete = list(range(min(totals), today.year))
+    paid = _streak(complete, lambda year: totals.get(year, 0) > 0)
+    growth = _streak(complete[1:], lambda year: totals.get(year, 0) > totals.get(year - 1, 0))
+    last = rows[-1]
+    return {
+        'ttm_amount': ttm,
+        'trailing_yield': (ttm / Decimal(str(last_close))).quantize(Decimal('0.000001')) if last_close else None,
+        'price': last_close,
+        'price_as_of': price_as_of,
+        'last_ex_date': last['sk'][:10],
+        'last_amount': last['amount'],
+        'growth_streak_years': growth,
+        'paid_streak_years': paid,
+        'annual': {str(year): totals[year] for year in sorted(totals)[-ANNUAL_DIVIDEND_YEARS:]}
+    }
+
+
+def _last_closes(symbols):
+    """{symbol: (last_close, as_of)} from the price stats price_bars keeps on the cache"""
+    items = batch_get(dynamodb, company_overview_table, [{'symbol': symbol} for symbol in symbols], 'symbol, price_stats')
+    return {
+        item['symbol']: (item['price_stats'].get('last_close'), item['price_stats'].get('as_of'))
+        for item in items if item.get('price_stats')
+    }
+
+
+def _fetched(summary, dataset, aggregate):
+    """Whether the dataset has been fetched successfully for the summary's symbol"""
+    return f"{dataset}_checked" in summary and (aggregate in summary or not summary.get(f"{dataset}_errors"))
+
+
+def lambda_handler(event, context):
+    try:
+        # Budgets are per key
+        call_budget = int(event.get('call_budget') or int(os.environ.get('EVENTS_CALL_BUDGET', 20)) * alpha_vantage.key_count())
+        datasets = [dataset for dataset in (event.get('datasets') or DATASETS) if dataset in DATASETS]
+        universe = _universe(event)
+        summaries = {
+            item['pk'][len('SUMMARY#'):]: item
+            for item in batch_get(dynamodb, events_table, [{'pk': f"SUMMARY#{symbol}", 'sk': 'SUMMARY'} for symbol in universe])
+        }
+
+        # Never-checked (symbol, dataset) pairs first, then the stalest, one call each
+        queue = sorted(
+            ((summaries.get(symbol, {}).get(f"{dataset}_checked", 0), symbol, dataset)
+             for symbol in universe for dataset in datasets)
+        )[:call_budget]
+        today = date.today()
+        touched = {}
+        written = 0
+        for _, symbol, dataset in queue:
+            if context and context.get_remaining_time_in_millis() < 10000:
+                logger.info(f"Stopping corporate events ingest at {symbol}: invocation almost out of time")
+                break
+            summary = touched.setdefault(symbol, dict(summaries.get(symbol) or {'pk': f"SUMMARY#{symbol}", 'sk': 'SUMMARY'}))
+            try:
+                records = _fetch(DATASETS[dataset], symbol)
+            except Exception as e:
+                logger.error(f"{DATASETS[dataset]} fetch failed for {symbol}: {str(e)}")
+                # Counts as a check, so a symbol that always fails rotates behind the others
+                summary[f"{dataset}_checked"] = int(time.time())
+                summary[f"{dataset}_errors"] = int(summary.get(f"{dataset}_errors", 0)) + 1
+                continue
+            rows = _insider_rows(symbol, records) if dataset == 'insider' else _dividend_rows(symbol, records)
+            high_water = summary.get(f"{dataset}_through") or ''
+            new_rows = [row for row in rows if row['sk'][:10] >= high_water]
+            with events_table.batch_writer(overwrite_by_pkeys=['pk', 'sk']) as batch:
+                for row in new_rows:
+                    batch.put_item(Item=row)
+            written += len(new_rows)
+            if rows:
+                summary[f"{dataset}_through"] = max(high_water, max(row['sk'][:10] for row in rows))
+            summary[f"{dataset}_checked"] = int(time.time())
+            summary[f"{dataset}_errors"] = 0
+
+        closes = _last_closes(list(touched))
+        with events_table.batch_writer(overwrite_by_pkeys=['pk', 'sk']) as batch:
+            for symbol, summary in touched.items():
+                # Aggregates are recomputed on every check: trailing windows move with the date.
+                # A dataset that has only ever failed has nothing stored to summarise.
+                if _fetched(summary, 'insider', 'insider'):
+                    summary['insider'] = insider_summary(symbol, today)
+                if _fetched(summary, 'dividend', 'dividends'):
+                    last_close, as_of = closes.get(symbol, (None, None))
+                    summary['dividends'] = dividend_summary(symbol, today, last_close, as_of)
+                summary['updated'] = int(time.time())
+                batch.put_item(Item=summary)
+
+        logger.info(f"Checked {len(queue)} symbol datasets: {written} rows written, {len(touched)} summaries updated")
+        return {
+            'statusCode': 200,
+            'body': f'Checked {len(queue)} symbol datasets, wrote {written} rows'
+        }
+
+    except Exception as e:
+        logger.error(f"Corporate events ingest failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Corporate events ingest failed: {str(e)}'
+        }
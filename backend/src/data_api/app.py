@@ -4,61 +4,1136 @@ import os
 import logging
 import requests
 import time
-from boto3.dynamodb.conditions import Key
+import base64
+import gzip
+import hashlib
+import hmac
+import re
+import threading
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from boto3.dynamodb.conditions import Attr, Key
+from fuzzy_search import FuzzySearchIndex
+from symbol_search import normalize_name
+from dynamodb_batch import batch_get
+from overview_body import has_price_stats, with_price_stats
+import storage
+import archive
+import records
+import profiling
+import alpha_vantage
+from alpha_vantage import AlphaVantageError
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource('dynamodb')
-symbols_table = dynamodb.Table(os.environ['SYMBOLS_TABLE'])
-metrics_table = dynamodb.Table(os.environ['METRICS_TABLE'])
-company_overview_table = dynamodb.Table(os.environ['COMPANY_OVERVIEW_TABLE'])
+# Overridable so self-hosted servers can point at DynamoDB Local (and, via
+# ALPHA_VANTAGE_URL in alpha_vantage.py, an Alpha Vantage stub/mirror)
+dynamodb = boto3.resource('dynamodb', endpoint_url=os.environ.get('DYNAMODB_ENDPOINT_URL') or None)
+s3 = boto3.client('s3')
+# Symbols, overview/financials cache and metrics (DynamoDB, or SQLite via STORAGE_BACKEND)
+store = storage.from_environment(dynamodb)
+# Raw upstream responses, kept for offline re-transformation (None unless ARCHIVE_ROOT is set)
+response_archive = archive.from_environment()
+search_index_table = dynamodb.Table(os.environ['SEARCH_INDEX_TABLE'])
+popularity_table = dynamodb.Table(os.environ['POPULARITY_TABLE'])
+mining_operating_table = dynamodb.Table(os.environ['MINING_OPERATING_TABLE'])
+news_table = dynamodb.Table(os.environ['NEWS_TABLE'])
+watchlist_table = dynamodb.Table(os.environ['WATCHLIST_TABLE'])
+sensitivity_table = dynamodb.Table(os.environ['SENSITIVITY_TABLE'])
+corporate_events_table = dynamodb.Table(os.environ['CORPORATE_EVENTS_TABLE'])
+# Cache version stamp and admin refresh jobs (see cache_admin.py)
+cache_control_table = dynamodb.Table(os.environ['CACHE_CONTROL_TABLE'])
+
+FINANCIALS_CACHE_SEC = 24 * 3600  # 1 day, for symbols without a scheduled report
+OVERVIEW_CACHE_SEC = 24 * 3600  # 24 hours
+
+# Statements stay valid until the next expected report date plus this grace window
+EARNINGS_GRACE_SEC = 36 * 3600
+# A filing not yet reflected upstream is re-checked daily for at most this long
+EARNINGS_AWAIT_DAYS = 21
+# Fiscal period ends may differ by a few days between the calendar and the statements
+FISCAL_DATE_TOLERANCE_DAYS = 10
+
+# Request counts are buffered per container and flushed at most this often
+REQUEST_COUNT_FLUSH_SEC = 30
+POPULARITY_WINDOW_DAYS = 7
+
+FINANCIAL_STATEMENTS = {'income': 'incomeStatement', 'balance': 'balanceSheet'}
+FINANCIAL_PERIODS = {'annual': 'annualReports', 'quarterly': 'quarterlyReports'}
+# Bodies below this size aren't worth compressing
+COMPRESSION_MIN_BYTES = 1024
+# Largest pre-compressed variant stored on a cache item (items are capped at 400KB)
+MAX_STORED_VARIANT_BYTES = 100 * 1024
+# Compressed bodies kept per container, keyed by body hash and encoding
+COMPRESSED_CACHE_ENTRIES = 64
+_compressed_bodies = OrderedDict()
+# Guards the per-process caches when requests are served from threads (see server.py)
+_cache_lock = threading.Lock()
+
+_request_counts = {}
+_last_counts_flush = time.time()
+
+# The fuzzy name index is rebuilt from the symbols table at most this often per container
+FUZZY_INDEX_TTL_SEC = 15 * 60
+_fuzzy_index = None
+_fuzzy_index_built = 0
+# Held while rebuilding, so concurrent first requests build the index once
+_fuzzy_index_lock = threading.Lock()
+
+# The symbol snapshot pointer (written by symbol_ingest) is re-read at most this often
+SNAPSHOT_CHECK_SEC = 60
+SNAPSHOT_PREFIX = 'snapshots/symbol-universe'
+_symbol_snapshot = {'hash': None, 'body': None, 'checked': 0}
+_symbol_snapshot_lock = threading.Lock()
+
+# Admin invalidations bump this stamp; containers re-read it at most this often
+# and drop their in-process caches when it has moved
+CACHE_VERSION_CHECK_SEC = 30
+CACHE_VERSION_KEY = 'VERSION'
+_cache_version = {'version': None, 'checked': 0}
+
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 100
+NEWS_DEFAULT_LIMIT = 20
+NEWS_MAX_LIMIT = 50
+
+WATCHLIST_MAX_SYMBOLS = 50
+# REALTIME_BULK_QUOTES takes up to 100 symbols per call
+BULK_QUOTE_MAX_SYMBOLS = 100
+# Quotes are reused across watchlist loads in the same container for this long
+QUOTE_CACHE_SEC = 60
+_quotes = {}
+# Cache attributes the watchlist needs; leaves out statements and stored bodies
+WATCHLIST_CACHE_ATTRIBUTES = ['overview_data', 'overview_body', 'price_stats']
+
+class InvalidCursorError(Exception):
+    pass
+
+def _cursor_secret():
+    # Fall back to the (already secret) API key(s) so cursors are always signed
+    secret = (os.environ.get('CURSOR_SIGNING_KEY') or os.environ.get('ALPHA_VANTAGE_API_KEY')
+              or os.environ.get('ALPHA_VANTAGE_API_KEYS', ''))
+    return secret.encode('utf-8')
+
+def _encode_cursor(position, query):
+    """Encode a scan/query position as an opaque, signed continuation token"""
+    payload = json.dumps({'p': position, 'q': query}, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    signature = hmac.new(_cursor_secret(), payload, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(signature + payload).decode('ascii').rstrip('=')
+
+def _decode_cursor(token, query):
+    """Verify a continuation token and return the position it encodes"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        signature, payload = raw[:16], raw[16:]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {str(e)}")
+    expected = hmac.new(_cursor_secret(), payload, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidCursorError("Cursor signature mismatch")
+    data = json.loads(payload)
+    # A cursor is only valid for the query that produced it
+    if data.get('q') != query:
+        raise InvalidCursorError("Cursor does not match query")
+    return data['p']
+
+def _prefix_search(query_lower, limit, position=None):
+    """Typeahead search against the prefix-bucket index.
+
+    Symbol matches are returned first, then name matches. Name matches whose
+    symbol also starts with the query are skipped, since the symbol phase has
+    already returned them, so pages never repeat results. Returns
+    (items, next_position).
+    """
+    phases = [('S', query_lower), ('N', normalize_name(query_lower))]
+    position = position or {'phase': 'S', 'key': None}
+    start = [phase for phase, _ in phases].index(position['phase'])
+    items = []
+    
+    for phase, prefix in phases[start:]:
+        if not prefix:
+            continue
+        query_params = {
+            'KeyConditionExpression': Key('bucket').eq(f"{phase}#{prefix[:2]}") & Key('sort_key').begins_with(prefix),
+            'ProjectionExpression': 'symbol, symbol_lower, exchange, #n',
+            'ExpressionAttributeNames': {'#n': 'name'}
+        }
+        if phase == position['phase'] and position.get('key'):
+            query_params['ExclusiveStartKey'] = position['key']
+        
+        while True:
+            query_params['Limit'] = limit - len(items)
+            response = search_index_table.query(**query_params)
+            for entry in response.get('Items', []):
+                if phase == 'N' and entry['symbol_lower'].startswith(query_lower):
+                    continue
+                items.append(entry)
+            last_key = response.get('LastEvaluatedKey')
+            if len(items) >= limit:
+                return items, ({'phase': phase, 'key': last_key} if last_key else _next_phase(phases, phase))
+            if not last_key:
+                break
+            query_params['ExclusiveStartKey'] = last_key
+    return items, None
+
+def _next_phase(phases, phase):
+    names = [name for name, prefix in phases if prefix]
+    index = names.index(phase) + 1
+    return {'phase': names[index], 'key': None} if index < len(names) else None
+
+def _json_default(value):
+    # DynamoDB returns numbers as Decimal
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _parse_limit(value, default=SEARCH_DEFAULT_LIMIT, maximum=SEARCH_MAX_LIMIT):
+    try:
+        limit = int(value) if value else default
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
 
 def _transform_overview_data(raw_data):
     """Transform Alpha Vantage overview data to dashboard format"""
     if not raw_data or 'Error Message' in raw_data:
         return {}
-    
-    # Helper functions for data transformations
-    def _to_float(value):
+    return records.overview_dashboard(records.parse_overview(raw_data))
+
+# Responses the cache is built from; quotes are too short-lived to be worth keeping
+ARCHIVED_FUNCTIONS = {'OVERVIEW', 'INCOME_STATEMENT', 'BALANCE_SHEET', 'EARNINGS_CALENDAR'}
+
+def _archive_response(function, symbol, body):
+    """Append a raw response to the archive; never fails the request"""
+    if response_archive is None or function not in ARCHIVED_FUNCTIONS:
+        return
+    try:
+        response_archive.put(function, symbol, body, int(time.time()))
+    except Exception as e:
+        logger.error(f"Failed to archive {function} response for {symbol}: {str(e)}")
+
+@profiling.staged('upstream')
+def _alpha_vantage_get(function, symbol, attempts=3, max_wait=None):
+    """Fetch one Alpha Vantage function for a symbol (retries with 1s backoff).
+
+    Calls go through the shared key pool, which moves a rate-limited call on
+    to the next free key; a rate limit only surfaces here once every key is
+    cooling down for longer than max_wait (default: the pool's).
+    """
+    for attempt in range(attempts):
         try:
-            return float(value) if value and value != 'None' else None
-        except (TypeError, ValueError):
+            res = alpha_vantage.client().request({'function': function, 'symbol': symbol}, timeout=10, max_wait=max_wait)
+            if res.status_code == 200:
+                data = res.json()
+                # Alpha Vantage reports errors and rate limiting with a 200
+                if not data or 'Error Message' in data or 'Information' in data or 'Note' in data:
+                    raise AlphaVantageError(
+                        data.get('Error Message') or data.get('Information') or data.get('Note') or 'No data from API'
+                    )
+                _archive_response(function, symbol, res.content)
+                return data
+            logger.warn(f"{function} attempt {attempt+1} for {symbol} failed with status {res.status_code}")
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            logger.warn(f"{function} attempt {attempt+1} for {symbol} failed: {str(e)}")
+            if attempt == attempts - 1:
+                raise
+            time.sleep(1)
+    raise AlphaVantageError(f"Alpha Vantage {function} request failed for {symbol}")
+
+@profiling.staged('cache_write')
+def _update_cache(symbol, fields):
+    """SET fields on a symbol's cache item without rewriting the rest of it.
+
+    New statements without a gzip variant (too small or too large to store)
+    REMOVE the old one, which the full-hit fast path would otherwise serve.
+    """
+    stale = ['financials_gzip'] if 'financials' in fields and 'financials_gzip' not in fields else []
+    store.update_cache(symbol, set_fields=fields, remove_fields=stale)
+
+def _is_fresh(item, field, validity_sec, now):
+    # Items cached before per-dataset timestamps fall back to last_updated
+    updated = item.get(field, item.get('last_updated', 0)) if item else 0
+    return now - updated < validity_sec
+
+def _financials_fresh(item, now, margin_sec=0):
+    """Statements are valid until the scheduler's financials_valid_until, else for FINANCIALS_CACHE_SEC"""
+    if item and item.get('financials_valid_until'):
+        return now + margin_sec < item['financials_valid_until']
+    return _is_fresh(item, 'financials_updated', FINANCIALS_CACHE_SEC - margin_sec, now)
+
+def _refresh_financials(symbol, now):
+    """Fetch income statement and balance sheet and store them (typed) in the cache"""
+    fields = _financials_fields({
+        'symbol': symbol,
+        'incomeStatement': _alpha_vantage_get('INCOME_STATEMENT', symbol),
+        'balanceSheet': _alpha_vantage_get('BALANCE_SHEET', symbol)
+    }, now)
+    try:
+        _update_cache(symbol, fields)
+    except Exception as e:
+        logger.error(f"Failed to cache financials: {str(e)}")
+    return fields['financials']
+
+@profiling.staged('parse')
+def _financials_fields(payloads, now):
+    """Cache attributes for raw statement payloads fetched at `now`; reports are stored parsed"""
+    financials = {'symbol': payloads['symbol']}
+    for statement in FINANCIAL_STATEMENTS.values():
+        if statement in payloads:
+            financials[statement] = records.parse_statement(payloads[statement])
+    fields = {
+        'financials': financials,
+        'financials_index': _financials_index(financials),
+        'financials_updated': now,
+        # The daily refresh schedule extends this to the next report date
+        'financials_valid_until': now + FINANCIALS_CACHE_SEC,
+        'last_updated': now
+    }
+    # Keep a ready-to-send gzip body so full cache hits skip compression
+    gzip_body = _stored_gzip_variant(json.dumps(financials, default=_json_default))
+    if gzip_body:
+        fields['financials_gzip'] = gzip_body
+    return fields
+
+class InvalidSliceError(Exception):
+    pass
+
+def _parse_financials_slice(query_params):
+    """Parse statements/period/from/to/fields into a slice spec (None = full payload)"""
+    if not any(query_params.get(name) for name in ('statements', 'period', 'from', 'to', 'fields')):
+        return None
+    
+    def _choices(value, options, name):
+        if not value:
+            return list(options.values())
+        chosen = []
+        for choice in value.split(','):
+            if choice.strip() not in options:
+                raise InvalidSliceError(f"Invalid {name} '{choice}', expected one of: {', '.join(options)}")
+            chosen.append(options[choice.strip()])
+        return chosen
+    
+    def _date(value, end_of_period):
+        if not value:
             return None
+        if not re.fullmatch(r'\d{4}(-\d{2}(-\d{2})?)?', value):
+            raise InvalidSliceError(f"Invalid date '{value}', expected YYYY, YYYY-MM or YYYY-MM-DD")
+        # Partial dates cover the whole year/month when used as an upper bound
+        return value + ('-12-31'[len(value) - 4:] if end_of_period else '')
+    
+    fields = [field.strip() for field in (query_params.get('fields') or '').split(',') if field.strip()]
+    invalid_fields = [field for field in fields if not re.fullmatch(r'[A-Za-z0-9_]+', field)]
+    if invalid_fields:
+        raise InvalidSliceError(f"Invalid fields: {', '.join(invalid_fields)}")
+    
+    return {
+        'statements': _choices(query_params.get('statements'), FINANCIAL_STATEMENTS, 'statement'),
+        'periods': _choices(query_params.get('period'), FINANCIAL_PERIODS, 'period'),
+        'from': _date(query_params.get('from'), False),
+        'to': _date(query_params.get('to'), True),
+        'fields': fields
+    }
+
+def _financials_index(financials):
+    """fiscalDateEnding of every report, per statement and period, in list order"""
+    return {
+        statement: {
+            period: [report.get('fiscalDateEnding', '') for report in (financials.get(statement) or {}).get(period, [])]
+            for period in FINANCIAL_PERIODS.values()
+        }
+        for statement in FINANCIAL_STATEMENTS.values()
+    }
+
+def _slice_positions(index, spec):
+    """List positions of the reports inside the requested date range"""
+    positions = {}
+    for statement in spec['statements']:
+        for period in spec['periods']:
+            dates = index.get(statement, {}).get(period, [])
+            positions[(statement, period)] = [
+                i for i, date in enumerate(dates)
+                if (not spec['from'] or date >= spec['from']) and (not spec['to'] or date <= spec['to'])
+            ]
+    return positions
+
+def _report_fields(spec):
+    return ['fiscalDateEnding', 'reportedCurrency', *spec['fields']] if spec['fields'] else None
+
+def _slice_financials(symbol, financials, spec):
+    """Cut the requested slice out of a full in-memory financials payload"""
+    fields = _report_fields(spec)
+    result = {'symbol': symbol}
+    for (statement, period), indexes in _slice_positions(_financials_index(financials), spec).items():
+        reports = (financials.get(statement) or {}).get(period, [])
+        result.setdefault(statement, {'symbol': symbol})[period] = [
+            {field: reports[i][field] for field in fields if field in reports[i]} if fields else reports[i]
+            for i in indexes
+        ]
+    return result
+
+@profiling.staged('cache_read')
+def _read_financials_slice(symbol, index, spec):
+    """Read only the requested reports (and fields) from the cache item.
+
+    Report positions are resolved against financials_index. Returns None
+    when the backend can't read that many reports selectively.
+    """
+    positions = _slice_positions(index, spec)
+    financials = store.get_financials_reports(symbol, positions, _report_fields(spec))
+    if financials is None:
+        return None
+    result = {'symbol': symbol}
+    for statement, period in positions:
+        result.setdefault(statement, {'symbol': symbol})[period] = (financials.get(statement) or {}).get(period, [])
+    return result
+
+@profiling.staged('serialize')
+def _financials_body(symbol, financials, spec):
+    return json.dumps(_slice_financials(symbol, financials, spec) if spec else financials, default=_json_default)
+
+def _refresh_overview(symbol, now, price_stats=None):
+    """Fetch OVERVIEW, cache the typed fields and the transformed response body"""
+    fields = _overview_fields(_alpha_vantage_get('OVERVIEW', symbol), now, price_stats)
+    try:
+        _update_cache(symbol, fields)
+    except Exception as e:
+        logger.error(f"Failed to cache response: {str(e)}")
+    return fields['overview_body']
+
+@profiling.staged('parse')
+def _overview_fields(raw_data, now, price_stats=None):
+    """Cache attributes for an OVERVIEW payload fetched at `now`, the body overlaid with the item's price_stats"""
+    # Validate required fields
+    REQUIRED_FIELDS = ['Symbol', 'Name', 'Sector', 'MarketCapitalization']
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in raw_data]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
     
-    def _to_percentage(value):
+    overview = records.parse_overview(raw_data)
+    return {
+        'overview_data': overview,
+        'overview_body': with_price_stats(json.dumps(records.overview_dashboard(overview)), price_stats),
+        'overview_updated': now,
+        'last_updated': now
+    }
+
+def _cached_overview_body(item):
+    """The stored body, served as-is: it already carries price_stats (see overview_body.py).
+
+    Items cached before overview_body (raw payload only), or whose body
+    missed the latest stats (e.g. written before this overlay), are rebuilt
+    here until their next write.
+    """
+    body = item.get('overview_body') or json.dumps(_transform_overview_data(item['overview_data']))
+    if item.get('price_stats') and not has_price_stats(body, item['price_stats']):
+        body = with_price_stats(body, item['price_stats'])
+    return body
+
+def _record_request(symbol):
+    """Count a symbol view for cache warming.
+
+    Counts are buffered in memory and flushed with one ADD per symbol at most
+    every REQUEST_COUNT_FLUSH_SEC, so recording costs nothing on most requests.
+    Counts still buffered when a container is recycled are lost, which is fine
+    for a popularity ranking.
+    """
+    global _last_counts_flush
+    with _cache_lock:
+        _request_counts[symbol] = _request_counts.get(symbol, 0) + 1
+        if time.time() - _last_counts_flush < REQUEST_COUNT_FLUSH_SEC:
+            return
+        counts = dict(_request_counts)
+        _request_counts.clear()
+        _last_counts_flush = time.time()
+    day = time.strftime('%Y-%m-%d', time.gmtime())
+    expires_at = int(time.time()) + 2 * POPULARITY_WINDOW_DAYS * 24 * 3600
+    for counted_symbol, count in counts.items():
         try:
-            return f"{float(value)*100:.2f}%" if value and value != 'None' else None
-        except (TypeError, ValueError):
-            return None
+            popularity_table.update_item(
+                Key={'day': day, 'symbol': counted_symbol},
+                UpdateExpression='ADD request_count :n SET expires_at = :e',
+                ExpressionAttributeValues={':n': count, ':e': expires_at}
+            )
+        except Exception as e:
+            logger.error(f"Failed to record request count for {counted_symbol}: {str(e)}")
+
+def _popularity_counts(days):
+    """Request count per symbol over the last `days` days"""
+    totals = {}
+    now = time.time()
+    for offset in range(days):
+        day = time.strftime('%Y-%m-%d', time.gmtime(now - offset * 24 * 3600))
+        query_params = {'KeyConditionExpression': Key('day').eq(day)}
+        while True:
+            response = popularity_table.query(**query_params)
+            for row in response.get('Items', []):
+                totals[row['symbol']] = totals.get(row['symbol'], 0) + int(row.get('request_count', 0))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return totals
+
+def _popular_symbols(days, limit):
+    """Rank symbols by request count over the last `days` days"""
+    totals = _popularity_counts(days)
+    return sorted(totals, key=lambda symbol: totals[symbol], reverse=True)[:limit]
+
+def _get_fuzzy_index():
+    """Container-cached fuzzy index over every symbol and company name"""
+    global _fuzzy_index, _fuzzy_index_built
+    index = _fuzzy_index
+    if index is not None and time.time() - _fuzzy_index_built < FUZZY_INDEX_TTL_SEC:
+        return index
+    with _fuzzy_index_lock:
+        # Another thread may have rebuilt it while this one waited
+        if _fuzzy_index is not None and time.time() - _fuzzy_index_built < FUZZY_INDEX_TTL_SEC:
+            return _fuzzy_index
+        items, _ = store.scan_symbols(attributes=['symbol', 'exchange', 'name'])
+        try:
+            popularity = _popularity_counts(POPULARITY_WINDOW_DAYS)
+        except Exception as e:
+            logger.error(f"Failed to load popularity for fuzzy ranking: {str(e)}")
+            popularity = {}
+        index = FuzzySearchIndex(items, popularity)
+        _fuzzy_index_built = time.time()
+        _fuzzy_index = index
+    logger.info(f"Built fuzzy search index over {len(index)} symbols")
+    return index
+
+def _warm_cache(event, context):
+    """Pre-fetch and pre-transform the most requested symbols into the cache.
+
+    Runs after symbol_ingest. Anything that would expire within the warm
+    horizon is refreshed, most popular first, until the Alpha Vantage call
+    budget (or the invocation's remaining time) is spent. Symbols passed in the event fill the list when there is
+    not enough request history yet.
+    """
+    top_n = int(event.get('top_n') or os.environ.get('WARM_TOP_N', 20))
+    # Budgets are per key, so the pool's capacity is what gets spent
+    call_budget = int(event.get('call_budget') or int(os.environ.get('WARM_CALL_BUDGET', 60)) * alpha_vantage.key_count())
+    horizon_sec = int(event.get('horizon_sec') or os.environ.get('WARM_HORIZON_SEC', 12 * 3600))
     
-    def _abbreviate_market_cap(value):
+    symbols = _popular_symbols(POPULARITY_WINDOW_DAYS, top_n)
+    for symbol in event.get('symbols', []):
+        if len(symbols) >= top_n:
+            break
+        if symbol not in symbols:
+            symbols.append(symbol)
+    
+    now = int(time.time())
+    calls_used = 0
+    warmed = []
+    for symbol in symbols:
         try:
-            cap = float(value)
-            if cap >= 1e12:
-                return f"{cap/1e12:.2f}T"
-            elif cap >= 1e9:
-                return f"{cap/1e9:.2f}B"
-            elif cap >= 1e6:
-                return f"{cap/1e6:.2f}M"
-            return str(cap)
-        except (TypeError, ValueError):
-            return None
+            item = store.get_cache(symbol)
+        except Exception as e:
+            logger.error(f"Cache lookup failed for {symbol}: {str(e)}")
+            item = None
+        
+        # Each refresh costs 1 (overview) or 2 (financials) upstream calls
+        tasks = []
+        if not _is_fresh(item, 'overview_updated', OVERVIEW_CACHE_SEC - horizon_sec, now):
+            tasks.append((1, _refresh_overview, ((item or {}).get('price_stats'),)))
+        if not _financials_fresh(item, now, horizon_sec):
+            tasks.append((2, _refresh_financials, ()))
+        
+        for cost, refresh, args in tasks:
+            if calls_used + cost > call_budget:
+                logger.info(f"Warm call budget of {call_budget} exhausted at {symbol}")
+                return _warm_summary(symbols, warmed, calls_used)
+            if context and context.get_remaining_time_in_millis() < 5000:
+                logger.info(f"Stopping cache warm at {symbol}: invocation almost out of time")
+                return _warm_summary(symbols, warmed, calls_used)
+            calls_used += cost
+            try:
+                refresh(symbol, now, *args)
+                warmed.append(f"{symbol}:{refresh.__name__[len('_refresh_'):]}")
+            except Exception as e:
+                logger.error(f"Failed to warm {symbol} via {refresh.__name__}: {str(e)}")
+    return _warm_summary(symbols, warmed, calls_used)
+
+def _warm_summary(symbols, warmed, calls_used):
+    summary = {'candidates': symbols, 'warmed': warmed, 'calls_used': calls_used}
+    logger.info(f"Cache warm summary: {json.dumps(summary)}")
+    return {
+        'statusCode': 200,
+        'body': json.dumps(summary)
+    }
+
+def _fetch_earnings_calendar():
+    """Next expected report per symbol from EARNINGS_CALENDAR: {symbol: (reportDate, fiscalDateEnding)}"""
+    res = alpha_vantage.client().request({'function': 'EARNINGS_CALENDAR', 'horizon': '12month'}, timeout=30)
+    text = res.content.decode('utf-8')
+    # Errors and rate limiting come back as JSON instead of CSV
+    if res.status_code != 200 or text.lstrip().startswith('{'):
+        raise AlphaVantageError(f"EARNINGS_CALENDAR request failed: {text[:200]}")
+    _archive_response('EARNINGS_CALENDAR', 'ALL', res.content)
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    calendar = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        symbol = (row.get('symbol') or '').upper()
+        report_date = row.get('reportDate') or ''
+        if not symbol or report_date < today:
+            continue
+        if symbol not in calendar or report_date < calendar[symbol][0]:
+            calendar[symbol] = (report_date, row.get('fiscalDateEnding') or '')
+    return calendar
+
+def _date_epoch(value):
+    return int(datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+
+def _has_fiscal_period(index, fiscal_date):
+    """Whether cached statements include the period ending around fiscal_date"""
+    if not fiscal_date:
+        return True
+    cutoff = (datetime.strptime(fiscal_date, '%Y-%m-%d') - timedelta(days=FISCAL_DATE_TOLERANCE_DAYS)).strftime('%Y-%m-%d')
+    latest = max(
+        (dates[0] for periods in (index or {}).values() for dates in periods.values() if dates),
+        default=''
+    )
+    return latest >= cutoff
+
+def _refresh_schedule(event, context):
+    """Align statement validity with the earnings calendar.
+
+    Runs daily. Each cached symbol's statements stay valid until its next
+    expected report date plus EARNINGS_GRACE_SEC. Once a report date has
+    passed, the symbol is refreshed right away (within the call budget) and
+    re-checked daily until the new fiscal period appears upstream. Symbols
+    without a scheduled report keep the flat FINANCIALS_CACHE_SEC TTL, and
+    invalidated statements (financials_updated 0, see cache_admin) are left
+    stale until they are refetched.
+    """
+    call_budget = int(event.get('call_budget') or int(os.environ.get('SCHEDULE_CALL_BUDGET', 40)) * alpha_vantage.key_count())
+    calendar = _fetch_earnings_calendar()
+    now = int(time.time())
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    
+    items = [
+        item for item in store.scan_cache([
+            'symbol', 'financials_index', 'financials_updated', 'next_report_date',
+            'next_fiscal_date_ending', 'awaiting_fiscal_date_ending', 'awaiting_since'
+        ])
+        if 'financials_index' in item
+    ]
+    
+    calls_used = 0
+    refreshed = []
+    awaiting_count = 0
+    for item in items:
+        symbol = item['symbol']
+        index = item['financials_index']
+        awaiting = item.get('awaiting_fiscal_date_ending')
+        awaiting_since = item.get('awaiting_since')
+        invalidated = item.get('financials_updated') == 0
+        # The previously scheduled report date has passed: wait for its period
+        if item.get('next_report_date') and item['next_report_date'] < today and not awaiting:
+            awaiting, awaiting_since = item.get('next_fiscal_date_ending'), item['next_report_date']
+        if awaiting and awaiting_since and (now - _date_epoch(awaiting_since)) > EARNINGS_AWAIT_DAYS * 86400:
+            logger.warn(f"{symbol} statements never showed fiscal period {awaiting}, giving up")
+            awaiting = None
+        if awaiting and _has_fiscal_period(index, awaiting):
+            awaiting = None
+        
+        if awaiting and calls_used + 2 <= call_budget and not (context and context.get_remaining_time_in_millis() < 5000):
+            calls_used += 2
+            try:
+                index = _financials_index(_refresh_financials(symbol, now))
+                refreshed.append(symbol)
+                invalidated = False
+                if _has_fiscal_period(index, awaiting):
+                    awaiting = None
+            except Exception as e:
+                logger.error(f"Scheduled refresh failed for {symbol}: {str(e)}")
+        
+        report_date, fiscal_date = calendar.get(symbol, (None, None))
+        if invalidated:
+            # Without a validity stamp financials_updated = 0 keeps it stale for the next request
+            valid_until = None
+        elif awaiting:
+            # Not filed upstream yet: re-check tomorrow rather than trusting the cache
+            awaiting_count += 1
+            valid_until = now + FINANCIALS_CACHE_SEC
+        elif report_date:
+            valid_until = _date_epoch(report_date) + EARNINGS_GRACE_SEC
+        else:
+            valid_until = None
+        
+        fields = {
+            'next_report_date': report_date,
+            'next_fiscal_date_ending': fiscal_date,
+            'awaiting_fiscal_date_ending': awaiting,
+            'awaiting_since': awaiting_since if awaiting else None
+        }
+        if valid_until is not None:
+            fields['financials_valid_until'] = valid_until
+        try:
+            _set_schedule_fields(symbol, fields, remove_validity=valid_until is None)
+        except Exception as e:
+            logger.error(f"Failed to store refresh schedule for {symbol}: {str(e)}")
+    
+    summary = {
+        'symbols': len(items),
+        'scheduled': sum(1 for item in items if item['symbol'] in calendar),
+        'awaiting_filing': awaiting_count,
+        'refreshed': refreshed,
+        'calls_used': calls_used + 1
+    }
+    logger.info(f"Refresh schedule summary: {json.dumps(summary)}")
+    return {
+        'statusCode': 200,
+        'body': json.dumps(summary)
+    }
+
+def _set_schedule_fields(symbol, fields, remove_validity=False):
+    """SET the non-empty schedule fields and REMOVE the empty ones"""
+    to_set = {name: value for name, value in fields.items() if value is not None}
+    to_remove = [name for name, value in fields.items() if value is None]
+    if remove_validity:
+        to_remove.append('financials_valid_until')
+    store.update_cache(symbol, set_fields=to_set, remove_fields=to_remove)
+
+def _accepted_encodings(event):
+    """Supported encodings the client accepts, most preferred first"""
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    supported = ['br', 'gzip'] if brotli else ['gzip']
+    weights = {}
+    for part in headers.get('accept-encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        try:
+            weight = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+        except ValueError:
+            weight = 0.0
+        if coding == '*':
+            for name in supported:
+                weights.setdefault(name, weight)
+        elif coding in supported:
+            weights[coding] = weight
+    # Ties go to the server preference order (brotli compresses JSON better)
+    return [name for name in sorted(supported, key=lambda name: -weights.get(name, 0)) if weights.get(name, 0) > 0]
+
+def _compress(raw, encoding):
+    if encoding == 'br':
+        return brotli.compress(raw, quality=5)
+    return gzip.compress(raw, compresslevel=6)
+
+def _encoded_response(response, compressed, encoding):
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {
+        **response,
+        'body': base64.b64encode(compressed).decode('ascii'),
+        'isBase64Encoded': True,
+        'headers': headers
+    }
+
+@profiling.staged('compress')
+def _compress_response(event, response):
+    """Compress a large JSON body with the client's preferred encoding.
+
+    Compressed bodies are memoized by content hash, so repeated cache hits for
+    the same payload are only compressed once per container.
+    """
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded') or len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    encodings = _accepted_encodings(event)
+    if not encodings:
+        return response
     
+    encoding = encodings[0]
+    raw = body.encode('utf-8')
+    key = (hashlib.sha1(raw).hexdigest(), encoding)
+    with _cache_lock:
+        compressed = _compressed_bodies.get(key)
+        if compressed is not None:
+            _compressed_bodies.move_to_end(key)
+    if compressed is None:
+        compressed = _compress(raw, encoding)
+        with _cache_lock:
+            _compressed_bodies[key] = compressed
+            if len(_compressed_bodies) > COMPRESSED_CACHE_ENTRIES:
+                _compressed_bodies.popitem(last=False)
+    if len(compressed) >= len(raw):
+        return response
+    return _encoded_response(response, compressed, encoding)
+
+def _stored_gzip_variant(body):
+    """gzip variant of a cached body to store beside it, if worthwhile and it fits the item"""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return None
+    compressed = gzip.compress(body.encode('utf-8'), compresslevel=9)
+    return compressed if len(compressed) <= MAX_STORED_VARIANT_BYTES else None
+
+@profiling.staged('cache_read')
+def _batch_get_cache_and_metrics(symbol):
+    """The symbol's cache item and metrics in one read.
+
+    The cache projection leaves out the full financials payload; the
+    dashboard only needs the report index to read its slice.
+    """
+    return store.get_cache_and_metrics(symbol, [
+        'overview_data', 'overview_body', 'overview_updated', 'financials_index',
+        'financials_updated', 'financials_valid_until', 'price_stats', 'last_updated'
+    ])
+
+def _dashboard_overview(symbol, item, now):
+    if 'overview_data' in item and _is_fresh(item, 'overview_updated', OVERVIEW_CACHE_SEC, now):
+        return json.loads(_cached_overview_body(item))
+    try:
+        return json.loads(_refresh_overview(symbol, now, item.get('price_stats')))
+    except Exception:
+        if 'overview_data' in item:
+            logger.warn(f"Returning stale overview for {symbol} in dashboard bundle")
+            return json.loads(_cached_overview_body(item))
+        raise
+
+def _dashboard_financials(symbol, item, slice_spec, now):
+    fresh = _financials_fresh(item, now)
+    if fresh and item.get('financials_index'):
+        sliced = _read_financials_slice(symbol, item['financials_index'], slice_spec)
+        if sliced is not None:
+            return sliced
+    if fresh:
+        # Too large to project, or cached before the report index existed
+        cached = store.get_cache(symbol, ['financials'])
+        if cached and 'financials' in cached:
+            return _slice_financials(symbol, cached['financials'], slice_spec)
+    try:
+        return _slice_financials(symbol, _refresh_financials(symbol, now), slice_spec)
+    except Exception:
+        stale = store.get_cache(symbol, ['financials'])
+        if stale and 'financials' in stale:
+            logger.warn(f"Returning stale financials for {symbol} in dashboard bundle")
+            return _slice_financials(symbol, stale['financials'], slice_spec)
+        raise
+
+def _build_dashboard(symbol, slice_spec):
+    """Resolve symbol info, overview, financials slice and metrics in one pass.
+
+    The cache/metrics BatchGetItem and the symbols query run concurrently,
+    then the overview and financials are served from cache or filled from
+    Alpha Vantage in parallel. A failing part is reported under 'errors'
+    instead of failing the whole bundle.
+    """
+    now = int(time.time())
+    bundle = {'symbol': symbol, 'info': [], 'overview': None, 'financials': None, 'metrics': None, 'errors': {}}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        info_future = executor.submit(
+            store.symbol_listings, symbol
+        )
+        try:
+            item, bundle['metrics'] = _batch_get_cache_and_metrics(symbol)
+        except Exception as e:
+            logger.error(f"Dashboard batch read failed for {symbol}: {str(e)}")
+            item = {}
+        futures = {
+            'info': info_future,
+            'overview': executor.submit(_dashboard_overview, symbol, item, now),
+            'financials': executor.submit(_dashboard_financials, symbol, item, slice_spec, now)
+        }
+        for part, future in futures.items():
+            try:
+                bundle[part] = future.result()
+            except Exception as e:
+                logger.error(f"Dashboard {part} failed for {symbol}: {str(e)}")
+                bundle['errors'][part] = str(e)
+    return bundle
+
+def _news_page(symbol, limit, position=None):
+    """Newest-first page of a ticker's news index, hydrated with the stored articles.
+
+    Returns (articles, next_position).
+    """
+    query_params = {
+        'KeyConditionExpression': Key('pk').eq(f"TICKER#{symbol}"),
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if position:
+        query_params['ExclusiveStartKey'] = position
+    response = news_table.query(**query_params)
+    entries = response.get('Items', [])
+
+    articles = {
+        article['pk'][len('ARTICLE#'):]: article
+        for article in batch_get(dynamodb, news_table, [
+            {'pk': f"ARTICLE#{url_hash}", 'sk': 'ARTICLE'} for url_hash in {entry['article'] for entry in entries}
+        ])
+    }
+
+    results = []
+    for entry in entries:
+        article = articles.get(entry['article'])
+        if not article:
+            continue
+        results.append({
+            'id': entry['article'],
+            'title': article.get('title'),
+            'summary': article.get('summary'),
+            'url': article.get('url'),
+            'source': article.get('source'),
+            'banner_image': article.get('banner_image'),
+            'time_published': article.get('time_published'),
+            'sentiment_label': article.get('sentiment_label'),
+            'sentiment_score': article.get('sentiment_score'),
+            'relevance': entry.get('relevance'),
+            'ticker_sentiment': entry.get('sentiment')
+        })
+    return results, response.get('LastEvaluatedKey')
+
+class InvalidQueryError(Exception):
+    pass
+
+# Route segment -> (row partition prefix, summary attribute) in the corporate events table
+CORPORATE_EVENT_SEGMENTS = {'insiders': ('INSIDER', 'insider'), 'dividends': ('DIVIDEND', 'dividends')}
+INSIDER_SIDES = {'buy': 'A', 'sell': 'D'}
+
+def _corporate_events(symbol, segment, query_params):
+    """A symbol's insider trades (?months=12&side=buy|sell) or dividends (?years=10), newest
+    first, with the aggregates corporate_events precomputed. Each is a single range Query."""
+    prefix, summary_field = CORPORATE_EVENT_SEGMENTS[segment]
+    today = datetime.now(timezone.utc).date()
+    query_params = query_params or {}
+    if segment == 'insiders':
+        months = _parse_limit(query_params.get('months'), 12, 120)
+        since = (today - timedelta(days=round(months * 365.25 / 12))).isoformat()
+    else:
+        years = _parse_limit(query_params.get('years'), 10, 50)
+        since = f"{today.year - years + 1}-01-01"
+    query = {
+        'KeyConditionExpression': Key('pk').eq(f"{prefix}#{symbol}") & Key('sk').gte(since),
+        'ScanIndexForward': False
+    }
+    side = query_params.get('side')
+    if segment == 'insiders' and side:
+        if side not in INSIDER_SIDES:
+            raise InvalidQueryError(f"Invalid side '{side}', expected one of: {', '.join(INSIDER_SIDES)}")
+        query['FilterExpression'] = Attr('side').eq(INSIDER_SIDES[side])
+    rows = []
+    while True:
+        response = corporate_events_table.query(**query)
+        rows.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    summary = corporate_events_table.get_item(Key={'pk': f"SUMMARY#{symbol}", 'sk': 'SUMMARY'}).get('Item') or {}
     return {
-        "description": raw_data.get('Description', ''),
-        "sector": raw_data.get('Sector', ''),
-        "industry": raw_data.get('Industry', ''),
-        "market_cap": _abbreviate_market_cap(raw_data.get('MarketCapitalization')),
-        "pe_ratio": _to_float(raw_data.get('PERatio')),
-        "dividend_yield": _to_percentage(raw_data.get('DividendYield')),
-        "52_week_high": _to_float(raw_data.get('52WeekHigh')),
-        "52_week_low": _to_float(raw_data.get('52WeekLow'))
+        'symbol': symbol,
+        'since': since,
+        'summary': summary.get(summary_field),
+        'checked': summary.get(f"{prefix.lower()}_checked"),
+        segment: [
+            {'date': row['sk'][:10], **{key: value for key, value in row.items() if key not in ('pk', 'sk')}}
+            for row in rows
+        ]
     }
 
+def _watchlist_user(event):
+    """Cognito user id from the API Gateway JWT authorizer, or None"""
+    claims = ((event.get('requestContext') or {}).get('authorizer') or {}).get('jwt', {}).get('claims') or {}
+    return claims.get('sub')
+
+def _watchlist_entries(user_id):
+    """([[symbol, name, added_at], ...], version) of a user's stored list"""
+    item = watchlist_table.get_item(Key={'user_id': user_id}).get('Item') or {}
+    return [list(entry) for entry in item.get('entries', [])], item.get('version', 0)
+
+def _update_watchlist(user_id, change):
+    """Apply change(entries) to the user's list with an optimistic version check.
+
+    The list is one item, so a concurrent add/remove from another tab is
+    retried against the fresh list instead of being overwritten.
+    """
+    for attempt in range(3):
+        entries, version = _watchlist_entries(user_id)
+        entries = change(entries)
+        try:
+            watchlist_table.put_item(
+                Item={'user_id': user_id, 'entries': entries, 'version': version + 1, 'updated': int(time.time())},
+                ConditionExpression='attribute_not_exists(user_id) OR version = :v',
+                ExpressionAttributeValues={':v': version}
+            )
+            return entries
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            time.sleep(0.05 * 2 ** attempt)
+    raise RuntimeError('Watchlist was modified concurrently, please retry')
+
+def _bulk_quotes(symbols):
+    """Latest quotes keyed by symbol, one REALTIME_BULK_QUOTES call per 100 uncached symbols"""
+    now = time.time()
+    with _cache_lock:
+        quotes = {symbol: _quotes[symbol][1] for symbol in symbols if symbol in _quotes and now - _quotes[symbol][0] < QUOTE_CACHE_SEC}
+    missing = [symbol for symbol in symbols if symbol not in quotes]
+    for start in range(0, len(missing), BULK_QUOTE_MAX_SYMBOLS):
+        chunk = missing[start:start + BULK_QUOTE_MAX_SYMBOLS]
+        try:
+            data = _alpha_vantage_get('REALTIME_BULK_QUOTES', ','.join(chunk), attempts=1)
+        except Exception as e:
+            logger.warn(f"Bulk quote fetch failed for {len(chunk)} symbols: {str(e)}")
+            continue
+        for row in data.get('data', []):
+            try:
+                quote = {
+                    'price': float(row['close']),
+                    'change': float(row['change']) if row.get('change') else None,
+                    'change_percent': float(row['change_percent']) if row.get('change_percent') else None,
+                    'volume': int(float(row['volume'])) if row.get('volume') else None,
+                    'as_of': row.get('timestamp'),
+                    'source': 'realtime'
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+            quotes[row['symbol']] = quote
+            with _cache_lock:
+                _quotes[row['symbol']] = (now, quote)
+    return quotes
+
+def _hydrate_watchlist(entries):
+    """Each entry with its quote, overview and metrics.
+
+    The cache/metrics BatchGetItem and the bulk quote call run concurrently,
+    so load time stays roughly flat in the number of symbols. Symbols without
+    a live quote fall back to the last stored daily close.
+    """
+    symbols = [entry[0] for entry in entries]
+    if not symbols:
+        return []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        quotes_future = executor.submit(_bulk_quotes, symbols)
+        try:
+            stored = store.get_caches_and_metrics(symbols, WATCHLIST_CACHE_ATTRIBUTES)
+        except Exception as e:
+            logger.error(f"Watchlist batch read failed: {str(e)}")
+            stored = {}
+        quotes = quotes_future.result()
+
+    results = []
+    for symbol, name, added_at in entries:
+        item, metrics = stored.get(symbol, ({}, None))
+        quote = quotes.get(symbol)
+        stats = item.get('price_stats') or {}
+        if not quote and stats.get('last_close') is not None:
+            quote = {'price': stats['last_close'], 'as_of': stats.get('as_of'), 'source': 'daily_close'}
+        overview = None
+        if 'overview_data' in item:
+            overview = json.loads(_cached_overview_body(item))
+            # The list view doesn't show the long-form description
+            overview.pop('description', None)
+        results.append({
+            'symbol': symbol,
+            'name': name,
+            'added_at': added_at,
+            'quote': quote,
+            'overview': overview,
+            'metrics': metrics
+        })
+    return results
+
+def _latest_symbol_snapshot():
+    """(content hash, gzip body) of the current symbol snapshot, cached per container"""
+    # Hash and body are read and replaced together, so no thread pairs one snapshot's hash with another's body
+    with _symbol_snapshot_lock:
+        now = time.time()
+        if _symbol_snapshot['hash'] and now - _symbol_snapshot['checked'] < SNAPSHOT_CHECK_SEC:
+            return _symbol_snapshot['hash'], _symbol_snapshot['body']
+        bucket = os.environ['SNAPSHOT_BUCKET']
+        pointer = json.loads(s3.get_object(Bucket=bucket, Key=f"{SNAPSHOT_PREFIX}/latest.json")['Body'].read())
+        if pointer['hash'] != _symbol_snapshot['hash']:
+            body = s3.get_object(Bucket=bucket, Key=pointer['key'])['Body'].read()
+            _symbol_snapshot.update(hash=pointer['hash'], body=body)
+        _symbol_snapshot['checked'] = now
+        return _symbol_snapshot['hash'], _symbol_snapshot['body']
+
+def _clear_process_caches():
+    """Forget everything this container memoized from the cache and upstream"""
+    global _fuzzy_index
+    with _cache_lock:
+        _quotes.clear()
+        _compressed_bodies.clear()
+    # Waits out a rebuild in progress so it can't reinstate pre-invalidation data
+    with _fuzzy_index_lock:
+        _fuzzy_index = None
+    with _symbol_snapshot_lock:
+        _symbol_snapshot['checked'] = 0
+
+def _sync_cache_version():
+    """Drop in-process caches if an admin invalidation bumped the version stamp since the last check"""
+    now = time.time()
+    with _cache_lock:
+        if now - _cache_version['checked'] < CACHE_VERSION_CHECK_SEC:
+            return
+        _cache_version['checked'] = now
+    try:
+        item = cache_control_table.get_item(Key={'key': CACHE_VERSION_KEY}).get('Item') or {}
+    except Exception as e:
+        logger.error(f"Cache version check failed: {str(e)}")
+        return
+    version = int(item.get('version', 0))
+    if _cache_version['version'] is not None and version != _cache_version['version']:
+        logger.info(f"Cache version moved from {_cache_version['version']} to {version}, clearing in-process caches")
+        _clear_process_caches()
+    _cache_version['version'] = version
+
+def _symbol_from_request(path, event, segment):
+    """Symbol from /<segment>/{symbol} (optionally stage-prefixed) or ?symbol="""
+    parts = [part for part in path.split('/') if part]
+    if segment in parts and parts.index(segment) + 1 < len(parts):
+        return parts[parts.index(segment) + 1].upper()
+    symbol = (event.get('queryStringParameters') or {}).get('symbol')
+    return symbol.upper() if symbol else None
+
 def lambda_handler(event, context):
+    # A no-op unless MEMORY_PROFILE is set (see profiling.py)
+    with profiling.request(event):
+        response = _route_request(event, context)
+        try:
+            return _compress_response(event, response)
+        except Exception as e:
+            logger.error(f"Response compression failed: {str(e)}")
+            return response
+
+def _route_request(event, context):
     try:
         logger.info(f"Incoming event: {json.dumps(event)}")
+        # Scheduled/async invocation from symbol_ingest
+        if event.get('action') == 'warm_cache':
+            return _warm_cache(event, context)
+        # Daily earnings-calendar schedule
+        if event.get('action') == 'refresh_schedule':
+            return _refresh_schedule(event, context)
+        # Offline rebuild of the cache from archived upstream responses
+        if event.get('action') == 'reprocess':
+            # reprocess imports this module, so it is loaded on first use
+            import reprocess
+            summary = reprocess.reprocess(
+                event.get('symbols'),
+                reprocess.parse_as_of(event.get('as_of')),
+                int(event.get('workers') or reprocess.DEFAULT_WORKERS),
+                bool(event.get('dry_run'))
+            )
+            return {
+                'statusCode': 200,
+                'body': json.dumps(summary)
+            }
+        # Admin cache operations invoked directly (IAM-authorized); refresh_job
+        # is a bulk refresh continuing itself
+        if event.get('action') in ('invalidate_cache', 'refresh_cache', 'refresh_job'):
+            import cache_admin
+            return cache_admin.handle_action(event, context)
+
         # Log the request path for debugging
         request_context = event.get('requestContext', {})
         http_info = request_context.get('http', {})
@@ -79,52 +1154,163 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'Invalid request structure'})
             }
         
+        _sync_cache_version()
+        
+        # Handle POST /admin/cache/invalidate, POST /admin/cache/refresh and
+        # GET /admin/cache/jobs/{job_id} for members of the admin Cognito group
+        if '/admin/cache/' in path:
+            import cache_admin
+            admin = cache_admin.admin_user(event)
+            if not admin:
+                return {
+                    'statusCode': 403,
+                    'body': json.dumps({'error': 'Admin access required'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            body = event.get('body') or '{}'
+            if event.get('isBase64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            try:
+                payload = json.loads(body) or {}
+                status, result = cache_admin.route(path, method, payload, admin, context)
+            except ValueError as e:
+                status, result = 400, {'error': str(e)}
+            except Exception as e:
+                logger.error(f"Admin cache {method} {path} failed: {str(e)}")
+                status, result = 500, {'error': str(e)}
+            return {
+                'statusCode': status,
+                'body': json.dumps(result, default=_json_default),
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                }
+            }
+        
+        # Handle GET /symbols/snapshot: the whole search universe for client-side search.
+        # Content-hashed ETag, so a session costs one conditional request once cached.
+        if path.endswith('/symbols/snapshot') and method == 'GET':
+            try:
+                content_hash, compressed = _latest_symbol_snapshot()
+            except Exception as e:
+                logger.error(f"Symbol snapshot unavailable: {str(e)}")
+                return {
+                    'statusCode': 503,
+                    'body': json.dumps({'error': 'Symbol snapshot unavailable'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            etag = f'"{content_hash}"'
+            headers = {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Expose-Headers': 'ETag',
+                'ETag': etag,
+                'Cache-Control': 'public, no-cache',
+                'Vary': 'Accept-Encoding'
+            }
+            request_headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+            if etag in [tag.strip().replace('W/', '') for tag in request_headers.get('if-none-match', '').split(',')]:
+                return {'statusCode': 304, 'headers': headers, 'body': ''}
+            if 'gzip' in _accepted_encodings(event):
+                return _encoded_response({'statusCode': 200, 'headers': headers}, compressed, 'gzip')
+            return {'statusCode': 200, 'headers': headers, 'body': gzip.decompress(compressed).decode('utf-8')}
+        
         # Handle GET /symbols (search endpoint)
         if (path == '/symbols' or path == '/dev/symbols') and method == 'GET':
             try:
-                query_params = event.get('queryStringParameters', {})
+                query_params = event.get('queryStringParameters') or {}
                 search_query = query_params.get('query', '')
+                search_query_lower = search_query.strip().lower()
+                limit = _parse_limit(query_params.get('limit'))
+                cursor = query_params.get('cursor')
                 
-                # Convert query to lowercase for case-insensitive search
-                # Setup filter expression if query provided
-                filter_expr = None
-                expr_attr_values = {}
+                position = None
+                if cursor:
+                    try:
+                        position = _decode_cursor(cursor, search_query_lower)
+                    except InvalidCursorError as e:
+                        logger.warn(f"Rejected search cursor: {str(e)}")
+                        return {
+                            'statusCode': 400,
+                            'body': json.dumps({'error': 'Invalid cursor'}),
+                            'headers': {
+                                'Content-Type': 'application/json',
+                                'Access-Control-Allow-Origin': '*'
+                            }
+                        }
                 
-                if search_query:
-                    # Case-insensitive search: convert query to lowercase and search symbol_lower
-                    search_query_lower = search_query.lower()
-                    # Use contains for substring matching
-                    filter_expr = "contains(symbol_lower, :query_lower)"
-                    expr_attr_values = {
-                        ':query_lower': search_query_lower
+                items = []
+                next_position = None
+                # mode=fuzzy ranks typo-tolerant matches on symbol and company name (single page)
+                if search_query_lower and query_params.get('mode') == 'fuzzy':
+                    try:
+                        items = _get_fuzzy_index().search(search_query_lower, limit)
+                    except Exception as e:
+                        error_msg = f"Fuzzy search error: {str(e)}"
+                        logger.error(error_msg)
+                        return {
+                            'statusCode': 500,
+                            'body': json.dumps({
+                                'error': 'Database error',
+                                'details': error_msg
+                            })
+                        }
+                    logger.info(f"Fuzzy search for '{search_query_lower}' returned {len(items)} matches")
+                    return {
+                        'statusCode': 200,
+                        'body': json.dumps({
+                            'results': items,
+                            'next_cursor': None
+                        }),
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        }
                     }
                 
-                # Build scan parameters with pagination support
-                all_items = []
-                scan_params = {}
-                if filter_expr:
-                    scan_params['FilterExpression'] = filter_expr
-                if expr_attr_values:
-                    scan_params['ExpressionAttributeValues'] = expr_attr_values
-                
-                # Log detailed scan parameters for debugging
-                logger.info(f"Symbols table scan parameters: {json.dumps(scan_params)}")
-                logger.info(f"Symbols table name: {symbols_table.table_name}")
+                if search_query_lower:
+                    # Typeahead: Query + begins_with on the prefix index reads only matching rows
+                    try:
+                        items, next_position = _prefix_search(search_query_lower, limit, position)
+                        # Nothing starts with the query: fall back to typo-tolerant matching
+                        if not items and not cursor:
+                            items = _get_fuzzy_index().search(search_query_lower, limit)
+                    except Exception as e:
+                        error_msg = f"DynamoDB query error: {str(e)}"
+                        logger.error(error_msg)
+                        return {
+                            'statusCode': 500,
+                            'body': json.dumps({
+                                'error': 'Database error',
+                                'details': error_msg
+                            })
+                        }
+                    next_cursor = _encode_cursor(next_position, search_query_lower) if next_position else None
+                    logger.info(f"Prefix search for '{search_query_lower}' returned {len(items)} matches, more: {next_cursor is not None}")
+                    return {
+                        'statusCode': 200,
+                        'body': json.dumps({
+                            'results': items,
+                            'next_cursor': next_cursor
+                        }),
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        }
+                    }
                 
+                # No query: page through the whole symbols table
+                logger.info(f"Symbols scan from position: {json.dumps(position, default=_json_default)}")
                 try:
-                    while True:
-                        response = symbols_table.scan(**scan_params)
-                        items_chunk = response.get('Items', [])
-                        all_items.extend(items_chunk)
-                        
-                        # Stop if we have 50+ items or no more pages
-                        if len(all_items) >= 50 or 'LastEvaluatedKey' not in response:
-                            break
-                            
-                        # Continue to next page
-                        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+                    items, next_position = store.scan_symbols(limit=limit, start_key=position)
                 except Exception as e:
-                    error_msg = f"DynamoDB scan error: {str(e)}"
+                    error_msg = f"Symbols scan error: {str(e)}"
                     logger.error(error_msg)
                     return {
                         'statusCode': 500,
@@ -134,20 +1320,17 @@ def lambda_handler(event, context):
                         })
                     }
                 
-                # Return up to 50 items
-                items = all_items[:50]
+                next_cursor = _encode_cursor(next_position, search_query_lower) if next_position else None
                 
                 # Enhanced debug logging
-                logger.info(f"Search for '{search_query}' (lower: '{search_query_lower}') returned {len(all_items)} matches, showing {len(items)}")
+                logger.info(f"Search for '{search_query}' (lower: '{search_query_lower}') returned {len(items)} matches, more: {next_cursor is not None}")
                 if items:
                     logger.info(f"First item symbol: {items[0].get('symbol')}, symbol_lower: {items[0].get('symbol_lower')}")
-                else:
+                elif not cursor:
                     logger.info("No matching items found in entire table")
                     # Additional debug: verify table contents
                     try:
-                        ibm_item = symbols_table.get_item(
-                            Key={'symbol': 'IBM', 'exchange': 'NYSE'}
-                        ).get('Item')
+                        ibm_item = store.get_symbol_listing('IBM', 'NYSE')
                         logger.info(f"IBM record exists: {ibm_item is not None}")
                         if ibm_item:
                             logger.info(f"IBM symbol_lower: {ibm_item.get('symbol_lower')}")
@@ -155,7 +1338,10 @@ def lambda_handler(event, context):
                         logger.error(f"Error fetching IBM record: {str(e)}")
                 return {
                     'statusCode': 200,
-                    'body': json.dumps(items),
+                    'body': json.dumps({
+                        'results': items,
+                        'next_cursor': next_cursor
+                    }, default=_json_default),
                     'headers': {
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
@@ -174,50 +1360,57 @@ def lambda_handler(event, context):
         # Handle GET /symbol/{symbol} (detail endpoint)
         if path.startswith('/symbol/') and method == 'GET':
             symbol = path.split('/')[-1]
-            # The symbols table uses composite key (symbol, exchange)
-            # Query by symbol only (partition key)
-            response = symbols_table.query(
-                KeyConditionExpression=Key('symbol').eq(symbol)
-            )
-            items = response.get('Items', [])
+            # One listing per exchange the symbol trades on
+            items = store.symbol_listings(symbol)
             return {
                 'statusCode': 200,
-                'body': json.dumps(items),
+                'body': json.dumps(items, default=_json_default),
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 }
             }
         
-        # Handle GET /financials/{symbol} with stage prefix support
-        if path.endswith('/financials/') or path.endswith('/financials'):
+        # Handle GET /dashboard/{symbol}: symbol info, overview, financials slice
+        # and metrics composed into one response (accepts the /financials slice parameters)
+        if method == 'GET' and ('/dashboard/' in path or path.endswith('/dashboard')):
+            symbol = _symbol_from_request(path, event, 'dashboard')
+            if not symbol:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            try:
+                # Charts default to annual reports when no slice is requested
+                slice_spec = _parse_financials_slice(event.get('queryStringParameters') or {}) or \
+                    _parse_financials_slice({'period': 'annual'})
+            except InvalidSliceError as e:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': str(e)}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            _record_request(symbol)
+            bundle = _build_dashboard(symbol, slice_spec)
             return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Missing symbol in path'}),
+                'statusCode': 200,
+                'body': json.dumps(bundle, default=_json_default),
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 }
             }
-            
-        # Handle all financials paths:
-        # 1. /dev/financials/AEM (stage-prefixed)
-        # 2. /financials/AEM (bare path with symbol in URL)
-        # 3. /financials?symbol=AEM (bare path with query param)
-        if method == 'GET' and ('/financials/' in path or path.endswith('/financials')):
-            # Extract symbol from path if available
-            if '/financials/' in path:
-                parts = path.split('/')
-                # Symbol is the last part after '/financials/'
-                symbol_index = parts.index('financials') + 1
-                if symbol_index < len(parts):
-                    symbol = parts[symbol_index]
-                else:
-                    symbol = None
-            else:
-                # Try to get symbol from query parameters
-                symbol = event.get('queryStringParameters', {}).get('symbol', None)
-            
+        
+        # Handle GET /mining-metrics/{symbol}: operating series and precomputed per-ounce valuation
+        if method == 'GET' and ('/mining-metrics/' in path or path.endswith('/mining-metrics')):
+            symbol = _symbol_from_request(path, event, 'mining-metrics')
             if not symbol:
                 return {
                     'statusCode': 400,
@@ -227,85 +1420,357 @@ def lambda_handler(event, context):
                         'Access-Control-Allow-Origin': '*'
                     }
                 }
-            symbol = path.split('/')[-1]
-            current_time_sec = int(time.time())
-            cache_validity_sec = 24 * 3600  # 1 day
-            
-            # Check cache first
+            item = mining_operating_table.get_item(Key={'symbol': symbol}).get('Item')
+            if not item:
+                return {
+                    'statusCode': 404,
+                    'body': json.dumps({'error': f'No mining metrics for {symbol}'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            periods = item.get('periods', [])
+            series_fields = ['aisc', 'production_oz', 'reserves_oz', 'resources_oz']
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'symbol': symbol,
+                    'metal': item.get('metal'),
+                    'series': [
+                        {'period': period, **{field: item.get(field, [])[i] for field in series_fields}}
+                        for i, period in enumerate(periods)
+                    ],
+                    'valuation': item.get('valuation'),
+                    'valuation_updated': item.get('valuation_updated')
+                }, default=_json_default),
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                }
+            }
+        
+        # Handle GET /sensitivity/{symbol}: rolling beta/correlation against each commodity
+        # series, per window, as last rolled forward by commodity_series
+        if method == 'GET' and ('/sensitivity/' in path or path.endswith('/sensitivity')):
+            symbol = _symbol_from_request(path, event, 'sensitivity')
+            if not symbol:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            items = sensitivity_table.query(
+                KeyConditionExpression=Key('symbol').eq(symbol),
+                # The window sums are only for rolling forward
+                ProjectionExpression='#w, frequency, window_length, as_of, betas, correlations, observations, updated',
+                ExpressionAttributeNames={'#w': 'window'}
+            ).get('Items', [])
+            if not items:
+                return {
+                    'statusCode': 404,
+                    'body': json.dumps({'error': f'No commodity sensitivity for {symbol}'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'symbol': symbol,
+                    'windows': {
+                        item['window']: {
+                            'frequency': item.get('frequency'),
+                            'length': item.get('window_length'),
+                            'as_of': item.get('as_of'),
+                            'updated': item.get('updated'),
+                            'series': {
+                                series: {
+                                    'beta': beta,
+                                    'correlation': (item.get('correlations') or {}).get(series),
+                                    'observations': (item.get('observations') or {}).get(series)
+                                }
+                                for series, beta in (item.get('betas') or {}).items()
+                            }
+                        }
+                        for item in items
+                    }
+                }, default=_json_default),
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                }
+            }
+        
+        # Handle GET/POST/DELETE /watchlist for the signed-in user. GET returns every
+        # entry hydrated with quote, overview and metrics in one round trip.
+        if path.endswith('/watchlist') and method in ('GET', 'POST', 'DELETE'):
+            user_id = _watchlist_user(event)
+            if not user_id:
+                return {
+                    'statusCode': 401,
+                    'body': json.dumps({'error': 'Sign in to use the watchlist'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
             try:
-                response = company_overview_table.get_item(Key={'symbol': symbol})
-                item = response.get('Item')
-                
-                # Return cached data if fresh
-                if item and current_time_sec - item.get('last_updated', 0) < cache_validity_sec:
+                if method == 'GET':
+                    entries, _ = _watchlist_entries(user_id)
                     return {
                         'statusCode': 200,
-                        'body': json.dumps(item['financials']),
+                        'body': json.dumps(_hydrate_watchlist(entries), default=_json_default),
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        }
+                    }
+                
+                body = event.get('body') or '{}'
+                if event.get('isBase64Encoded'):
+                    body = base64.b64decode(body).decode('utf-8')
+                try:
+                    payload = json.loads(body) or {}
+                except ValueError:
+                    payload = {}
+                symbol = (payload.get('symbol') or (event.get('queryStringParameters') or {}).get('symbol') or '').strip().upper()
+                if not symbol:
+                    return {
+                        'statusCode': 400,
+                        'body': json.dumps({'error': 'Missing symbol'}),
                         'headers': {
                             'Content-Type': 'application/json',
                             'Access-Control-Allow-Origin': '*'
                         }
                     }
-            except Exception as e:
-                logger.error(f"Cache lookup failed: {str(e)}")
-                item = None
-            
-            # If cache miss or stale, call API
-            API_KEY = os.environ['ALPHA_VANTAGE_API_KEY']
-            income_url = f"https://www.alphavantage.co/query?function=INCOME_STATEMENT&symbol={symbol}&apikey={API_KEY}"
-            balance_url = f"https://www.alphavantage.co/query?function=BALANCE_SHEET&symbol={symbol}&apikey={API_KEY}"
-            
-            try:
-                income_res = requests.get(income_url)
-                balance_res = requests.get(balance_url)
                 
-                if income_res.status_code != 200 or balance_res.status_code != 200:
-                    # Return stale data if available
-                    if item:
-                        logger.warn(f"API failed but returning stale financials for {symbol}")
+                if method == 'POST':
+                    entries, _ = _watchlist_entries(user_id)
+                    if symbol not in [entry[0] for entry in entries] and len(entries) >= WATCHLIST_MAX_SYMBOLS:
                         return {
-                            'statusCode': 200,
-                            'body': json.dumps(item['financials']),
+                            'statusCode': 400,
+                            'body': json.dumps({'error': f'Watchlists hold at most {WATCHLIST_MAX_SYMBOLS} symbols'}),
                             'headers': {
                                 'Content-Type': 'application/json',
                                 'Access-Control-Allow-Origin': '*'
                             }
                         }
+                    new_entry = [symbol, str(payload.get('name') or '')[:200], int(time.time())]
+                    # Adding a symbol that is already listed leaves the list unchanged
+                    entries = _update_watchlist(
+                        user_id,
+                        lambda entries: entries if symbol in [entry[0] for entry in entries] else [*entries, new_entry]
+                    )
+                else:
+                    entries = _update_watchlist(user_id, lambda entries: [entry for entry in entries if entry[0] != symbol])
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps([{'symbol': entry[0], 'name': entry[1], 'added_at': entry[2]} for entry in entries], default=_json_default),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            except Exception as e:
+                logger.error(f"Watchlist {method} failed for {user_id}: {str(e)}")
+                return {
+                    'statusCode': 500,
+                    'body': json.dumps({'error': str(e)}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+        
+        # Handle GET /insiders/{symbol} and GET /dividends/{symbol}
+        events_segment = next(
+            (segment for segment in CORPORATE_EVENT_SEGMENTS if f'/{segment}/' in path or path.endswith(f'/{segment}')), None
+        )
+        if method == 'GET' and events_segment:
+            symbol = _symbol_from_request(path, event, events_segment)
+            if not symbol:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            try:
+                result = _corporate_events(symbol, events_segment, event.get('queryStringParameters'))
+            except InvalidQueryError as e:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': str(e)}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            return {
+                'statusCode': 200,
+                'body': json.dumps(result, default=_json_default),
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                }
+            }
+        
+        # Handle GET /news/{symbol}: paginated, newest first, from the per-ticker news index
+        if method == 'GET' and ('/news/' in path or path.endswith('/news')):
+            symbol = _symbol_from_request(path, event, 'news')
+            query_params = event.get('queryStringParameters') or {}
+            if not symbol:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            position = None
+            if query_params.get('cursor'):
+                try:
+                    position = _decode_cursor(query_params['cursor'], f"news:{symbol}")
+                except InvalidCursorError as e:
+                    logger.warn(f"Rejected news cursor: {str(e)}")
                     return {
-                        'statusCode': 500,
-                        'body': json.dumps({'error': 'Alpha Vantage API error'})
+                        'statusCode': 400,
+                        'body': json.dumps({'error': 'Invalid cursor'}),
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        }
                     }
-                
-                income_data = income_res.json()
-                balance_data = balance_res.json()
-                
-                # Transform to expected format
-                financials = {
+            limit = _parse_limit(query_params.get('limit'), NEWS_DEFAULT_LIMIT, NEWS_MAX_LIMIT)
+            try:
+                articles, next_position = _news_page(symbol, limit, position)
+            except Exception as e:
+                error_msg = f"News query error: {str(e)}"
+                logger.error(error_msg)
+                return {
+                    'statusCode': 500,
+                    'body': json.dumps({
+                        'error': 'Database error',
+                        'details': error_msg
+                    }),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
                     'symbol': symbol,
-                    'incomeStatement': income_data,
-                    'balanceSheet': balance_data
+                    'results': articles,
+                    'next_cursor': _encode_cursor(next_position, f"news:{symbol}") if next_position else None
+                }, default=_json_default),
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
                 }
-                
-                # Update cache
+            }
+        
+        # Handle all financials paths:
+        # 1. /dev/financials/AEM (stage-prefixed)
+        # 2. /financials/AEM (bare path with symbol in URL)
+        # 3. /financials?symbol=AEM (bare path with query param)
+        if method == 'GET' and ('/financials/' in path or path.endswith('/financials')):
+            symbol = _symbol_from_request(path, event, 'financials')
+            if not symbol:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            try:
+                slice_spec = _parse_financials_slice(event.get('queryStringParameters') or {})
+            except InvalidSliceError as e:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': str(e)}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            _record_request(symbol)
+            current_time_sec = int(time.time())
+            
+            # Sliced requests read the small report index first, then only the matching reports
+            if slice_spec:
                 try:
-                    # First get existing item if any
-                    existing = company_overview_table.get_item(Key={'symbol': symbol}).get('Item', {})
-                    
-                    # Update only financials and last_updated
-                    company_overview_table.put_item(
-                        Item={
-                            **existing,
-                            'symbol': symbol,
-                            'financials': financials,
-                            'last_updated': current_time_sec
-                        }
+                    index_item = store.get_cache(
+                        symbol, ['financials_index', 'financials_updated', 'financials_valid_until', 'last_updated']
                     )
+                    if index_item and 'financials_index' in index_item and _financials_fresh(index_item, current_time_sec):
+                        sliced = _read_financials_slice(symbol, index_item['financials_index'], slice_spec)
+                        if sliced is not None:
+                            return {
+                                'statusCode': 200,
+                                'body': json.dumps(sliced, default=_json_default),
+                                'headers': {
+                                    'Content-Type': 'application/json',
+                                    'Access-Control-Allow-Origin': '*'
+                                }
+                            }
+                except Exception as e:
+                    logger.error(f"Sliced cache lookup failed: {str(e)}")
+            
+            # Full gzip-capable requests can be answered with the stored compressed body alone
+            if not slice_spec and 'gzip' in _accepted_encodings(event):
+                try:
+                    gzip_item = store.get_cache(
+                        symbol, ['financials_gzip', 'financials_updated', 'financials_valid_until', 'last_updated']
+                    )
+                    if gzip_item and 'financials_gzip' in gzip_item and _financials_fresh(gzip_item, current_time_sec):
+                        stored = gzip_item['financials_gzip']
+                        return _encoded_response({
+                            'statusCode': 200,
+                            'headers': {
+                                'Content-Type': 'application/json',
+                                'Access-Control-Allow-Origin': '*'
+                            }
+                        }, bytes(getattr(stored, 'value', stored)), 'gzip')
                 except Exception as e:
-                    logger.error(f"Failed to cache financials: {str(e)}")
+                    logger.error(f"Compressed cache lookup failed: {str(e)}")
+            
+            # Check cache first
+            try:
+                with profiling.stage('cache_read'):
+                    item = store.get_cache(symbol)
                 
+                # Return cached data if fresh
+                if item and 'financials' in item and _financials_fresh(item, current_time_sec):
+                    return {
+                        'statusCode': 200,
+                        'body': _financials_body(symbol, item['financials'], slice_spec),
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*'
+                        }
+                    }
+            except Exception as e:
+                logger.error(f"Cache lookup failed: {str(e)}")
+                item = None
+            
+            # If cache miss or stale, call API
+            try:
+                financials = _refresh_financials(symbol, current_time_sec)
                 return {
                     'statusCode': 200,
-                    'body': json.dumps(financials),
+                    'body': _financials_body(symbol, financials, slice_spec),
                     'headers': {
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
@@ -315,11 +1780,11 @@ def lambda_handler(event, context):
             except Exception as e:
                 logger.error(f"Financial data fetch failed: {str(e)}")
                 # Return stale data if available
-                if item:
+                if item and 'financials' in item:
                     logger.warn(f"Returning stale financials for {symbol} after API failure")
                     return {
                         'statusCode': 200,
-                        'body': json.dumps(item['financials']),
+                        'body': _financials_body(symbol, item['financials'], slice_spec),
                         'headers': {
                             'Content-Type': 'application/json',
                             'Access-Control-Allow-Origin': '*'
@@ -329,164 +1794,77 @@ def lambda_handler(event, context):
                     'statusCode': 500,
                     'body': json.dumps({'error': str(e)})
                 }
-                # Handle GET /overview/{symbol} with stage prefix support
-                if path.endswith('/overview/') or path.endswith('/overview'):
+        
+        # Handle all overview paths:
+        # 1. /dev/overview/AEM (stage-prefixed)
+        # 2. /overview/AEM (bare path with symbol in URL)
+        # 3. /overview?symbol=AEM (bare path with query param)
+        if method == 'GET' and ('/overview/' in path or path.endswith('/overview')):
+            symbol = _symbol_from_request(path, event, 'overview')
+            if not symbol:
+                logger.error(f"Missing symbol in overview request: {path}")
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing symbol parameter'}),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            _record_request(symbol)
+            current_time_sec = int(time.time())
+            
+            try:
+                # Check cache first
+                item = store.get_cache(symbol)
+                
+                # Return cached data if fresh
+                if item and 'overview_data' in item and _is_fresh(item, 'overview_updated', OVERVIEW_CACHE_SEC, current_time_sec):
                     return {
-                        'statusCode': 400,
-                        'body': json.dumps({'error': 'Missing symbol in path'}),
+                        'statusCode': 200,
+                        'body': _cached_overview_body(item),
                         'headers': {
                             'Content-Type': 'application/json',
                             'Access-Control-Allow-Origin': '*'
                         }
                     }
-                    
-                # Handle all overview paths:
-                # 1. /dev/overview/AEM (stage-prefixed)
-                # 2. /overview/AEM (bare path with symbol in URL)
-                # 3. /overview?symbol=AEM (bare path with query param)
-                if method == 'GET' and ('overview' in path):
-                    # Extract symbol from path if available
-                    parts = path.split('/')
-                    try:
-                        # Find position of 'overview' in path
-                        ov_index = parts.index('overview')
-                        if ov_index + 1 < len(parts):
-                            symbol = parts[ov_index + 1]
-                        else:
-                            # Try query parameters if no symbol in path
-                            symbol = event.get('queryStringParameters', {}).get('symbol', None)
-                    except ValueError:
-                        symbol = event.get('queryStringParameters', {}).get('symbol', None)
-                    
-                    if not symbol:
-                        logger.error(f"Missing symbol in overview request: {path}")
-                        return {
-                            'statusCode': 400,
-                            'body': json.dumps({'error': 'Missing symbol parameter'}),
-                            'headers': {
-                                'Content-Type': 'application/json',
-                                'Access-Control-Allow-Origin': '*'
-                            }
-                        }
-                    symbol = path.split('/')[-1]
-                    current_time_sec = int(time.time())
-                    cache_validity_sec = 24 * 3600  # 24 hours
-                    
-                    try:
-                        # Check cache first
-                        response = company_overview_table.get_item(Key={'symbol': symbol})
-                        item = response.get('Item')
-                        
-                        # Return cached data if fresh
-                        if item and current_time_sec - item.get('last_updated', 0) < cache_validity_sec:
-                            transformed_data = _transform_overview_data(item['overview_data'])
-                            return {
-                                'statusCode': 200,
-                                'body': json.dumps(transformed_data),
-                                'headers': {
-                                    'Content-Type': 'application/json',
-                                    'Access-Control-Allow-Origin': '*'
-                                }
-                            }
-                    except Exception as e:
-                        logger.error(f"Cache lookup failed: {str(e)}")
-                        item = None
-                    
-                    # If cache miss or stale, call API with retry logic
-                    API_KEY = os.environ['ALPHA_VANTAGE_API_KEY']
-                    url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={API_KEY}"
-                    
-                    try:
-                        # Retry logic (3 attempts with 1s backoff)
-                        raw_data = None
-                        for attempt in range(3):
-                            try:
-                                res = requests.get(url, timeout=5)
-                                if res.status_code == 200:
-                                    raw_data = res.json()
-                                    break
-                                else:
-                                    logger.warn(f"Attempt {attempt+1} failed with status {res.status_code}")
-                            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-                                logger.warn(f"Attempt {attempt+1} failed: {str(e)}")
-                                if attempt == 2:
-                                    raise
-                                time.sleep(1)
-                        
-                        # Handle Alpha Vantage error responses
-                        if not raw_data or 'Error Message' in raw_data or 'Information' in raw_data:
-                            error_msg = raw_data.get('Error Message') or raw_data.get('Information') or 'No data from API'
-                            logger.warn(f"Alpha Vantage API error for {symbol}: {error_msg}")
-                            
-                            # Return stale data if available
-                            if item:
-                                logger.warn(f"Returning stale data for {symbol}")
-                                transformed_data = _transform_overview_data(item['overview_data'])
-                                return {
-                                    'statusCode': 200,
-                                    'body': json.dumps(transformed_data),
-                                    'headers': {
-                                        'Content-Type': 'application/json',
-                                        'Access-Control-Allow-Origin': '*'
-                                    }
-                                }
-                            return {
-                                'statusCode': 400,
-                                'body': json.dumps({'error': error_msg, 'error_detail': 'AlphaVantageUnavailable'})
-                            }
-                        
-                        # Validate required fields
-                        REQUIRED_FIELDS = ['Symbol', 'Name', 'Sector', 'MarketCapitalization']
-                        missing_fields = [field for field in REQUIRED_FIELDS if field not in raw_data]
-                        if missing_fields:
-                            raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
-                        
-                        transformed_data = _transform_overview_data(raw_data)
-                        
-                        # Save to cache only if valid
-                        try:
-                            # Get existing item if any
-                            existing = company_overview_table.get_item(Key={'symbol': symbol}).get('Item', {})
-                            
-                            company_overview_table.put_item(
-                                Item={
-                                    **existing,
-                                    'symbol': symbol,
-                                    'overview_data': raw_data,
-                                    'last_updated': current_time_sec
-                                }
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to cache response: {str(e)}")
-                        
-                        return {
-                            'statusCode': 200,
-                            'body': json.dumps(transformed_data),
-                            'headers': {
-                                'Content-Type': 'application/json',
-                                'Access-Control-Allow-Origin': '*'
-                            }
-                        }
-                        
-                    except Exception as e:
-                        logger.error(f"API call failed: {str(e)}")
-                        # Return stale data if available
-                        if item:
-                            logger.warn(f"Returning stale data for {symbol} after API failure")
-                            transformed_data = _transform_overview_data(item['overview_data'])
-                            return {
-                                'statusCode': 200,
-                                'body': json.dumps(transformed_data),
-                                'headers': {
-                                    'Content-Type': 'application/json',
-                                    'Access-Control-Allow-Origin': '*'
-                                }
-                            }
-                        return {
-                            'statusCode': 500,
-                            'body': json.dumps({'error': str(e), 'error_detail': 'ServiceUnavailable'})
-                        }
-                        
+            except Exception as e:
+                logger.error(f"Cache lookup failed: {str(e)}")
+                item = None
+            
+            # If cache miss or stale, call API with retry logic
+            try:
+                body = _refresh_overview(symbol, current_time_sec, (item or {}).get('price_stats'))
+                return {
+                    'statusCode': 200,
+                    'body': body,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            except AlphaVantageError as e:
+                logger.warn(f"Alpha Vantage API error for {symbol}: {str(e)}")
+                error_msg, error_status, error_detail = str(e), 400, 'AlphaVantageUnavailable'
+            except Exception as e:
+                logger.error(f"API call failed: {str(e)}")
+                error_msg, error_status, error_detail = str(e), 500, 'ServiceUnavailable'
+            
+            # Return stale data if available
+            if item and 'overview_data' in item:
+                logger.warn(f"Returning stale data for {symbol}")
+                return {
+                    'statusCode': 200,
+                    'body': _cached_overview_body(item),
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    }
+                }
+            return {
+                'statusCode': error_status,
+                'body': json.dumps({'error': error_msg, 'error_detail': error_detail})
+            }
                 
         return {
             'statusCode': 404,
@@ -0,0 +1,140 @@
+"""Content-addressed archive of raw Alpha Vantage responses.
+
+Every successful upstream response is stored gzipped under the SHA-256 of
+its bytes, so identical payloads (most refetches of an unchanged overview or
+statement) are kept once. A separate index records each fetch by function,
+symbol and time:
+
+    objects/<hash[:2]>/<hash>.gz
+    index/<FUNCTION>/<SYMBOL>/<YYYYMMDDTHHMMSSZ>-<hash>
+
+Index keys sort chronologically, so "latest response as of a date" is one
+prefix listing. The root is a local directory or an s3://bucket/prefix
+(ARCHIVE_ROOT). reprocess.py rebuilds the cache from it without calling
+Alpha Vantage.
+"""
+import os
+import gzip
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import boto3
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['function', 'symbol', 'fetched_at', 'content_hash'])
+
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+def _timestamp(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _epoch(timestamp):
+    return int(datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp())
+
+
+class ResponseArchive:
+
+    def __init__(self, root):
+        self.root = root.rstrip('/')
+        if self.root.startswith('s3://'):
+            self.bucket, _, self.prefix = self.root[len('s3://'):].partition('/')
+            self.s3 = boto3.client('s3')
+        else:
+            self.bucket = None
+
+    # Storage primitives over S3 or the local directory
+    def _key(self, relative):
+        return f"{self.prefix}/{relative}".lstrip('/') if self.bucket else os.path.join(self.root, relative)
+
+    def _write(self, relative, body):
+        key = self._key(relative)
+        if self.bucket:
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=body)
+            return
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        temporary = f"{key}.tmp{os.getpid()}"
+        with open(temporary, 'wb') as f:
+            f.write(body)
+        os.replace(temporary, key)
+
+    def _read(self, relative):
+        if self.bucket:
+            return self.s3.get_object(Bucket=self.bucket, Key=self._key(relative))['Body'].read()
+        with open(self._key(relative), 'rb') as f:
+            return f.read()
+
+    def _list(self, relative_prefix, start_after=None):
+        """Relative keys under a prefix, in key order"""
+        if self.bucket:
+            params = {'Bucket': self.bucket, 'Prefix': self._key(relative_prefix)}
+            if start_after:
+                params['StartAfter'] = self._key(start_after)
+            strip = len(self._key(''))
+            for page in self.s3.get_paginator('list_objects_v2').paginate(**params):
+                for obj in page.get('Contents', []):
+                    yield obj['Key'][strip:]
+            return
+        base = os.path.join(self.root, relative_prefix.rpartition('/')[0])
+        keys = []
+        for current, _, files in os.walk(base):
+            for name in files:
+                relative = os.path.relpath(os.path.join(current, name), self.root).replace(os.sep, '/')
+                if relative.startswith(relative_prefix) and '.tmp' not in name:
+                    keys.append(relative)
+        for relative in sorted(keys):
+            if not start_after or relative > start_after:
+                yield relative
+
+    def _children(self, relative_prefix):
+        """Immediate child names under a prefix (symbols under a function, ...)"""
+        if self.bucket:
+            names = []
+            paginator = self.s3.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(relative_prefix), Delimiter='/'):
+                names.extend(p['Prefix'].rstrip('/').rsplit('/', 1)[-1] for p in page.get('CommonPrefixes', []))
+            return sorted(names)
+        try:
+            return sorted(os.listdir(os.path.join(self.root, relative_prefix)))
+        except FileNotFoundError:
+            return []
+
+    def put(self, function, symbol, body, fetched_at):
+        """Archive one raw response body (bytes); returns its content hash"""
+        content_hash = hashlib.sha256(body).hexdigest()
+        object_key = f"objects/{content_hash[:2]}/{content_hash}.gz"
+        if self.bucket or not os.path.exists(self._key(object_key)):
+            # Re-putting an existing object is harmless; S3 skips the existence check
+            self._write(object_key, gzip.compress(body, compresslevel=6, mtime=0))
+        self._write(f"index/{function}/{symbol}/{_timestamp(fetched_at)}-{content_hash}", b'')
+        return content_hash
+
+    def get(self, content_hash):
+        return gzip.decompress(self._read(f"objects/{content_hash[:2]}/{content_hash}.gz"))
+
+    def symbols(self, function):
+        return self._children(f"index/{function}/")
+
+    def entries(self, function, symbol, since=None):
+        """Fetches of function for symbol, oldest first (optionally from epoch `since`)"""
+        prefix = f"index/{function}/{symbol}/"
+        start_after = f"{prefix}{_timestamp(since)}" if since else None
+        for relative in self._list(prefix, start_after):
+            timestamp, _, content_hash = relative[len(prefix):].partition('-')
+            yield ArchiveEntry(function, symbol, _epoch(timestamp), content_hash)
+
+    def latest(self, function, symbol, as_of=None):
+        """Most recent fetch at or before epoch as_of (default: the newest), or None"""
+        latest = None
+        for entry in self.entries(function, symbol):
+            if as_of is not None and entry.fetched_at > as_of:
+                break
+            latest = entry
+        return latest
+
+
+def from_environment():
+    """Archive at ARCHIVE_ROOT, or None when archiving is off"""
+    root = os.environ.get('ARCHIVE_ROOT')
+    return ResponseArchive(root) if root else None
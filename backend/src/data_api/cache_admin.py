@@ -0,0 +1,351 @@
+"""Admin invalidation and forced refresh of the overview/financials cache.
+
+Symbols are selected by list, by a predicate over their cached overview
+(e.g. every symbol in an industry) or all at once, for one or both data types:
+
+    POST /admin/cache/invalidate   {"symbols": ["AEM", "NEM"], "types": ["financials"]}
+    POST /admin/cache/refresh      {"where": {"industry": "Gold"}}
+    GET  /admin/cache/jobs/{id}    progress of a bulk refresh
+
+Invalidating zeroes the data's freshness stamps, so the next read refetches
+it; refreshing refetches now. Refreshes of up to INLINE_REFRESH_SYMBOLS run
+inside the request. Larger ones become a job: symbols are fetched by a thread
+pool through the shared Alpha Vantage key pool, progress is saved on the job
+item after every batch, and the job re-invokes itself before the Lambda runs
+out of time. Every operation bumps the cache version stamp, and each data_api
+container drops its in-process caches at its next check (app._sync_cache_version).
+
+The routes need a Cognito token in the admin group. Direct invocations can
+use {"action": "invalidate_cache" | "refresh_cache", "symbols" | "where" | "all": ..., "types": [...]}.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+import app
+import alpha_vantage
+
+logger = logging.getLogger()
+
+lambda_client = boto3.client('lambda')
+
+ADMIN_GROUP = os.environ.get('ADMIN_GROUP', 'admins')
+DATA_TYPES = ('overview', 'financials')
+# Freshness stamps that make each data type stale (see app._is_fresh / app._financials_fresh)
+STALE_FIELDS = {
+    'overview': {'overview_updated': 0},
+    'financials': {'financials_updated': 0, 'financials_valid_until': 0}
+}
+# Predicate names -> cached OVERVIEW fields, matched case-insensitively
+PREDICATE_FIELDS = {
+    'sector': 'Sector',
+    'industry': 'Industry',
+    'exchange': 'Exchange',
+    'country': 'Country',
+    'currency': 'Currency',
+    'asset_type': 'AssetType'
+}
+INVALIDATE_WORKERS = 16
+INLINE_REFRESH_SYMBOLS = 5
+# Refresh threads per pooled key: each call waits on the network, not the key
+REFRESH_WORKERS_PER_KEY = 4
+MAX_REFRESH_WORKERS = 32
+# How long a refresh call may wait for a key; short so batches end well inside the timeout
+KEY_WAIT_SEC = 5
+# A job saves its progress and continues in a fresh invocation with this much time left
+JOB_STOP_MARGIN_MS = 12000
+JOB_TTL_SEC = 7 * 24 * 3600
+MAX_ERROR_CHARS = 200
+
+
+def admin_user(event):
+    """Cognito user id if the JWT's groups include ADMIN_GROUP, else None"""
+    claims = ((event.get('requestContext') or {}).get('authorizer') or {}).get('jwt', {}).get('claims') or {}
+    groups = claims.get('cognito:groups') or []
+    # HTTP API passes list claims through as a string like "[admins editors]"
+    if isinstance(groups, str):
+        groups = groups.strip('[]').replace(',', ' ').split()
+    return claims.get('sub') if ADMIN_GROUP in groups else None
+
+
+def data_types(request):
+    types = request.get('types') or list(DATA_TYPES)
+    if isinstance(types, str):
+        types = [types]
+    unknown = set(types) - set(DATA_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown data types: {', '.join(sorted(map(str, unknown)))}; expected: {', '.join(DATA_TYPES)}")
+    return [data_type for data_type in DATA_TYPES if data_type in types]
+
+
+def select_symbols(request):
+    """Symbols named by exactly one of symbols, where or all"""
+    chosen = [key for key in ('symbols', 'where', 'all') if request.get(key)]
+    if len(chosen) != 1:
+        raise ValueError('Select symbols with exactly one of: symbols, where, all')
+    if chosen[0] == 'symbols':
+        symbols = request['symbols']
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        return sorted({str(symbol).strip().upper() for symbol in symbols if str(symbol).strip()})
+    if chosen[0] == 'all':
+        return sorted(item['symbol'] for item in app.store.scan_cache(attributes=['symbol', 'last_updated']))
+
+    where = request['where']
+    if not isinstance(where, dict):
+        raise ValueError('where must be an object, e.g. {"industry": "Gold"}')
+    unknown = set(where) - set(PREDICATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown predicate fields: {', '.join(sorted(unknown))}; expected: {', '.join(PREDICATE_FIELDS)}")
+    wanted = {
+        PREDICATE_FIELDS[name]: {str(value).strip().lower() for value in (values if isinstance(values, list) else [values])}
+        for name, values in where.items()
+    }
+    return sorted(
+        item['symbol'] for item in app.store.scan_cache(attributes=['symbol', 'overview_data'])
+        if all(str((item.get('overview_data') or {}).get(field) or '').strip().lower() in values
+               for field, values in wanted.items())
+    )
+
+
+def bump_version(reason):
+    """Move the cache version stamp; this container drops its own caches right away"""
+    response = app.cache_control_table.update_item(
+        Key={'key': app.CACHE_VERSION_KEY},
+        UpdateExpression='ADD version :one SET updated = :now, reason = :reason',
+        ExpressionAttributeValues={':one': 1, ':now': int(time.time()), ':reason': reason[:500]},
+        ReturnValues='UPDATED_NEW'
+    )
+    version = int(response['Attributes']['version'])
+    app._clear_process_caches()
+    app._cache_version['version'] = version
+    return version
+
+
+def _describe(symbols, types):
+    scope = ','.join(symbols[:10]) + (f" (+{len(symbols) - 10} more)" if len(symbols) > 10 else '')
+    return f"{'/'.join(types)} for {scope}"
+
+
+def invalidate(symbols, types):
+    """Mark the data types stale for every cached symbol in the list"""
+    fields = {}
+    for data_type in types:
+        fields.update(STALE_FIELDS[data_type])
+
+    def _run(symbol):
+        try:
+            # Uncached symbols are skipped rather than created as empty items
+            if not app.store.get_cache(symbol, ['symbol', 'last_updated']):
+                return symbol, 'not_cached'
+            app._update_cache(symbol, fields)
+            return symbol, None
+        except Exception as e:
+            return symbol, str(e)[:MAX_ERROR_CHARS]
+
+    summary = {'symbols': len(symbols), 'types': types, 'invalidated': 0, 'not_cached': [], 'failed': {}}
+    with ThreadPoolExecutor(max_workers=INVALIDATE_WORKERS) as executor:
+        for symbol, error in executor.map(_run, symbols):
+            if error == 'not_cached':
+                summary['not_cached'].append(symbol)
+            elif error:
+                logger.error(f"Invalidating {symbol} failed: {error}")
+                summary['failed'][symbol] = error
+            else:
+                summary['invalidated'] += 1
+    summary['version'] = bump_version(f"invalidate {_describe(symbols, types)}")
+    logger.info(f"Cache invalidation: {json.dumps(summary)}")
+    return summary
+
+
+def refresh_symbol(symbol, types, now):
+    """Refetch the data types for one symbol and write them to the cache"""
+    fields = {}
+    if 'overview' in types:
+        price_stats = (app.store.get_cache(symbol, ['price_stats']) or {}).get('price_stats')
+        fields.update(app._overview_fields(
+            app._alpha_vantage_get('OVERVIEW', symbol, max_wait=KEY_WAIT_SEC), now, price_stats
+        ))
+    if 'financials' in types:
+        fields.update(app._financials_fields({
+            'symbol': symbol,
+            'incomeStatement': app._alpha_vantage_get('INCOME_STATEMENT', symbol, max_wait=KEY_WAIT_SEC),
+            'balanceSheet': app._alpha_vantage_get('BALANCE_SHEET', symbol, max_wait=KEY_WAIT_SEC)
+        }, now))
+    app._update_cache(symbol, fields)
+
+
+def _refresh_workers():
+    return max(1, min(MAX_REFRESH_WORKERS, REFRESH_WORKERS_PER_KEY * alpha_vantage.key_count()))
+
+
+def refresh_batch(symbols, types, executor):
+    """[(symbol, error or None)] for a batch refreshed concurrently"""
+    now = int(time.time())
+
+    def _run(symbol):
+        try:
+            refresh_symbol(symbol, types, now)
+            return symbol, None
+        except Exception as e:
+            return symbol, str(e)[:MAX_ERROR_CHARS]
+
+    return list(executor.map(_run, symbols))
+
+
+def _job_view(job):
+    done = int(job['done'])
+    total = int(job['total'])
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'types': job['types'],
+        'total': total,
+        'done': done,
+        'refreshed': done - len(job['failed']),
+        'failed': job['failed'],
+        'progress': round(done / total, 4) if total else 1.0,
+        'requested_by': job.get('requested_by'),
+        'created': job['created'],
+        'updated': job['updated'],
+        'finished': job.get('finished'),
+        'version': job.get('version')
+    }
+
+
+def _save_job(job):
+    """Write the job if nobody else advanced it since it was read; False if they did"""
+    previous = job['revision']
+    job['revision'] = previous + 1
+    job['updated'] = int(time.time())
+    try:
+        app.cache_control_table.put_item(
+            Item=job,
+            ConditionExpression='attribute_not_exists(#k) OR revision = :r',
+            ExpressionAttributeNames={'#k': 'key'},
+            ExpressionAttributeValues={':r': previous}
+        )
+        return True
+    except app.dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def _continue_job(job_id):
+    """Run the job in a new invocation (or a background thread outside Lambda)"""
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+    if function_name:
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'action': 'refresh_job', 'job_id': job_id})
+        )
+    else:
+        threading.Thread(target=run_job, args=(job_id, None), daemon=True).start()
+
+
+def start_refresh(symbols, types, requested_by):
+    """Refresh inline when small, else queue a job; returns (status code, body)"""
+    if len(symbols) <= INLINE_REFRESH_SYMBOLS:
+        with ThreadPoolExecutor(max_workers=max(1, len(symbols))) as executor:
+            results = refresh_batch(symbols, types, executor)
+        failed = {symbol: error for symbol, error in results if error}
+        return 200, {
+            'symbols': len(symbols),
+            'types': types,
+            'refreshed': len(symbols) - len(failed),
+            'failed': failed,
+            'version': bump_version(f"refresh {_describe(symbols, types)}")
+        }
+    now = int(time.time())
+    job_id = uuid.uuid4().hex
+    job = {
+        'key': f"JOB#{job_id}",
+        'job_id': job_id,
+        'status': 'queued',
+        'types': types,
+        'pending': symbols,
+        'total': len(symbols),
+        'done': 0,
+        'failed': {},
+        'requested_by': requested_by,
+        'created': now,
+        'revision': 0,
+        'expires_at': now + JOB_TTL_SEC
+    }
+    _save_job(job)
+    _continue_job(job_id)
+    logger.info(f"Queued cache refresh job {job_id}: {_describe(symbols, types)}")
+    return 202, _job_view(job)
+
+
+def run_job(job_id, context):
+    """Work through a job's pending symbols until done or nearly out of time"""
+    job = app.cache_control_table.get_item(Key={'key': f"JOB#{job_id}"}).get('Item')
+    if not job or job['status'] == 'done':
+        return job and _job_view(job)
+    job['status'] = 'running'
+    workers = _refresh_workers()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while job['pending']:
+            if context and context.get_remaining_time_in_millis() < JOB_STOP_MARGIN_MS:
+                job['version'] = bump_version(f"refresh job {job_id} (partial)")
+                if _save_job(job):
+                    _continue_job(job_id)
+                return _job_view(job)
+            batch = job['pending'][:workers]
+            for symbol, error in refresh_batch(batch, job['types'], executor):
+                if error:
+                    logger.error(f"Refresh job {job_id}: {symbol} failed: {error}")
+                    job['failed'][symbol] = error
+            job['pending'] = job['pending'][len(batch):]
+            job['done'] = int(job['done']) + len(batch)
+            if not _save_job(job):
+                logger.info(f"Refresh job {job_id} was advanced by another invocation, stopping")
+                return _job_view(job)
+    job['status'] = 'done'
+    job['finished'] = int(time.time())
+    job['version'] = bump_version(f"refresh job {job_id}")
+    _save_job(job)
+    logger.info(f"Refresh job {job_id} finished: {job['done']} symbols, {len(job['failed'])} failed")
+    return _job_view(job)
+
+
+def job_status(job_id):
+    job = app.cache_control_table.get_item(Key={'key': f"JOB#{job_id}"}).get('Item')
+    return _job_view(job) if job else None
+
+
+def route(path, method, payload, requested_by, context=None):
+    """(status code, body) for an /admin/cache/ request"""
+    if not isinstance(payload, dict):
+        raise ValueError('Request body must be a JSON object')
+    if path.endswith('/admin/cache/invalidate') and method == 'POST':
+        return 200, invalidate(select_symbols(payload), data_types(payload))
+    if path.endswith('/admin/cache/refresh') and method == 'POST':
+        return start_refresh(select_symbols(payload), data_types(payload), requested_by)
+    if '/admin/cache/jobs/' in path and method == 'GET':
+        job_id = path.rstrip('/').rsplit('/', 1)[-1]
+        job = job_status(job_id)
+        return (200, job) if job else (404, {'error': f"No refresh job {job_id}"})
+    return 404, {'error': f"No admin route for {method} {path}"}
+
+
+def handle_action(event, context):
+    """Direct invocations: invalidate_cache, refresh_cache and refresh_job continuations"""
+    action = event['action']
+    if action == 'refresh_job':
+        result = run_job(event['job_id'], context)
+    elif action == 'invalidate_cache':
+        result = invalidate(select_symbols(event), data_types(event))
+    else:
+        _, result = start_refresh(select_symbols(event), data_types(event), 'invoke')
+    return {
+        'statusCode': 200,
+        'body': json.dumps(result, default=app._json_default)
+    }
@@ -0,0 +1,234 @@
+"""In-memory typo-tolerant search over symbols and company names.
+
+Candidates come from a trigram inverted index (plus sorted symbol, name and
+token lists for exact and prefix matches). They are then verified with a
+bounded Levenshtein distance per query token. Results rank exact symbol >
+symbol prefix > name prefix > token match > fuzzy match, then by distance
+and popularity.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from symbol_search import normalize_name
+
+# Candidates verified per query after trigram scoring
+MAX_FUZZY_CANDIDATES = 64
+# Trigrams present in more than this share of names carry little signal
+COMMON_TRIGRAM_RATIO = 0.05
+
+TIER_EXACT_SYMBOL = 0
+TIER_SYMBOL_PREFIX = 1
+TIER_NAME_PREFIX = 2
+TIER_TOKEN_MATCH = 3
+TIER_FUZZY = 4
+TIER_LABELS = ['exact', 'symbol_prefix', 'name_prefix', 'token', 'fuzzy']
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(token):
+    """Edits tolerated for a query token of this length"""
+    if len(token) <= 3:
+        return 0
+    if len(token) <= 5:
+        return 1
+    return 2
+
+
+def bounded_levenshtein(a, b, limit):
+    """Edit distance (adjacent transpositions count as one edit) or limit + 1 past limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    before_previous = None
+    previous = list(range(len(a) + 1))
+    for j, char_b in enumerate(b, 1):
+        current = [j]
+        row_min = j
+        for i, char_a in enumerate(a, 1):
+            cost = min(
+                previous[i] + 1,
+                current[i - 1] + 1,
+                previous[i - 1] + (char_a != char_b)
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before_previous[i - 2] + 1)
+            current.append(cost)
+            row_min = min(row_min, cost)
+        if row_min > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def bounded_prefix_distance(query, text, limit):
+    """Edits turning query into some prefix of text, or limit + 1 past limit"""
+    text = text[:len(query) + limit]
+    previous = list(range(len(text) + 1))
+    for i, char_q in enumerate(query, 1):
+        current = [i]
+        for j, char_t in enumerate(text, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_q != char_t)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    best = min(previous)
+    return best if best <= limit else limit + 1
+
+
+class FuzzySearchIndex:
+    """Immutable search index built from symbol items ({symbol, exchange, name})"""
+
+    def __init__(self, items, popularity=None):
+        popularity = popularity or {}
+        self.entries = []
+        self.tokens = []
+        self.popularity = array('I')
+        postings = {}
+        token_postings = {}
+        for entry_id, item in enumerate(items):
+            symbol = item['symbol']
+            name_normalized = normalize_name(item.get('name'))
+            self.entries.append({
+                'symbol': symbol,
+                'exchange': item.get('exchange', ''),
+                'name': item.get('name', '')
+            })
+            self.tokens.append((symbol.lower(), name_normalized, name_normalized.split()))
+            self.popularity.append(int(popularity.get(symbol, 0)))
+            for gram in trigrams(name_normalized) | trigrams(symbol.lower()):
+                postings.setdefault(gram, array('I')).append(entry_id)
+            for token in set(name_normalized.split()):
+                token_postings.setdefault(token, array('I')).append(entry_id)
+        self.postings = postings
+        self.common_limit = max(32, int(len(self.entries) * COMMON_TRIGRAM_RATIO))
+        self.symbol_keys = sorted((tokens[0], i) for i, tokens in enumerate(self.tokens))
+        self.name_keys = sorted((tokens[1], i) for i, tokens in enumerate(self.tokens))
+        self.token_postings = token_postings
+        self.sorted_tokens = sorted(token_postings)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _prefix_ids(keys, prefix, exact=False):
+        position = bisect_left(keys, (prefix, -1))
+        while position < len(keys):
+            key, entry_id = keys[position]
+            if not key.startswith(prefix) or (exact and key != prefix):
+                break
+            yield entry_id
+            position += 1
+
+    def _token_distance(self, query_tokens, name_tokens):
+        """Total edits matching every query token to some name token, or None.
+
+        The last query token may match a prefix of a name token (typeahead).
+        """
+        total = 0
+        for position, query_token in enumerate(query_tokens):
+            limit = max_distance(query_token)
+            is_last = position == len(query_tokens) - 1
+            best = limit + 1
+            for name_token in name_tokens:
+                if is_last:
+                    distance = bounded_prefix_distance(query_token, name_token, limit)
+                else:
+                    distance = bounded_levenshtein(query_token, name_token, limit)
+                best = min(best, distance)
+                if best == 0:
+                    break
+            if best > limit:
+                return None
+            total += best
+        return total
+
+    def _rank_key(self, entry_id):
+        return (-self.popularity[entry_id], len(self.tokens[entry_id][1]))
+
+    def _token_ids(self, token, prefix):
+        if not prefix:
+            return set(self.token_postings.get(token, ()))
+        ids = set()
+        position = bisect_left(self.sorted_tokens, token)
+        while position < len(self.sorted_tokens) and self.sorted_tokens[position].startswith(token):
+            ids.update(self.token_postings[self.sorted_tokens[position]])
+            position += 1
+        return ids
+
+    def _token_match_ids(self, query_tokens):
+        """Entries containing every query token (the last one as a prefix)"""
+        matches = None
+        for position, query_token in enumerate(query_tokens):
+            ids = self._token_ids(query_token, prefix=position == len(query_tokens) - 1)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches
+
+    def _fuzzy_matches(self, query_normalized, query_tokens, exclude):
+        counts = Counter()
+        query_grams = [gram for gram in trigrams(query_normalized) if gram in self.postings]
+        selective = [gram for gram in query_grams if len(self.postings[gram]) <= self.common_limit]
+        for gram in (selective or query_grams):
+            counts.update(self.postings[gram])
+        matches = []
+        for entry_id, _ in counts.most_common(MAX_FUZZY_CANDIDATES + len(exclude)):
+            if entry_id in exclude:
+                continue
+            distance = self._token_distance(query_tokens, self.tokens[entry_id][2])
+            if distance is not None:
+                matches.append((entry_id, distance))
+        return matches
+
+    def search(self, query, limit=10):
+        """Best `limit` matches for query, as entry dicts with match tier and distance.
+
+        Tiers are resolved in order and lower tiers are skipped once the page
+        is full, so common prefixes never pay for fuzzy verification.
+        """
+        query_lower = query.strip().lower()
+        query_normalized = normalize_name(query)
+        if not query_lower or not self.entries:
+            return []
+        query_tokens = query_normalized.split()
+        results = []
+        seen = set()
+
+        def _take(ids, tier):
+            fresh = [entry_id for entry_id in ids if entry_id not in seen]
+            for entry_id in heapq.nsmallest(limit - len(results), fresh, key=self._rank_key):
+                seen.add(entry_id)
+                results.append((entry_id, tier, 0))
+
+        tiers = [
+            (TIER_EXACT_SYMBOL, lambda: self._prefix_ids(self.symbol_keys, query_lower, exact=True)),
+            (TIER_SYMBOL_PREFIX, lambda: self._prefix_ids(self.symbol_keys, query_lower)),
+            (TIER_NAME_PREFIX, lambda: self._prefix_ids(self.name_keys, query_normalized) if query_normalized else []),
+            (TIER_TOKEN_MATCH, lambda: self._token_match_ids(query_tokens) if query_tokens else [])
+        ]
+        for tier, ids in tiers:
+            if len(results) >= limit:
+                break
+            _take(ids(), tier)
+
+        if len(results) < limit and query_tokens:
+            fuzzy = self._fuzzy_matches(query_normalized, query_tokens, seen)
+            fuzzy.sort(key=lambda match: (match[1], self._rank_key(match[0])))
+            for entry_id, distance in fuzzy[:limit - len(results)]:
+                results.append((entry_id, TIER_FUZZY, distance))
+
+        return [
+            {**self.entries[entry_id], 'match': TIER_LABELS[tier], 'distance': distance}
+            for entry_id, tier, distance in results
+        ]
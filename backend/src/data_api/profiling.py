@@ -0,0 +1,201 @@
+"""Opt-in memory and allocation profiling for data_api routes.
+
+MEMORY_PROFILE=1 starts tracemalloc at import. Every request is then
+profiled as a whole (lambda_handler) and per stage: the functions decorated
+with @staged and the `with stage(...)` blocks around cache reads, upstream
+fetches, parsing, serialization and compression. One line is logged per
+request:
+
+    Memory profile: {"route": "financials", "peak_kb": 5120.4, "ms": 41.2,
+                     "stages": {"parse": {"calls": 1, "peak_kb": ..., "net_kb": ..., "net_blocks": ..., "ms": ...}},
+                     "top": [{"site": "records.py:61", "kb": ..., "blocks": ...}, ...]}
+
+peak_kb is the traced high-water mark above what was allocated when the
+stage (or request) began; net_kb and net_blocks are what it left allocated;
+top lists the allocation sites holding the most new memory at the end of the
+request. summary() keeps per-route aggregates for the process.
+
+With profiling off, stage() returns a shared no-op context and @staged
+returns the function unchanged. tracemalloc is process-wide, so profile with
+a single handler thread (server.py serve --threads 1), and because it slows
+allocation-heavy code severalfold, read profiled timings relative to each
+other only (tune_memory.py measures latency separately).
+"""
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import functools
+import tracemalloc
+from contextlib import nullcontext
+
+logger = logging.getLogger()
+
+ENABLED = os.environ.get('MEMORY_PROFILE', '').lower() in ('1', 'true', 'yes')
+# Frames kept per traced allocation; 1 is enough to name the allocating line
+TRACE_FRAMES = int(os.environ.get('MEMORY_PROFILE_FRAMES') or 1)
+TOP_SITES = 10
+
+_NULL = nullcontext()
+_local = threading.local()
+_summary = {}
+_summary_lock = threading.Lock()
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start(TRACE_FRAMES)
+
+
+def _kb(size):
+    return round(size / 1024, 1)
+
+
+class _Stage:
+    """Peak, net allocation and duration of a block; nests (a parent's peak includes its children's)"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1].high = max(stack[-1].high, peak)
+        tracemalloc.reset_peak()
+        self.start = current
+        self.high = current
+        self.blocks = sys.getallocatedblocks()
+        self.started = time.perf_counter()
+        stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        current, peak = tracemalloc.get_traced_memory()
+        self.high = max(self.high, peak)
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].high = max(stack[-1].high, self.high)
+        tracemalloc.reset_peak()
+        self.result = {
+            'peak_kb': _kb(self.high - self.start),
+            'net_kb': _kb(current - self.start),
+            'net_blocks': sys.getallocatedblocks() - self.blocks,
+            'ms': round(elapsed * 1000, 2)
+        }
+        stages = getattr(_local, 'stages', None)
+        if stages is not None and stack:
+            # A stage entered several times in one request is reported once, combined
+            seen = stages.get(self.name)
+            if seen is None:
+                stages[self.name] = {'calls': 1, **self.result}
+            else:
+                seen['calls'] += 1
+                seen['peak_kb'] = max(seen['peak_kb'], self.result['peak_kb'])
+                for key in ('net_kb', 'net_blocks', 'ms'):
+                    seen[key] = round(seen[key] + self.result[key], 2)
+        return False
+
+
+class _Request(_Stage):
+    """The outermost stage: also snapshots allocation sites and logs the profile"""
+
+    def __enter__(self):
+        _local.stages = {}
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        top = tracemalloc.take_snapshot().filter_traces(_IGNORED).compare_to(self.snapshot, 'lineno')
+        profile = {
+            'route': self.name,
+            'peak_kb': self.result['peak_kb'],
+            'net_kb': self.result['net_kb'],
+            'ms': self.result['ms'],
+            'stages': _local.stages,
+            'top': [
+                {'site': f"{os.path.basename(diff.traceback[0].filename)}:{diff.traceback[0].lineno}",
+                 'kb': _kb(diff.size_diff), 'blocks': diff.count_diff}
+                for diff in top[:TOP_SITES] if diff.size_diff > 0
+            ]
+        }
+        _local.stages = None
+        _record(profile)
+        logger.info(f"Memory profile: {json.dumps(profile)}")
+        return False
+
+
+def _record(profile):
+    with _summary_lock:
+        route = _summary.setdefault(profile['route'], {'requests': 0, 'peak_kb': 0, 'total_ms': 0, 'stages': {}})
+        route['requests'] += 1
+        route['peak_kb'] = max(route['peak_kb'], profile['peak_kb'])
+        route['total_ms'] += profile['ms']
+        for name, stage in profile['stages'].items():
+            route['stages'][name] = max(route['stages'].get(name, 0), stage['peak_kb'])
+
+
+def route_name(event):
+    """Action name, or the first path segment after an optional stage prefix"""
+    if event.get('action'):
+        return event['action']
+    path = ((event.get('requestContext') or {}).get('http') or {}).get('path', '')
+    parts = [part for part in path.split('/') if part]
+    if len(parts) > 1 and parts[0] == os.environ.get('ENVIRONMENT'):
+        parts = parts[1:]
+    return parts[0] if parts else '/'
+
+
+def request(event):
+    return _Request(route_name(event)) if ENABLED else _NULL
+
+
+def _in_request():
+    # Stages outside a profiled request (e.g. in executor threads) are skipped;
+    # resetting the peak there would clobber the request's
+    return bool(getattr(_local, 'stack', None))
+
+
+def stage(name):
+    return _Stage(name) if ENABLED and _in_request() else _NULL
+
+
+def staged(name):
+    """Decorator form of stage(); a no-op unless profiling is on at import"""
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _in_request():
+                return function(*args, **kwargs)
+            with _Stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summary():
+    """{route: {requests, peak_kb, mean_ms, stage_peak_kb}} over this process's profiled requests"""
+    with _summary_lock:
+        return {
+            route: {
+                'requests': values['requests'],
+                'peak_kb': values['peak_kb'],
+                'mean_ms': round(values['total_ms'] / values['requests'], 2),
+                'stage_peak_kb': dict(values['stages'])
+            }
+            for route, values in _summary.items()
+        }
@@ -0,0 +1,100 @@
+"""Typed values for Alpha Vantage payloads, parsed once at ingest.
+
+Alpha Vantage sends every number as a string and missing values as "None",
+"-" or "". These parsers turn OVERVIEW and statement payloads
+(INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW) into real numbers and nulls
+before they are cached, so request paths and the valuation engine read
+ready-to-compute values. Numbers are Decimal so parsed values store in DynamoDB
+as-is. Parsed payloads stay plain dicts under Alpha Vantage's key names,
+since the cache item is read by name elsewhere (bulk export, mining_metrics,
+admin predicates); only the value types change.
+
+Parsing is idempotent, so items cached before this layer (still strings)
+go through the same functions.
+"""
+from decimal import Decimal, InvalidOperation
+
+MISSING = {'', 'none', 'null', '-', 'n/a', 'nan'}
+
+# Kept as text; every other overview or report field is numeric
+OVERVIEW_TEXT_FIELDS = {
+    'Symbol', 'AssetType', 'Name', 'Description', 'CIK', 'Exchange', 'Currency', 'Country',
+    'Sector', 'Industry', 'Address', 'OfficialSite', 'FiscalYearEnd', 'LatestQuarter',
+    'DividendDate', 'ExDividendDate'
+}
+REPORT_TEXT_FIELDS = {'fiscalDateEnding', 'reportedCurrency'}
+
+
+def parse_number(value):
+    """Decimal for numeric input (text or number), None for Alpha Vantage's missing markers"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, Decimal):
+        return value if value.is_finite() else None
+    text = str(value).strip().replace(',', '')
+    if text.lower() in MISSING:
+        return None
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def parse_text(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    return None if text.lower() in MISSING else text
+
+
+def parse_overview(payload):
+    """OVERVIEW fields with typed values, from a raw payload or a cached overview_data item"""
+    return {
+        key: parse_text(value) if key in OVERVIEW_TEXT_FIELDS else parse_number(value)
+        for key, value in (payload or {}).items()
+    }
+
+
+def overview_dashboard(overview):
+    """The /overview response body for parsed overview fields"""
+    market_cap = overview.get('MarketCapitalization')
+    dividend_yield = overview.get('DividendYield')
+    return {
+        'description': overview.get('Description') or '',
+        'sector': overview.get('Sector') or '',
+        'industry': overview.get('Industry') or '',
+        'market_cap': _abbreviate(market_cap) if market_cap is not None else None,
+        'pe_ratio': _float(overview.get('PERatio')),
+        'dividend_yield': f"{float(dividend_yield) * 100:.2f}%" if dividend_yield is not None else None,
+        '52_week_high': _float(overview.get('52WeekHigh')),
+        '52_week_low': _float(overview.get('52WeekLow'))
+    }
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def _abbreviate(value):
+    value = float(value)
+    for threshold, suffix in ((1e12, 'T'), (1e9, 'B'), (1e6, 'M')):
+        if value >= threshold:
+            return f"{value / threshold:.2f}{suffix}"
+    return str(value)
+
+
+def parse_report(report):
+    """One annual or quarterly report with numeric fields as Decimal or None"""
+    return {
+        key: parse_text(value) if key in REPORT_TEXT_FIELDS else parse_number(value)
+        for key, value in report.items()
+    }
+
+
+def parse_statement(payload):
+    """INCOME_STATEMENT / BALANCE_SHEET / CASH_FLOW payload with typed reports"""
+    parsed = {key: value for key, value in (payload or {}).items() if not key.endswith('Reports')}
+    for period in ('annualReports', 'quarterlyReports'):
+        parsed[period] = [parse_report(report) for report in (payload or {}).get(period, [])]
+    return parsed
@@ -0,0 +1,101 @@
+"""Rebuild the overview/financials cache from archived Alpha Vantage responses.
+
+Re-runs the current transforms (_overview_fields, _financials_fields) over
+the newest archived payloads, so a fixed or extended transform reaches every
+symbol without a single upstream call. Symbols are processed in parallel;
+downstream metrics (valuations, the export change log) follow through the
+change stream as the cache items are rewritten.
+
+    python reprocess.py                      # every archived symbol
+    python reprocess.py AEM NEM --as-of 2026-06-30 --workers 16
+    python reprocess.py --dry-run            # transform only, write nothing
+
+Also reachable as the data_api action {"action": "reprocess", ...}. Like
+server.py, run it with PYTHONPATH=../layers/shared.
+"""
+import json
+import logging
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+
+logger = logging.getLogger()
+
+DEFAULT_WORKERS = 8
+
+
+def _payload(entry):
+    return json.loads(app.response_archive.get(entry.content_hash))
+
+
+def reprocess_symbol(symbol, as_of=None, dry_run=False):
+    """Recompute one symbol's cache attributes from its archived responses; returns what was rebuilt"""
+    archive = app.response_archive
+    fields = {}
+    rebuilt = []
+    overview = archive.latest('OVERVIEW', symbol, as_of)
+    if overview:
+        # Timestamps are the fetch times, so freshness checks still reflect the data's age
+        price_stats = (app.store.get_cache(symbol, ['price_stats']) or {}).get('price_stats')
+        fields.update(app._overview_fields(_payload(overview), overview.fetched_at, price_stats))
+        rebuilt.append('overview')
+    income = archive.latest('INCOME_STATEMENT', symbol, as_of)
+    balance = archive.latest('BALANCE_SHEET', symbol, as_of)
+    if income and balance:
+        financials = {'symbol': symbol, 'incomeStatement': _payload(income), 'balanceSheet': _payload(balance)}
+        financials_fields = app._financials_fields(financials, min(income.fetched_at, balance.fetched_at))
+        # Keep the schedule's validity if it is later than the refetch TTL would give
+        financials_fields.pop('financials_valid_until')
+        fields.update(financials_fields)
+        fields['last_updated'] = max(entry.fetched_at for entry in (overview, income, balance) if entry)
+        rebuilt.append('financials')
+    if fields and not dry_run:
+        app._update_cache(symbol, fields)
+    return rebuilt
+
+
+def reprocess(symbols=None, as_of=None, workers=DEFAULT_WORKERS, dry_run=False):
+    """Rebuild the cache for symbols (default: everything in the archive)"""
+    if app.response_archive is None:
+        raise RuntimeError('ARCHIVE_ROOT is not set')
+    if not symbols:
+        symbols = sorted(set().union(*(app.response_archive.symbols(function)
+                                       for function in ('OVERVIEW', 'INCOME_STATEMENT', 'BALANCE_SHEET'))))
+    summary = {'symbols': len(symbols), 'overview': 0, 'financials': 0, 'failed': {}}
+
+    def _run(symbol):
+        try:
+            return symbol, reprocess_symbol(symbol, as_of, dry_run), None
+        except Exception as e:
+            return symbol, [], str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for symbol, rebuilt, error in executor.map(_run, symbols):
+            if error:
+                logger.error(f"Reprocessing {symbol} failed: {error}")
+                summary['failed'][symbol] = error
+            for part in rebuilt:
+                summary[part] += 1
+    logger.info(f"Reprocess summary: {json.dumps(summary)}")
+    return summary
+
+
+def parse_as_of(value):
+    """End of the given YYYY-MM-DD day (UTC) as epoch seconds"""
+    if not value:
+        return None
+    day = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(day.timestamp()) + 86399
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the data_api cache from archived responses')
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--as-of', help='Use the newest responses fetched on or before this date (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig()
+    print(json.dumps(reprocess(args.symbols, parse_as_of(args.as_of), args.workers, args.dry_run), indent=2))
@@ -0,0 +1,304 @@
+"""Run data_api outside Lambda as an ASGI or WSGI application.
+
+Requests are translated into API Gateway HTTP API (v2) events and handed to
+app.lambda_handler, so every route behaves exactly as it does behind API
+Gateway. Each worker process imports app once and keeps its module-level
+caches (fuzzy index, compressed bodies, request counts) for its lifetime.
+
+    # ASGI, multi-process (needs uvicorn, see requirements-server.txt)
+    python server.py serve --workers 4 --threads 16 --port 8080
+    # or any ASGI/WSGI server
+    uvicorn server:asgi_app --workers 4
+    gunicorn -w 4 --threads 16 server:wsgi_app
+    # Throughput and latency percentiles against a running server
+    python server.py bench "http://127.0.0.1:8080/symbols?query=ag" --concurrency 32 --requests 5000
+
+DYNAMODB_ENDPOINT_URL and ALPHA_VANTAGE_URL select alternate backends
+(e.g. DynamoDB Local, a recorded Alpha Vantage stub) for load tests, and
+STORAGE_BACKEND=sqlite with SQLITE_PATH keeps symbols, the overview/financials
+cache and metrics in an embedded SQLite file instead (see storage.py); fill
+its symbols and metrics from DynamoDB with sync_sqlite.py.
+ARCHIVE_ROOT may be a local directory; local-archive/ and *.sqlite3 files
+here are git-ignored.
+
+/watchlist and /admin/cache/* need a signed-in user. Behind API Gateway the
+Cognito JWT authorizer supplies the claims; here COGNITO_USER_POOL_ID and
+COGNITO_CLIENT_ID enable the same check on the Bearer ID token (needs PyJWT,
+see requirements-server.txt). Without them those routes answer 401.
+
+app imports the Alpha Vantage client and symbol search helpers, which Lambda
+gets from the SharedLayer; run from here with PYTHONPATH=../layers/shared.
+ALPHA_VANTAGE_API_KEYS spreads upstream calls over several keys.
+"""
+import os
+import sys
+import time
+import base64
+import asyncio
+import argparse
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+# Handler threads per worker; the handler blocks on DynamoDB and Alpha Vantage I/O
+WORKER_THREADS = int(os.environ.get('DATA_API_THREADS', 16))
+_executor = None
+_executor_lock = threading.Lock()
+
+# User pool and app client whose ID tokens are accepted, as in the API's JwtConfiguration
+COGNITO_USER_POOL_ID = os.environ.get('COGNITO_USER_POOL_ID')
+COGNITO_CLIENT_ID = os.environ.get('COGNITO_CLIENT_ID')
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+def _handler_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix='data-api')
+    return _executor
+
+
+def _issuer():
+    # Pool ids are "<region>_<id>"
+    return f"https://cognito-idp.{COGNITO_USER_POOL_ID.split('_')[0]}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+
+
+def _signing_keys():
+    global _jwks_client
+    import jwt
+    with _jwks_lock:
+        if _jwks_client is None:
+            # Keeps the fetched key set; an unknown kid refetches it
+            _jwks_client = jwt.PyJWKClient(f"{_issuer()}/.well-known/jwks.json")
+    return _jwks_client
+
+
+def jwt_claims(authorization):
+    """Claims of a valid Cognito ID token in an Authorization header, as the
+    HTTP API's JWT authorizer passes them (all strings), or None"""
+    if not (COGNITO_USER_POOL_ID and COGNITO_CLIENT_ID):
+        return None
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    import jwt
+    try:
+        key = _signing_keys().get_signing_key_from_jwt(token).key
+        claims = jwt.decode(token, key, algorithms=['RS256'], audience=COGNITO_CLIENT_ID, issuer=_issuer())
+    except jwt.PyJWTError:
+        return None
+    if claims.get('token_use') != 'id':
+        return None
+    return {
+        name: f"[{' '.join(map(str, value))}]" if isinstance(value, list) else str(value)
+        for name, value in claims.items()
+    }
+
+
+def build_event(method, path, query_string, headers, body):
+    """API Gateway v2 event for one HTTP request (headers as (name, value) pairs)"""
+    merged = {}
+    for name, value in headers:
+        name = name.lower()
+        # API Gateway joins repeated headers with commas
+        merged[name] = f"{merged[name]},{value}" if name in merged else value
+    query = {}
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        query[name] = f"{query[name]},{value}" if name in query else value
+    event = {
+        'version': '2.0',
+        'rawPath': path,
+        'rawQueryString': query_string,
+        'headers': merged,
+        'queryStringParameters': query or None,
+        'requestContext': {
+            'http': {
+                'method': method,
+                'path': path,
+                'sourceIp': merged.get('x-forwarded-for', '')
+            },
+            'timeEpoch': int(time.time() * 1000)
+        },
+        'isBase64Encoded': False
+    }
+    claims = jwt_claims(merged.get('authorization'))
+    if claims:
+        event['requestContext']['authorizer'] = {'jwt': {'claims': claims, 'scopes': None}}
+    if body:
+        try:
+            event['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            event['body'] = base64.b64encode(body).decode('ascii')
+            event['isBase64Encoded'] = True
+    return event
+
+
+def _handle(event):
+    """Run the Lambda handler and return (status, headers, body bytes)"""
+    # Imported on first use so `bench` runs without the table environment
+    import app
+    response = app.lambda_handler(event, None)
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded'):
+        payload = base64.b64decode(body)
+    else:
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+    headers = dict(response.get('headers') or {})
+    headers.setdefault('Content-Type', 'application/json')
+    headers['Content-Length'] = str(len(payload))
+    return int(response.get('statusCode', 200)), headers, payload
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI entry point; the blocking handler runs on the worker's thread pool"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Load the handler module (and its tables) before taking traffic
+                import app  # noqa: F401
+                _handler_pool()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                _handler_pool().shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    event = build_event(
+        scope['method'],
+        scope['path'],
+        scope.get('query_string', b'').decode('latin-1'),
+        [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope.get('headers', [])],
+        b''.join(chunks)
+    )
+    status, headers, payload = await asyncio.get_running_loop().run_in_executor(_handler_pool(), _handle, event)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def wsgi_app(environ, start_response):
+    """WSGI entry point (the WSGI server provides the threads)"""
+    headers = [
+        (name[5:].replace('_', '-'), value) for name, value in environ.items() if name.startswith('HTTP_')
+    ]
+    if environ.get('CONTENT_TYPE'):
+        headers.append(('content-type', environ['CONTENT_TYPE']))
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    body = environ['wsgi.input'].read(length) if length else b''
+    event = build_event(
+        environ['REQUEST_METHOD'],
+        environ.get('PATH_INFO') or '/',
+        environ.get('QUERY_STRING', ''),
+        headers,
+        body
+    )
+    status, response_headers, payload = _handle(event)
+    reason = http.client.responses.get(status, '')
+    start_response(f"{status} {reason}", list(response_headers.items()))
+    return [payload]
+
+
+def serve(host, port, workers, threads):
+    """Serve asgi_app with uvicorn's multi-process model"""
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required for serve (pip install -r requirements-server.txt)")
+    # Workers re-import this module, so the thread count travels through the environment
+    os.environ['DATA_API_THREADS'] = str(threads)
+    uvicorn.run(
+        'server:asgi_app',
+        host=host,
+        port=port,
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        access_log=False
+    )
+
+
+def bench(url, concurrency, total, warmup):
+    """Closed-loop load test: `concurrency` keep-alive clients issue `total` GETs"""
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else '')
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    latencies = []
+    errors = []
+    counter = iter(range(total + warmup))
+    lock = threading.Lock()
+
+    def _client():
+        connection = connection_class(parts.netloc, timeout=30)
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', target, headers={'Accept-Encoding': 'gzip, br'})
+                response = connection.getresponse()
+                response.read()
+                failed = response.status >= 500
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = connection_class(parts.netloc, timeout=30)
+                failed = str(e)
+            elapsed = time.perf_counter() - started
+            if n >= warmup:
+                with lock:
+                    latencies.append(elapsed)
+                    if failed:
+                        errors.append(failed)
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+
+    def _percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else 0.0
+
+    print(f"requests {len(latencies)}  errors {len(errors)}  concurrency {concurrency}")
+    print(f"throughput {len(latencies) / duration:.1f} req/s")
+    print("latency ms  " + '  '.join(f"p{p} {_percentile(p):.2f}" for p in (50, 90, 99, 99.9)) + f"  max {_percentile(100):.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Self-hosted data_api server')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='Run the multi-worker ASGI server')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    serve_parser.add_argument('--threads', type=int, default=WORKER_THREADS, help='Handler threads per worker')
+    bench_parser = commands.add_parser('bench', help='Measure throughput and tail latency of a running server')
+    bench_parser.add_argument('url')
+    bench_parser.add_argument('--concurrency', type=int, default=16)
+    bench_parser.add_argument('--requests', type=int, default=2000)
+    bench_parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args.host, args.port, args.workers, args.threads)
+    else:
+        bench(args.url, args.concurrency, args.requests, args.warmup)
@@ -0,0 +1,407 @@
+"""Storage backends for the symbols, overview/financials cache and metrics.
+
+Handlers talk to a StorageBackend instead of boto3 tables, so the same code
+runs against DynamoDB in Lambda or an embedded SQLite file for local runs,
+benchmarks and self-hosted servers. Both backends return items as plain
+dicts with numbers as Decimal, the way boto3 deserializes DynamoDB items.
+
+The backend is chosen by STORAGE_BACKEND (dynamodb, the default, or sqlite
+with SQLITE_PATH). In Lambda the ingest functions (symbol_ingest,
+mining_metrics) write the DynamoDB tables directly; data_api only fills the
+cache on a miss. A SQLite file gets its symbols and metrics (and optionally
+the cache) copied in with sync_sqlite.py.
+"""
+import os
+import json
+import time
+import base64
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Key
+
+# DynamoDB caps projection expressions at 4KB; larger report reads return None
+MAX_PROJECTION_LENGTH = 3500
+BATCH_GET_LIMIT = 100
+
+
+class StorageBackend(ABC):
+    """Operations the handlers need; every method is safe to call from several threads"""
+
+    # Symbols (one row per symbol and exchange)
+    @abstractmethod
+    def symbol_listings(self, symbol):
+        ...
+
+    @abstractmethod
+    def get_symbol_listing(self, symbol, exchange):
+        ...
+
+    @abstractmethod
+    def scan_symbols(self, limit=None, start_key=None, attributes=None):
+        """Up to `limit` listings after start_key, plus the key to resume from (None at the end)"""
+
+    @abstractmethod
+    def put_symbols(self, items):
+        ...
+
+    # Overview/financials cache (one item per symbol)
+    @abstractmethod
+    def get_cache(self, symbol, attributes=None):
+        """The symbol's cache item (only `attributes` if given), or None"""
+
+    @abstractmethod
+    def get_financials_reports(self, symbol, positions, fields):
+        """Selected reports: {statement: {period: [report, ...]}} for the list positions given.
+
+        positions maps (statement, period) to report indexes; fields limits
+        each report to those keys. Returns None if the backend can't read
+        that many reports selectively (the caller falls back to the full item).
+        """
+
+    @abstractmethod
+    def update_cache(self, symbol, set_fields=None, remove_fields=()):
+        ...
+
+    @abstractmethod
+    def scan_cache(self, attributes=None):
+        """Iterate over every cache item"""
+
+    # Metrics
+    @abstractmethod
+    def get_metrics(self, symbol):
+        ...
+
+    @abstractmethod
+    def put_metrics(self, items):
+        ...
+
+    @abstractmethod
+    def scan_metrics(self):
+        """Iterate over every metrics item"""
+
+    def get_cache_and_metrics(self, symbol, cache_attributes=None):
+        """(cache item or {}, metrics item or None), read together where the backend allows"""
+        return self.get_caches_and_metrics([symbol], cache_attributes)[symbol]
+
+    def get_caches_and_metrics(self, symbols, cache_attributes=None):
+        """{symbol: (cache item or {}, metrics item or None)} for many symbols at once"""
+        return {symbol: (self.get_cache(symbol, cache_attributes) or {}, self.get_metrics(symbol)) for symbol in symbols}
+
+
+class DynamoDBStorage(StorageBackend):
+
+    def __init__(self, dynamodb, symbols_table, cache_table, metrics_table):
+        self.dynamodb = dynamodb
+        self.symbols_table = dynamodb.Table(symbols_table)
+        self.cache_table = dynamodb.Table(cache_table)
+        self.metrics_table = dynamodb.Table(metrics_table)
+
+    @staticmethod
+    def _projection(attributes):
+        if not attributes:
+            return {}
+        names = {f"#a{i}": name for i, name in enumerate(attributes)}
+        return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+    def symbol_listings(self, symbol):
+        return self.symbols_table.query(KeyConditionExpression=Key('symbol').eq(symbol)).get('Items', [])
+
+    def get_symbol_listing(self, symbol, exchange):
+        return self.symbols_table.get_item(Key={'symbol': symbol, 'exchange': exchange}).get('Item')
+
+    def scan_symbols(self, limit=None, start_key=None, attributes=None):
+        scan_params = self._projection(attributes)
+        if start_key:
+            scan_params['ExclusiveStartKey'] = start_key
+        items = []
+        while True:
+            # Never evaluate more items than we still need to return, so the
+            # LastEvaluatedKey always sits exactly after the last returned item
+            if limit:
+                scan_params['Limit'] = limit - len(items)
+            response = self.symbols_table.scan(**scan_params)
+            items.extend(response.get('Items', []))
+            next_key = response.get('LastEvaluatedKey')
+            if not next_key or (limit and len(items) >= limit):
+                return items, next_key
+            scan_params['ExclusiveStartKey'] = next_key
+
+    def put_symbols(self, items):
+        with self.symbols_table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def get_cache(self, symbol, attributes=None):
+        return self.cache_table.get_item(Key={'symbol': symbol}, **self._projection(attributes)).get('Item')
+
+    def get_financials_reports(self, symbol, positions, fields):
+        # Statement/period names are fixed identifiers; only caller-supplied fields need placeholders
+        names = {f"#x{j}": field for j, field in enumerate(fields)} if fields else {}
+        paths = []
+        for (statement, period), indexes in positions.items():
+            for i in indexes:
+                base = f"financials.{statement}.{period}[{i}]"
+                paths.extend([f"{base}.#x{j}" for j in range(len(fields))] if fields else [base])
+        if not paths:
+            return {}
+        projection = ', '.join(paths)
+        if len(projection) > MAX_PROJECTION_LENGTH:
+            return None
+        projection_params = {'ProjectionExpression': projection}
+        if names:
+            projection_params['ExpressionAttributeNames'] = names
+        item = self.cache_table.get_item(Key={'symbol': symbol}, **projection_params).get('Item') or {}
+        return item.get('financials', {})
+
+    def update_cache(self, symbol, set_fields=None, remove_fields=()):
+        set_fields = set_fields or {}
+        names = {f"#f{i}": name for i, name in enumerate(list(set_fields) + list(remove_fields))}
+        clauses = []
+        if set_fields:
+            clauses.append('SET ' + ', '.join(f"#f{i} = :v{i}" for i in range(len(set_fields))))
+        if remove_fields:
+            clauses.append('REMOVE ' + ', '.join(f"#f{i}" for i in range(len(set_fields), len(names))))
+        update_params = {
+            'Key': {'symbol': symbol},
+            'UpdateExpression': ' '.join(clauses),
+            'ExpressionAttributeNames': names
+        }
+        if set_fields:
+            update_params['ExpressionAttributeValues'] = {f":v{i}": value for i, value in enumerate(set_fields.values())}
+        self.cache_table.update_item(**update_params)
+
+    @staticmethod
+    def _scan(table, scan_params):
+        while True:
+            response = table.scan(**scan_params)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def scan_cache(self, attributes=None):
+        return self._scan(self.cache_table, self._projection(attributes))
+
+    def get_metrics(self, symbol):
+        return self.metrics_table.get_item(Key={'symbol': symbol}).get('Item')
+
+    def put_metrics(self, items):
+        with self.metrics_table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def scan_metrics(self):
+        return self._scan(self.metrics_table, {})
+
+    def get_caches_and_metrics(self, symbols, cache_attributes=None):
+        """BatchGetItem over both tables, BATCH_GET_LIMIT keys per request, retrying unprocessed keys"""
+        symbols = list(dict.fromkeys(symbols))
+        if cache_attributes and 'symbol' not in cache_attributes:
+            # Results come back unordered, so the key is needed to match them up
+            cache_attributes = ['symbol', *cache_attributes]
+        found = {self.cache_table.table_name: {}, self.metrics_table.table_name: {}}
+        per_request = BATCH_GET_LIMIT // 2
+        for start in range(0, len(symbols), per_request):
+            keys = [{'symbol': symbol} for symbol in symbols[start:start + per_request]]
+            request_items = {
+                self.cache_table.table_name: {'Keys': keys, **self._projection(cache_attributes)},
+                self.metrics_table.table_name: {'Keys': keys}
+            }
+            for attempt in range(5):
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for table_name, items in response.get('Responses', {}).items():
+                    found[table_name].update((item['symbol'], item) for item in items)
+                request_items = response.get('UnprocessedKeys') or {}
+                if not request_items:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+        caches = found[self.cache_table.table_name]
+        metrics = found[self.metrics_table.table_name]
+        return {symbol: (caches.get(symbol) or {}, metrics.get(symbol)) for symbol in symbols}
+
+
+def _encode(value):
+    def _default(obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
+        if isinstance(obj, (bytes, bytearray)) or hasattr(obj, 'value'):
+            return {'__bytes__': base64.b64encode(bytes(getattr(obj, 'value', obj))).decode('ascii')}
+        if isinstance(obj, set):
+            return sorted(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not storable")
+    return json.dumps(value, default=_default, separators=(',', ':'))
+
+
+def _decode_bytes(obj):
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def _decode(text):
+    # Numbers come back as Decimal, matching boto3's DynamoDB deserializer
+    return json.loads(text, parse_float=Decimal, parse_int=Decimal, object_hook=_decode_bytes)
+
+
+class SQLiteStorage(StorageBackend):
+    """Embedded SQLite store (WAL mode, one connection per thread).
+
+    Cache items are stored one row per attribute, so projections and
+    partial updates touch only the attributes involved, like DynamoDB.
+    Multi-row writes run in a single transaction.
+    """
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS symbols (
+            symbol TEXT NOT NULL, exchange TEXT NOT NULL, symbol_lower TEXT, item TEXT NOT NULL,
+            PRIMARY KEY (symbol, exchange)) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS symbols_by_lower ON symbols (symbol_lower)",
+        """CREATE TABLE IF NOT EXISTS cache_attributes (
+            symbol TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL,
+            PRIMARY KEY (symbol, name)) WITHOUT ROWID""",
+        "CREATE TABLE IF NOT EXISTS metrics (symbol TEXT PRIMARY KEY, item TEXT NOT NULL) WITHOUT ROWID",
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level='DEFERRED')
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def symbol_listings(self, symbol):
+        rows = self._connection().execute('SELECT item FROM symbols WHERE symbol = ? ORDER BY exchange', (symbol,))
+        return [_decode(item) for item, in rows]
+
+    def get_symbol_listing(self, symbol, exchange):
+        row = self._connection().execute(
+            'SELECT item FROM symbols WHERE symbol = ? AND exchange = ?', (symbol, exchange)
+        ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def scan_symbols(self, limit=None, start_key=None, attributes=None):
+        query = 'SELECT symbol, exchange, item FROM symbols'
+        params = []
+        if start_key:
+            query += ' WHERE (symbol, exchange) > (?, ?)'
+            params.extend([start_key['symbol'], start_key['exchange']])
+        query += ' ORDER BY symbol, exchange'
+        if limit:
+            # One extra row tells us whether there is another page
+            query += ' LIMIT ?'
+            params.append(limit + 1)
+        rows = self._connection().execute(query, params).fetchall()
+        more = bool(limit) and len(rows) > limit
+        rows = rows[:limit] if limit else rows
+        items = []
+        for symbol, exchange, item in rows:
+            item = _decode(item)
+            items.append({name: item[name] for name in attributes if name in item} if attributes else item)
+        next_key = {'symbol': rows[-1][0], 'exchange': rows[-1][1]} if more else None
+        return items, next_key
+
+    def put_symbols(self, items):
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO symbols (symbol, exchange, symbol_lower, item) VALUES (?, ?, ?, ?)',
+                [(item['symbol'], item['exchange'], item.get('symbol_lower', item['symbol'].lower()), _encode(item))
+                 for item in items]
+            )
+
+    def get_cache(self, symbol, attributes=None):
+        query = 'SELECT name, value FROM cache_attributes WHERE symbol = ?'
+        params = [symbol]
+        if attributes:
+            query += f" AND name IN ({', '.join('?' * len(attributes))})"
+            params.extend(attributes)
+        rows = self._connection().execute(query, params).fetchall()
+        if not rows:
+            return None
+        item = {name: _decode(value) for name, value in rows}
+        if not attributes or 'symbol' in attributes:
+            item['symbol'] = symbol
+        return item
+
+    def get_financials_reports(self, symbol, positions, fields):
+        financials = (self.get_cache(symbol, ['financials']) or {}).get('financials', {})
+        selected = {}
+        for (statement, period), indexes in positions.items():
+            reports = (financials.get(statement) or {}).get(period, [])
+            chosen = [reports[i] for i in indexes if i < len(reports)]
+            if fields:
+                chosen = [{field: report[field] for field in fields if field in report} for report in chosen]
+            if chosen:
+                selected.setdefault(statement, {})[period] = chosen
+        return selected
+
+    def update_cache(self, symbol, set_fields=None, remove_fields=()):
+        with self._connection() as connection:
+            if set_fields:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO cache_attributes (symbol, name, value) VALUES (?, ?, ?)',
+                    [(symbol, name, _encode(value)) for name, value in set_fields.items()]
+                )
+            if remove_fields:
+                connection.executemany(
+                    'DELETE FROM cache_attributes WHERE symbol = ? AND name = ?',
+                    [(symbol, name) for name in remove_fields]
+                )
+
+    def scan_cache(self, attributes=None):
+        query = 'SELECT symbol, name, value FROM cache_attributes'
+        params = []
+        if attributes:
+            query += f" WHERE name IN ({', '.join('?' * len(attributes))})"
+            params.extend(attributes)
+        query += ' ORDER BY symbol'
+        item = None
+        for symbol, name, value in self._connection().execute(query, params):
+            if item is None or item['symbol'] != symbol:
+                if item is not None:
+                    yield item
+                item = {'symbol': symbol}
+            item[name] = _decode(value)
+        if item is not None:
+            yield item
+
+    def get_metrics(self, symbol):
+        row = self._connection().execute('SELECT item FROM metrics WHERE symbol = ?', (symbol,)).fetchone()
+        return _decode(row[0]) if row else None
+
+    def put_metrics(self, items):
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO metrics (symbol, item) VALUES (?, ?)',
+                [(item['symbol'], _encode(item)) for item in items]
+            )
+
+    def scan_metrics(self):
+        for item, in self._connection().execute('SELECT item FROM metrics ORDER BY symbol'):
+            yield _decode(item)
+
+
+def from_environment(dynamodb=None):
+    """Backend selected by STORAGE_BACKEND"""
+    backend = os.environ.get('STORAGE_BACKEND', 'dynamodb').lower()
+    if backend == 'sqlite':
+        return SQLiteStorage(os.environ.get('SQLITE_PATH', 'data_api.sqlite3'))
+    if backend != 'dynamodb':
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected dynamodb or sqlite")
+    return DynamoDBStorage(
+        dynamodb,
+        os.environ['SYMBOLS_TABLE'],
+        os.environ['COMPANY_OVERVIEW_TABLE'],
+        os.environ['METRICS_TABLE']
+    )
@@ -0,0 +1,75 @@
+"""Copy the DynamoDB tables data_api reads into a SQLite file for local runs.
+
+In Lambda, symbol_ingest and mining_metrics fill the symbols and metrics
+tables. A self-hosted server on STORAGE_BACKEND=sqlite has no such writers,
+so this copies them (and optionally the overview/financials cache, which
+data_api otherwise fills on demand) from DynamoDB into SQLITE_PATH through
+the StorageBackend interface.
+
+    python sync_sqlite.py                          # symbols and metrics into $SQLITE_PATH
+    python sync_sqlite.py --cache --path local.sqlite3
+
+The tables are named by SYMBOLS_TABLE, COMPANY_OVERVIEW_TABLE and
+METRICS_TABLE, as in the deployed function; DYNAMODB_ENDPOINT_URL reads from
+DynamoDB Local instead. Re-running overwrites items in place.
+"""
+import os
+import json
+import logging
+import argparse
+
+import boto3
+
+import storage
+
+logger = logging.getLogger()
+
+# Items buffered per SQLite transaction
+WRITE_BATCH = 500
+
+
+def _chunks(items, size=WRITE_BATCH):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def sync(source, destination, cache=False):
+    """Copy symbols and metrics (and the cache if asked) from one backend to another; returns counts"""
+    counts = {'symbols': 0, 'metrics': 0}
+    start_key = None
+    while True:
+        items, start_key = source.scan_symbols(limit=WRITE_BATCH, start_key=start_key)
+        destination.put_symbols(items)
+        counts['symbols'] += len(items)
+        if not start_key:
+            break
+    for chunk in _chunks(source.scan_metrics()):
+        destination.put_metrics(chunk)
+        counts['metrics'] += len(chunk)
+    if cache:
+        counts['cache'] = 0
+        for item in source.scan_cache():
+            symbol = item.pop('symbol')
+            destination.update_cache(symbol, set_fields=item)
+            counts['cache'] += 1
+    logger.info(f"Synced into SQLite: {json.dumps(counts)}")
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Copy the data_api DynamoDB tables into a SQLite file')
+    parser.add_argument('--path', default=os.environ.get('SQLITE_PATH', 'data_api.sqlite3'))
+    parser.add_argument('--cache', action='store_true', help='Also copy the overview/financials cache')
+    args = parser.parse_args()
+    logging.basicConfig()
+    dynamodb = boto3.resource('dynamodb', endpoint_url=os.environ.get('DYNAMODB_ENDPOINT_URL') or None)
+    source = storage.DynamoDBStorage(
+        dynamodb, os.environ['SYMBOLS_TABLE'], os.environ['COMPANY_OVERVIEW_TABLE'], os.environ['METRICS_TABLE']
+    )
+    print(json.dumps(sync(source, storage.SQLiteStorage(args.path), args.cache), indent=2))
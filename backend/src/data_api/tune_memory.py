@@ -0,0 +1,235 @@
+"""Recommend a data_api MemorySize from measured financials payload costs.
+
+For each payload size in the sweep (reports per statement and period), a
+synthetic INCOME_STATEMENT/BALANCE_SHEET pair goes through the handler's own
+code on two paths:
+
+    miss  parse the upstream payloads (_financials_fields), then serialize
+          (_financials_body) and gzip (_compress_response) the response
+    hit   decode the cached item from DynamoDB's wire format (the work a
+          get_item does), then serialize and gzip the response
+
+Each path is timed untraced over --repeat runs (p50/p95), then run once
+under tracemalloc for its peak. Lambda gives a function CPU in proportion to
+its memory, a full vCPU at 1769 MB, so time at a MemorySize is estimated as
+local time x --cpu-factor x max(1, 1769 / MemorySize). A size qualifies when
+the resident baseline plus the largest peak x HEADROOM fits in it and the
+slowest p95 meets --target-ms. The cheapest qualifying size in GB-seconds
+per request is recommended; deploy it with the DataApiMemorySize parameter.
+
+    python tune_memory.py                                  # sizes 4,20,80,160, 250 ms target
+    python tune_memory.py --sizes 20,80 --target-ms 100 --cpu-factor 1.4 --json
+
+--cpu-factor is how much slower a Lambda vCPU is than a core here (run the
+tool once inside a 1769 MB function to measure it). Network time to
+DynamoDB and Alpha Vantage is not included; leave room for it in the target.
+Like server.py, run it with PYTHONPATH=../layers/shared.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import resource
+import tracemalloc
+
+# app reads its table names at import; none are touched here
+for _name in ('SYMBOLS_TABLE', 'METRICS_TABLE', 'COMPANY_OVERVIEW_TABLE', 'SEARCH_INDEX_TABLE', 'POPULARITY_TABLE',
+              'MINING_OPERATING_TABLE', 'NEWS_TABLE', 'WATCHLIST_TABLE', 'SENSITIVITY_TABLE',
+              'CORPORATE_EVENTS_TABLE', 'CACHE_CONTROL_TABLE'):
+    os.environ.setdefault(_name, 'tune-memory')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+import app
+
+FULL_VCPU_MB = 1769
+MEMORY_SIZES = [128, 256, 512, 768, 1024, 1536, 1769, 2048, 3008]
+# tracemalloc sees Python allocations only, not allocator slack or native buffers
+HEADROOM = 1.5
+# x86 Lambda price per GB-second (us-east-1)
+USD_PER_GB_SECOND = 0.0000166667
+DEFAULT_SIZES = [4, 20, 80, 160]
+DEFAULT_TARGET_MS = 250
+
+INCOME_FIELDS = [
+    'grossProfit', 'totalRevenue', 'costOfRevenue', 'costofGoodsAndServicesSold', 'operatingIncome',
+    'sellingGeneralAndAdministrative', 'researchAndDevelopment', 'operatingExpenses', 'investmentIncomeNet',
+    'netInterestIncome', 'interestIncome', 'interestExpense', 'nonInterestIncome', 'otherNonOperatingIncome',
+    'depreciation', 'depreciationAndAmortization', 'incomeBeforeTax', 'incomeTaxExpense', 'interestAndDebtExpense',
+    'netIncomeFromContinuingOperations', 'comprehensiveIncomeNetOfTax', 'ebit', 'ebitda', 'netIncome'
+]
+BALANCE_FIELDS = [
+    'totalAssets', 'totalCurrentAssets', 'cashAndCashEquivalentsAtCarryingValue', 'cashAndShortTermInvestments',
+    'inventory', 'currentNetReceivables', 'totalNonCurrentAssets', 'propertyPlantEquipment',
+    'accumulatedDepreciationAmortizationPPE', 'intangibleAssets', 'intangibleAssetsExcludingGoodwill', 'goodwill',
+    'investments', 'longTermInvestments', 'shortTermInvestments', 'otherCurrentAssets', 'otherNonCurrentAssets',
+    'totalLiabilities', 'totalCurrentLiabilities', 'currentAccountsPayable', 'deferredRevenue', 'currentDebt',
+    'shortTermDebt', 'totalNonCurrentLiabilities', 'capitalLeaseObligations', 'longTermDebt', 'currentLongTermDebt',
+    'longTermDebtNoncurrent', 'shortLongTermDebtTotal', 'otherCurrentLiabilities', 'otherNonCurrentLiabilities',
+    'totalShareholderEquity', 'treasuryStock', 'retainedEarnings', 'commonStock', 'commonStockSharesOutstanding'
+]
+
+
+def synthetic_statement(symbol, fields, reports, rng):
+    """An Alpha Vantage statement payload with `reports` annual and quarterly reports"""
+    def _reports(step_months):
+        rows = []
+        for i in range(reports):
+            months = 2026 * 12 + 5 - i * step_months
+            row = {'fiscalDateEnding': f"{months // 12:04d}-{months % 12 + 1:02d}-30", 'reportedCurrency': 'USD'}
+            for field in fields:
+                row[field] = 'None' if rng.random() < 0.05 else str(rng.randrange(-10 ** 9, 10 ** 11))
+            rows.append(row)
+        return rows
+    return {'symbol': symbol, 'annualReports': _reports(12), 'quarterlyReports': _reports(3)}
+
+
+def _rss_mb():
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _paths(reports, rng):
+    """(response body size, {path: callable}) for one payload size"""
+    payloads = {
+        'symbol': 'TUNE',
+        'incomeStatement': synthetic_statement('TUNE', INCOME_FIELDS, reports, rng),
+        'balanceSheet': synthetic_statement('TUNE', BALANCE_FIELDS, reports, rng)
+    }
+    event = {'headers': {'accept-encoding': 'gzip'}}
+    fields = app._financials_fields(payloads, int(time.time()))
+    serializer = TypeSerializer()
+    wire = json.dumps({
+        name: serializer.serialize(fields[name]) for name in ('financials', 'financials_index')
+    })
+    deserializer = TypeDeserializer()
+
+    def _respond(financials):
+        # Memoized compression would hide the cost after the first run
+        app._compressed_bodies.clear()
+        return app._compress_response(event, {'statusCode': 200, 'body': app._financials_body('TUNE', financials, None)})
+
+    def miss():
+        return _respond(app._financials_fields(payloads, int(time.time()))['financials'])
+
+    def hit():
+        item = {name: deserializer.deserialize(value) for name, value in json.loads(wire).items()}
+        return _respond(item['financials'])
+
+    return len(app._financials_body('TUNE', fields['financials'], None)), {'miss': miss, 'hit': hit}
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def _peak_mb(run):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        del result
+    finally:
+        if started:
+            tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def measure(sizes, repeat, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for reports in sizes:
+        body_bytes, paths = _paths(reports, rng)
+        for path, run in paths.items():
+            run()  # warm caches and lazy imports
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            rows.append({
+                'reports': reports,
+                'body_kb': round(body_bytes / 1024, 1),
+                'path': path,
+                'p50_ms': round(_percentile(timings, 50), 2),
+                'p95_ms': round(_percentile(timings, 95), 2),
+                'peak_mb': round(_peak_mb(run), 2)
+            })
+    return rows
+
+
+def recommend(rows, baseline_mb, target_ms, cpu_factor):
+    """Estimated latency, fit and cost at each MemorySize, and the cheapest size meeting both targets"""
+    local_ms = max(row['p95_ms'] for row in rows)
+    need_mb = baseline_mb + max(row['peak_mb'] for row in rows) * HEADROOM
+    options = []
+    for memory in MEMORY_SIZES:
+        estimated_ms = local_ms * cpu_factor * max(1.0, FULL_VCPU_MB / memory)
+        options.append({
+            'memory_mb': memory,
+            'est_p95_ms': round(estimated_ms, 1),
+            'fits': need_mb <= memory,
+            'meets_target': estimated_ms <= target_ms,
+            # Lambda bills duration in 1 ms steps
+            'usd_per_million': round(memory / 1024 * math.ceil(estimated_ms) / 1000 * USD_PER_GB_SECOND * 1e6, 2)
+        })
+    qualifying = [option for option in options if option['fits'] and option['meets_target']]
+    best = min(qualifying, key=lambda option: (option['usd_per_million'], option['memory_mb'])) if qualifying else None
+    return {
+        'baseline_mb': round(baseline_mb, 1),
+        'needed_mb': round(need_mb, 1),
+        'target_ms': target_ms,
+        'cpu_factor': cpu_factor,
+        'options': options,
+        'recommended_mb': best['memory_mb'] if best else None
+    }
+
+
+def _print_report(rows, report):
+    print(f"{'reports':>7}  {'body KB':>8}  {'path':<4}  {'p50 ms':>8}  {'p95 ms':>8}  {'peak MB':>8}")
+    for row in rows:
+        print(f"{row['reports']:>7}  {row['body_kb']:>8}  {row['path']:<4}  {row['p50_ms']:>8}  {row['p95_ms']:>8}  {row['peak_mb']:>8}")
+    print()
+    print(f"baseline RSS {report['baseline_mb']} MB, needs {report['needed_mb']} MB with headroom, "
+          f"target p95 {report['target_ms']} ms, cpu factor {report['cpu_factor']}")
+    print(f"{'MemorySize':>10}  {'est p95 ms':>10}  {'fits':>5}  {'target':>6}  {'$/1M req':>9}")
+    for option in report['options']:
+        print(f"{option['memory_mb']:>10}  {option['est_p95_ms']:>10}  {str(option['fits']):>5}  "
+              f"{str(option['meets_target']):>6}  {option['usd_per_million']:>9}")
+    print()
+    if report['recommended_mb']:
+        print(f"recommended MemorySize: {report['recommended_mb']}")
+    else:
+        print('no MemorySize meets the target; relax --target-ms or shrink the payload path')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recommend a data_api MemorySize from payload-size sweeps')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated reports per statement and period')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS, help='p95 latency target in ms')
+    parser.add_argument('--cpu-factor', type=float, default=1.0, help='Lambda vCPU slowdown relative to this machine')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+    baseline_mb = _rss_mb()
+    rows = measure([int(size) for size in args.sizes.split(',') if size.strip()], max(1, args.repeat))
+    report = recommend(rows, baseline_mb, args.target_ms, args.cpu_factor)
+    if args.json:
+        json.dump({'measurements': rows, **report}, sys.stdout, indent=2)
+        print()
+    else:
+        _print_report(rows, report)
@@ -0,0 +1,254 @@
+"""Alpha Vantage client that spreads calls over a pool of API keys.
+
+Keys come from ALPHA_VANTAGE_API_KEYS (comma-separated), falling back to the
+single ALPHA_VANTAGE_API_KEY. Each key keeps its own sliding one-minute
+window of ALPHA_VANTAGE_KEY_RPM calls and its own error state, and every call
+goes to the least-loaded key that is free (calls in its window plus calls in
+flight), so N keys give N times one key's throughput.
+
+Alpha Vantage reports rate limiting as a 200 whose JSON body is an
+"Information" (older plans: "Note") message. When that happens only the key
+that got it is cooled down, with exponential backoff on repeats, or until the
+next UTC day for a daily quota, and the call is retried on another key.
+RateLimitedError is raised once no key frees up within the caller's wait.
+
+The pool is per process: each Lambda container or server worker learns the
+keys' limits from Alpha Vantage's responses, not from the others. Ingest
+functions scale their per-key call budgets by key_count().
+
+Deployed in the SharedLayer; for local runs put this directory on
+PYTHONPATH.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+import requests
+
+logger = logging.getLogger()
+
+DEFAULT_URL = 'https://www.alphavantage.co/query'
+# Lowest premium tier; free keys are throttled by the rate-limit backoff instead
+DEFAULT_REQUESTS_PER_MINUTE = 75
+WINDOW_SEC = 60
+# A key that hit its per-minute limit rests 15s, 30s, 60s, ... up to 15 minutes
+COOLDOWN_BASE_SEC = 15
+COOLDOWN_MAX_SEC = 15 * 60
+# Consecutive transport failures on one key before it is rested
+ERROR_STRIKES = 3
+ERROR_COOLDOWN_SEC = 30
+# Rate-limit replies are short JSON messages; larger bodies are never parsed here
+RATE_LIMIT_BODY_BYTES = 2048
+RATE_LIMIT_MESSAGE = re.compile(r'rate limit|call frequency|requests? per|calls? per', re.I)
+
+OK, RATE_LIMITED, ERROR = 'ok', 'rate_limited', 'error'
+
+
+class AlphaVantageError(Exception):
+    pass
+
+
+class RateLimitedError(AlphaVantageError):
+    """Every key in the pool is rate limited for longer than the caller will wait"""
+
+
+def _mask(key):
+    return f"...{key[-4:]}"
+
+
+def rate_limit_message(response):
+    """The rate-limit message in a 200 response, or None"""
+    body = response.content
+    if response.status_code != 200 or len(body) > RATE_LIMIT_BODY_BYTES or not body.lstrip().startswith(b'{'):
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    message = data.get('Information') or data.get('Note') if isinstance(data, dict) else None
+    return message if message and RATE_LIMIT_MESSAGE.search(message) else None
+
+
+def _is_daily_limit(message):
+    # "5 calls per minute and 500 calls per day" is a per-minute limit
+    message = message.lower()
+    return 'per day' in message and 'per minute' not in message
+
+
+class _KeyState:
+    __slots__ = ('key', 'calls', 'in_flight', 'cooldown_until', 'strikes', 'errors',
+                 'requests', 'rate_limited', 'failures', 'last_used')
+
+    def __init__(self, key):
+        self.key = key
+        self.calls = deque()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.strikes = 0
+        self.errors = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.last_used = 0.0
+
+
+class KeyPool:
+    """Thread-safe per-key rate windows, least-loaded-first"""
+
+    def __init__(self, keys, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, clock=time.monotonic):
+        # dict.fromkeys drops duplicates but keeps the configured order
+        self._keys = [_KeyState(key) for key in dict.fromkeys(keys) if key]
+        if not self._keys:
+            raise ValueError('No Alpha Vantage API keys configured')
+        self._by_key = {state.key: state for state in self._keys}
+        self.requests_per_minute = requests_per_minute
+        self._clock = clock
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _ready_at(self, state, now):
+        while state.calls and state.calls[0] <= now - WINDOW_SEC:
+            state.calls.popleft()
+        if len(state.calls) >= self.requests_per_minute:
+            return max(state.cooldown_until, state.calls[0] + WINDOW_SEC)
+        return state.cooldown_until
+
+    def acquire(self, max_wait=0.0):
+        """Reserve a call on the least-loaded free key, waiting up to max_wait seconds for one"""
+        with self._condition:
+            deadline = self._clock() + max_wait
+            while True:
+                now = self._clock()
+                best, wake = None, None
+                for state in self._keys:
+                    ready = self._ready_at(state, now)
+                    if ready > now:
+                        wake = ready if wake is None else min(wake, ready)
+                    elif best is None or (len(state.calls) + state.in_flight, state.last_used) < \
+                            (len(best.calls) + best.in_flight, best.last_used):
+                        best = state
+                if best is not None:
+                    best.calls.append(now)
+                    best.in_flight += 1
+                    best.requests += 1
+                    best.last_used = now
+                    return best.key
+                if wake > deadline:
+                    raise RateLimitedError(
+                        f"All {len(self._keys)} Alpha Vantage keys are rate limited for another {wake - now:.0f}s"
+                    )
+                self._condition.wait(min(wake, deadline) - now)
+
+    def release(self, key, outcome, message=''):
+        """Record how a call on the key went"""
+        with self._condition:
+            state = self._by_key[key]
+            state.in_flight -= 1
+            now = self._clock()
+            if outcome == OK:
+                state.strikes = 0
+                state.failures = 0
+            elif outcome == RATE_LIMITED:
+                state.rate_limited += 1
+                state.strikes += 1
+                if _is_daily_limit(message):
+                    # Daily quotas reset at midnight UTC
+                    rest = 86400 - time.time() % 86400
+                else:
+                    rest = min(COOLDOWN_BASE_SEC * 2 ** (state.strikes - 1), COOLDOWN_MAX_SEC)
+                state.cooldown_until = max(state.cooldown_until, now + rest)
+            else:
+                state.errors += 1
+                state.failures += 1
+                if state.failures >= ERROR_STRIKES:
+                    state.cooldown_until = max(state.cooldown_until, now + ERROR_COOLDOWN_SEC)
+                    state.failures = 0
+            self._condition.notify_all()
+
+    def stats(self):
+        """Per-key counters, keys masked"""
+        with self._condition:
+            now = self._clock()
+            return [{
+                'key': _mask(state.key),
+                'requests': state.requests,
+                'in_window': len(state.calls),
+                'in_flight': state.in_flight,
+                'rate_limited': state.rate_limited,
+                'errors': state.errors,
+                'ready_in_sec': max(0, round(self._ready_at(state, now) - now))
+            } for state in self._keys]
+
+
+class Client:
+    """GETs against the Alpha Vantage query endpoint with a pooled key"""
+
+    def __init__(self, pool, url=DEFAULT_URL, max_wait=0.0):
+        self.pool = pool
+        self.url = url
+        self.max_wait = max_wait
+
+    def request(self, params, timeout=10, max_wait=None):
+        """The raw response; a rate-limited call is retried on the next free key.
+
+        Anything else (error messages, non-200s) is returned for the caller
+        to handle as before. Transport errors are raised.
+        """
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        message = ''
+        # Each key gets at most two tries per call before the call gives up
+        for _ in range(2 * len(self.pool)):
+            key = self.pool.acquire(max(0.0, deadline - time.monotonic()))
+            try:
+                response = requests.get(self.url, params={**params, 'apikey': key}, timeout=timeout)
+            except requests.exceptions.RequestException:
+                self.pool.release(key, ERROR)
+                raise
+            message = rate_limit_message(response)
+            if message is None:
+                self.pool.release(key, ERROR if response.status_code >= 500 else OK)
+                return response
+            self.pool.release(key, RATE_LIMITED, message)
+            logger.warning(f"Alpha Vantage key {_mask(key)} rate limited on {params.get('function')}: {message[:120]}")
+        raise RateLimitedError(f"Alpha Vantage {params.get('function')} rate limited on every key: {message[:200]}")
+
+
+def keys_from_environment():
+    keys = [key.strip() for key in os.environ.get('ALPHA_VANTAGE_API_KEYS', '').split(',')]
+    return [key for key in keys if key] or [os.environ['ALPHA_VANTAGE_API_KEY']]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """The process-wide client, built from the environment on first use.
+
+    ALPHA_VANTAGE_MAX_WAIT_SEC is how long a call may wait for a free key
+    (default 0: fail fast on the API path; ingest functions pass their own).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            pool = KeyPool(
+                keys_from_environment(),
+                int(os.environ.get('ALPHA_VANTAGE_KEY_RPM') or DEFAULT_REQUESTS_PER_MINUTE)
+            )
+            _client = Client(
+                pool,
+                os.environ.get('ALPHA_VANTAGE_URL') or DEFAULT_URL,
+                float(os.environ.get('ALPHA_VANTAGE_MAX_WAIT_SEC') or 0)
+            )
+            logger.info(f"Alpha Vantage client using {len(pool)} key(s) at {pool.requests_per_minute}/min each")
+        return _client
+
+
+def key_count():
+    return len(client().pool)
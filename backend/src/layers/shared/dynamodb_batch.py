@@ -0,0 +1,29 @@
+"""BatchGetItem helper shared by the functions that read many items at once."""
+import time
+
+BATCH_GET_LIMIT = 100
+MAX_ATTEMPTS = 5
+
+
+def batch_get(dynamodb, table, keys, projection=None, names=None):
+    """Items for the keys, read in chunks of 100 and retrying unprocessed keys.
+
+    dynamodb is the boto3 resource (so items come back deserialized); items
+    still unprocessed after MAX_ATTEMPTS are left out, like missing keys.
+    """
+    found = []
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {'Keys': keys[start:start + BATCH_GET_LIMIT]}
+        if projection:
+            request['ProjectionExpression'] = projection
+        if names:
+            request['ExpressionAttributeNames'] = names
+        request_items = {table.table_name: request}
+        for attempt in range(MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            found.extend(response.get('Responses', {}).get(table.table_name, []))
+            request_items = response.get('UnprocessedKeys') or {}
+            if not request_items:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+    return found
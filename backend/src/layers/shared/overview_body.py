@@ -0,0 +1,36 @@
+"""The cached /overview response body with price-derived fields overlaid.
+
+data_api stores the transformed OVERVIEW body (overview_body) beside the
+parsed payload, and price_bars stores price_stats from daily bars. The
+52-week range and trailing returns in price_stats are fresher than the
+OVERVIEW payload's, so whichever function writes one of the two attributes
+rewrites overview_body with the stats overlaid. Cache hits then serve the
+stored string without parsing it.
+"""
+import json
+from decimal import Decimal
+
+def _json_default(value):
+    # DynamoDB returns numbers as Decimal
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def with_price_stats(body, stats):
+    """The body (a JSON string) with the stats' 52-week range and returns in place of the payload's"""
+    if not stats:
+        return body
+    overview = json.loads(body)
+    overview.update({
+        '52_week_high': stats.get('week52_high'),
+        '52_week_low': stats.get('week52_low'),
+        'returns': stats.get('returns') or {},
+        'price_as_of': stats.get('as_of')
+    })
+    return json.dumps(overview, default=_json_default)
+
+
+def has_price_stats(body, stats):
+    """Whether the body already carries these stats (checked on the serialized text, without parsing)"""
+    return f'"price_as_of": {json.dumps(stats.get("as_of"))}' in body
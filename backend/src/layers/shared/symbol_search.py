@@ -0,0 +1,45 @@
+"""Name normalization and prefix-bucket keys for symbol search.
+
+The search index rows are written by change_stream and read by data_api's
+typeahead and fuzzy search, and the client-side snapshot search
+(frontend symbolSnapshot.js normalizeName) mirrors normalize_name, so all of
+them fold names the same way.
+"""
+import re
+import unicodedata
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation so names sort and prefix-match consistently"""
+    folded = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', folded.lower()).strip()
+
+
+def search_index_entries(item):
+    """Build prefix-bucket index rows for a symbol item.
+
+    Each key is written under both its 1- and 2-character bucket so typeahead
+    queries of any length resolve to a single Query with begins_with.
+    """
+    symbol_lower = item.get('symbol_lower') or item['symbol'].lower()
+    name_normalized = normalize_name(item.get('name'))
+    projection = {
+        'symbol': item['symbol'],
+        'symbol_lower': symbol_lower,
+        'exchange': item['exchange'],
+        'name': item.get('name', '')
+    }
+    entries = []
+    for prefix_len in (1, 2):
+        entries.append({
+            **projection,
+            'bucket': f"S#{symbol_lower[:prefix_len]}",
+            'sort_key': f"{symbol_lower}#{item['exchange']}"
+        })
+        if name_normalized:
+            entries.append({
+                **projection,
+                'bucket': f"N#{name_normalized[:prefix_len]}",
+                'sort_key': f"{name_normalized}#{item['symbol']}#{item['exchange']}"
+            })
+    return entries
@@ -0,0 +1,262 @@
+import os
+import io
+import csv
+import json
+import time
+import logging
+from decimal import Decimal
+from urllib.parse import unquote_plus
+
+import boto3
+import numpy as np
+from dynamodb_batch import batch_get
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = boto3.client('s3')
+dynamodb = boto3.resource('dynamodb')
+operating_table = dynamodb.Table(os.environ['MINING_OPERATING_TABLE'])
+company_overview_table = dynamodb.Table(os.environ['COMPANY_OVERVIEW_TABLE'])
+
+# Per-period operating figures kept as parallel lists on each symbol's item
+SERIES_FIELDS = ['aisc', 'production_oz', 'reserves_oz', 'resources_oz']
+# Accepted column spellings in uploaded files
+COLUMN_ALIASES = {
+    'ticker': 'symbol',
+    'aisc_usd_oz': 'aisc',
+    'aisc_per_oz': 'aisc',
+    'production_geo_oz': 'production_oz',
+    'production_aueq_oz': 'production_oz',
+    'production_ageq_oz': 'production_oz',
+    'reserves_geo_oz': 'reserves_oz',
+    'reserves_2p_oz': 'reserves_oz',
+    'resources_geo_oz': 'resources_oz',
+}
+
+
+def _to_number(value):
+    # Cache values are parsed at ingest; operating uploads still arrive as text
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return float(value)
+    if value is None or value == '' or str(value).strip().lower() in ('none', 'null', 'n/a', '-'):
+        return None
+    try:
+        return float(str(value).replace(',', '').replace('$', ''))
+    except ValueError:
+        return None
+
+
+def _to_decimal(value):
+    # DynamoDB rejects floats and NaN
+    if value is None or not np.isfinite(value):
+        return None
+    return Decimal(str(round(float(value), 6)))
+
+
+def _parse_rows(body, key):
+    """Parse an uploaded CSV or JSON file into normalized operating rows"""
+    text = body.decode('utf-8-sig')
+    if key.lower().endswith('.json'):
+        data = json.loads(text)
+        raw_rows = data.get('rows', []) if isinstance(data, dict) else data
+    else:
+        raw_rows = list(csv.DictReader(io.StringIO(text)))
+
+    rows = []
+    for raw in raw_rows:
+        row = {}
+        for column, value in raw.items():
+            name = (column or '').strip().lower()
+            row[COLUMN_ALIASES.get(name, name)] = value
+        symbol = (row.get('symbol') or '').strip().upper()
+        period = (row.get('period') or '').strip().upper()
+        if not symbol or not period:
+            logger.warning(f"Skipping row without symbol/period: {json.dumps(raw)}")
+            continue
+        rows.append({
+            'symbol': symbol,
+            'period': period,
+            'metal': (row.get('metal') or 'gold').strip().lower(),
+            **{field: _to_number(row.get(field)) for field in SERIES_FIELDS}
+        })
+    return rows
+
+
+def _merge_series(existing, rows):
+    """Upsert rows into a symbol's period-sorted series"""
+    by_period = {}
+    for i, period in enumerate(existing.get('periods', [])):
+        by_period[period] = {field: existing.get(field, [])[i] for field in SERIES_FIELDS}
+    for row in rows:
+        current = by_period.setdefault(row['period'], {field: None for field in SERIES_FIELDS})
+        for field in SERIES_FIELDS:
+            if row[field] is not None:
+                current[field] = _to_decimal(row[field])
+    periods = sorted(by_period)
+    return {
+        'periods': periods,
+        **{field: [by_period[period][field] for period in periods] for field in SERIES_FIELDS}
+    }
+
+
+def ingest_rows(rows):
+    """Merge operating rows into the per-symbol store"""
+    by_symbol = {}
+    for row in rows:
+        by_symbol.setdefault(row['symbol'], []).append(row)
+    existing = {
+        item['symbol']: item
+        for item in batch_get(dynamodb, operating_table, [{'symbol': symbol} for symbol in by_symbol])
+    }
+    now = int(time.time())
+    with operating_table.batch_writer() as batch:
+        for symbol, symbol_rows in by_symbol.items():
+            item = existing.get(symbol, {'symbol': symbol})
+            batch.put_item(Item={
+                **item,
+                **_merge_series(item, symbol_rows),
+                'symbol': symbol,
+                'metal': symbol_rows[-1]['metal'],
+                'series_updated': now
+            })
+    logger.info(f"Merged {len(rows)} operating rows for {len(by_symbol)} symbols")
+    return list(by_symbol)
+
+
+def _annual_production(periods, production):
+    """Latest annual production, or the trailing four quarters (annualized if incomplete)"""
+    for i in range(len(periods) - 1, -1, -1):
+        if production[i] is None:
+            continue
+        if '-Q' not in periods[i]:
+            return float(production[i])
+        quarters = [float(value) for period, value in zip(periods[:i + 1], production[:i + 1])
+                    if '-Q' in period and value is not None][-4:]
+        return sum(quarters) * 4 / len(quarters)
+    return None
+
+
+def _latest(values):
+    for value in reversed(values):
+        if value is not None:
+            return float(value)
+    return None
+
+
+def _enterprise_value_inputs(overview_items):
+    """Market cap, total debt and cash per symbol from the data_api cache"""
+    inputs = {}
+    for item in overview_items:
+        overview = item.get('overview_data') or {}
+        balance = ((item.get('financials') or {}).get('balanceSheet') or {}).get('quarterlyReports') or [{}]
+        inputs[item['symbol']] = (
+            _to_number(overview.get('MarketCapitalization')),
+            _to_number(balance[0].get('shortLongTermDebtTotal')),
+            _to_number(balance[0].get('cashAndCashEquivalentsAtCarryingValue'))
+        )
+    return inputs
+
+
+def compute_valuations(gold_price, silver_price, symbols=None):
+    """Recompute per-ounce valuation metrics in one vectorized pass.
+
+    Covers every symbol, or only `symbols` (e.g. those whose market cap or
+    balance sheet just changed); symbols without operating data are skipped.
+    """
+    if symbols is not None:
+        items = batch_get(dynamodb, operating_table, [{'symbol': symbol} for symbol in sorted(set(symbols))])
+    else:
+        items = []
+        scan_params = {}
+        while True:
+            response = operating_table.scan(**scan_params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    if not items:
+        return 0
+
+    symbols = [item['symbol'] for item in items]
+    overview_items = batch_get(
+        dynamodb, company_overview_table,
+        [{'symbol': symbol} for symbol in symbols],
+        # Only the market cap and the most recent balance sheet, not the full statements
+        projection='symbol, overview_data.MarketCapitalization, financials.balanceSheet.quarterlyReports[0]'
+    )
+    ev_inputs = _enterprise_value_inputs(overview_items)
+
+    def _column(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    aisc = _column([_latest(item.get('aisc', [])) for item in items])
+    production = _column([_annual_production(item.get('periods', []), item.get('production_oz', [])) for item in items])
+    reserves = _column([_latest(item.get('reserves_oz', [])) for item in items])
+    market_cap = _column([ev_inputs.get(symbol, (None, None, None))[0] for symbol in symbols])
+    debt = np.nan_to_num(_column([ev_inputs.get(symbol, (None, None, None))[1] for symbol in symbols]))
+    cash = np.nan_to_num(_column([ev_inputs.get(symbol, (None, None, None))[2] for symbol in symbols]))
+    metal_price = np.where(
+        np.array([item.get('metal') == 'silver' for item in items]),
+        silver_price,
+        gold_price
+    )
+
+    enterprise_value = market_cap + debt - cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valuation = {
+            'enterprise_value': enterprise_value,
+            'ev_per_reserve_oz': np.where(reserves > 0, enterprise_value / reserves, np.nan),
+            'market_cap_per_reserve_oz': np.where(reserves > 0, market_cap / reserves, np.nan),
+            'ev_per_production_oz': np.where(production > 0, enterprise_value / production, np.nan),
+            'aisc_margin': metal_price - aisc,
+            'aisc_margin_pct': (metal_price - aisc) / metal_price,
+            'annual_production_oz': production,
+            'metal_price': metal_price,
+        }
+
+    now = int(time.time())
+    for row, symbol in enumerate(symbols):
+        operating_table.update_item(
+            Key={'symbol': symbol},
+            UpdateExpression='SET valuation = :v, valuation_updated = :t',
+            ExpressionAttributeValues={
+                ':v': {name: _to_decimal(values[row]) for name, values in valuation.items()},
+                ':t': now
+            }
+        )
+    logger.info(f"Computed valuations for {len(symbols)} symbols at gold {gold_price}, silver {silver_price}")
+    return len(symbols)
+
+
+def lambda_handler(event, context):
+    try:
+        gold_price = float(event.get('gold_price') or os.environ['GOLD_PRICE_USD'])
+        silver_price = float(event.get('silver_price') or os.environ['SILVER_PRICE_USD'])
+
+        # S3 upload notifications carry one record per uploaded file
+        files = [
+            (record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key']))
+            for record in event.get('Records', [])
+        ]
+        if 'bucket' in event and 'key' in event:
+            files.append((event['bucket'], event['key']))
+
+        ingested = []
+        for bucket, key in files:
+            body = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+            ingested.extend(ingest_rows(_parse_rows(body, key)))
+
+        # change_stream passes just the symbols whose valuation inputs changed
+        count = compute_valuations(gold_price, silver_price, event.get('symbols'))
+        return {
+            'statusCode': 200,
+            'body': f'Ingested {len(files)} files ({len(set(ingested))} symbols), valued {count} symbols'
+        }
+
+    except Exception as e:
+        logger.error(f"Mining metrics ingest failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Mining metrics ingest failed: {str(e)}'
+        }
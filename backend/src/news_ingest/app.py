@@ -0,0 +1,183 @@
+import os
+import time
+import hashlib
+import logging
+
+import boto3
+import alpha_vantage
+from dynamodb_batch import batch_get
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+symbols_table = dynamodb.Table(os.environ['SYMBOLS_TABLE'])
+news_table = dynamodb.Table(os.environ['NEWS_TABLE'])
+
+# First poll for a ticker looks back this far
+INITIAL_LOOKBACK_SEC = 7 * 24 * 3600
+SUMMARY_MAX_CHARS = 600
+# How long a call may wait for a pooled key to come off its rate window
+KEY_WAIT_SEC = 20
+# A ticker whose fetch failed waits 1h, 2h, 4h, ... up to a week before it is due again
+FAILURE_BACKOFF_SEC = 3600
+FAILURE_BACKOFF_MAX_SEC = 7 * 24 * 3600
+
+
+def _url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+
+def _universe(event):
+    if event.get('symbols'):
+        return [symbol.upper() for symbol in event['symbols']]
+    symbols = set()
+    scan_params = {'ProjectionExpression': 'symbol'}
+    while True:
+        response = symbols_table.scan(**scan_params)
+        symbols.update(item['symbol'] for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return sorted(symbols)
+
+
+def _cursors(symbols):
+    """Cursor item per polled ticker: time_from (YYYYMMDDTHHMM, absent until a fetch
+    succeeds), checked (epoch of the last attempt) and failures (consecutive)"""
+    items = batch_get(dynamodb, news_table, [{'pk': f"CURSOR#{symbol}", 'sk': 'CURSOR'} for symbol in symbols])
+    return {item['pk'][len('CURSOR#'):]: item for item in items}
+
+
+def _due_at(cursor):
+    """When a ticker is next due: never-polled first, then least recently checked,
+    with failing tickers pushed back so they can't hold the front of the queue"""
+    if not cursor:
+        return 0
+    failures = int(cursor.get('failures', 0))
+    backoff = min(FAILURE_BACKOFF_SEC * 2 ** (failures - 1), FAILURE_BACKOFF_MAX_SEC) if failures else 0
+    # Cursors written before checked was recorded sort by their time_from, oldest first
+    return int(cursor.get('checked', 0)) + backoff
+
+
+def _existing_articles(hashes):
+    items = batch_get(dynamodb, news_table, [{'pk': f"ARTICLE#{url_hash}", 'sk': 'ARTICLE'} for url_hash in hashes], projection='pk')
+    return {item['pk'][len('ARTICLE#'):] for item in items}
+
+
+def _fetch_news(symbol, time_from):
+    # Alpha Vantage ANDs multiple tickers (articles mentioning all of them), so
+    # each call covers one ticker; cross-mentions are indexed from ticker_sentiment
+    params = {
+        'function': 'NEWS_SENTIMENT',
+        'tickers': symbol,
+        'time_from': time_from,
+        'sort': 'EARLIEST',
+        'limit': 1000
+    }
+    response = alpha_vantage.client().request(params, timeout=15, max_wait=KEY_WAIT_SEC)
+    data = response.json()
+    if 'feed' not in data:
+        raise RuntimeError(data.get('Information') or data.get('Note') or data.get('Error Message') or 'No feed in response')
+    return data['feed']
+
+
+def _article_item(url_hash, article):
+    # Scores are kept as strings like the index entries' (DynamoDB rejects floats); 0 is a real neutral score
+    score = article.get('overall_sentiment_score')
+    return {
+        'pk': f"ARTICLE#{url_hash}",
+        'sk': 'ARTICLE',
+        'url': article['url'],
+        'title': article.get('title', ''),
+        'summary': (article.get('summary') or '')[:SUMMARY_MAX_CHARS],
+        'source': article.get('source', ''),
+        'banner_image': article.get('banner_image') or '',
+        'time_published': article.get('time_published', ''),
+        'sentiment_label': article.get('overall_sentiment_label', ''),
+        'sentiment_score': str(score) if score is not None else ''
+    }
+
+
+def lambda_handler(event, context):
+    try:
+        # Budgets are per key
+        call_budget = int(event.get('call_budget') or int(os.environ.get('NEWS_CALL_BUDGET', 10)) * alpha_vantage.key_count())
+        universe = _universe(event)
+        universe_set = set(universe)
+        cursors = _cursors(universe)
+
+        # Never-polled tickers first, then the least recently checked, so every
+        # ticker is eventually visited even when the budget covers a fraction per run
+        now = int(time.time())
+        default_from = time.strftime('%Y%m%dT%H%M', time.gmtime(now - INITIAL_LOOKBACK_SEC))
+        queue = sorted(
+            universe, key=lambda symbol: (_due_at(cursors.get(symbol)), cursors.get(symbol, {}).get('time_from', ''))
+        )[:call_budget]
+
+        articles = {}
+        index_entries = {}
+        new_cursors = {}
+        polled = 0
+        for symbol in queue:
+            cursor = cursors.get(symbol, {})
+            time_from = cursor.get('time_from', default_from)
+            try:
+                feed = _fetch_news(symbol, time_from)
+            except Exception as e:
+                logger.error(f"News fetch failed for {symbol}: {str(e)}")
+                # Keep the time_from cursor but rotate the ticker back with a growing backoff
+                new_cursors[symbol] = {
+                    **({'time_from': cursor['time_from']} if 'time_from' in cursor else {}),
+                    'checked': now,
+                    'failures': int(cursor.get('failures', 0)) + 1
+                }
+                continue
+            polled += 1
+            latest = time_from
+            for article in feed:
+                if not article.get('url'):
+                    continue
+                url_hash = _url_hash(article['url'])
+                published = article.get('time_published', '')
+                articles.setdefault(url_hash, article)
+                mentioned = {entry.get('ticker') for entry in article.get('ticker_sentiment', [])}
+                for ticker in (mentioned & universe_set) | {symbol}:
+                    index_entries[(ticker, published, url_hash)] = article
+                latest = max(latest, published[:13])
+            # The same minute is re-requested next time; dedup absorbs the overlap
+            new_cursors[symbol] = {'time_from': latest, 'checked': now, 'failures': 0}
+
+        existing = _existing_articles(list(articles))
+        with news_table.batch_writer(overwrite_by_pkeys=['pk', 'sk']) as batch:
+            for url_hash, article in articles.items():
+                if url_hash not in existing:
+                    batch.put_item(Item=_article_item(url_hash, article))
+            for (ticker, published, url_hash), article in index_entries.items():
+                relevance = next(
+                    (entry for entry in article.get('ticker_sentiment', []) if entry.get('ticker') == ticker), {}
+                )
+                batch.put_item(Item={
+                    'pk': f"TICKER#{ticker}",
+                    'sk': f"{published}#{url_hash}",
+                    'article': url_hash,
+                    'relevance': str(relevance.get('relevance_score', '')),
+                    'sentiment': str(relevance.get('ticker_sentiment_score', ''))
+                })
+            for symbol, cursor in new_cursors.items():
+                batch.put_item(Item={'pk': f"CURSOR#{symbol}", 'sk': 'CURSOR', **cursor})
+
+        new_count = len(set(articles) - existing)
+        failed = len(new_cursors) - polled
+        logger.info(f"Polled {polled} tickers ({failed} failed): {new_count} new articles, {len(index_entries)} index entries")
+        return {
+            'statusCode': 200,
+            'body': f'Polled {polled} tickers, stored {new_count} new articles'
+        }
+
+    except Exception as e:
+        logger.error(f"News ingest failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'News ingest failed: {str(e)}'
+        }
@@ -0,0 +1,213 @@
+import os
+import time
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+import boto3
+import alpha_vantage
+from botocore.exceptions import ClientError
+from dynamodb_batch import batch_get
+from overview_body import with_price_stats
+
+from window_stats import WEEK52_DAYS, SlidingExtremes, trailing_returns
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+price_bars_table = dynamodb.Table(os.environ['PRICE_BARS_TABLE'])
+company_overview_table = dynamodb.Table(os.environ['COMPANY_OVERVIEW_TABLE'])
+
+# Bars kept per symbol: enough for the 52-week window and the 1Y return base
+RETAIN_DAYS = 400
+# TIME_SERIES_DAILY compact returns the latest 100 bars
+COMPACT_BARS = 100
+# How long a call may wait for a pooled key to come off its rate window
+KEY_WAIT_SEC = 20
+# Tries at rewriting overview_body when a concurrent overview refresh replaces it
+BODY_WRITE_ATTEMPTS = 3
+
+
+def _to_decimal(value):
+    return Decimal(str(round(float(value), 6))) if value is not None else None
+
+
+def _fetch_daily_bars(symbol, full):
+    """Daily bars ascending as (date, high, low, close)"""
+    params = {
+        'function': 'TIME_SERIES_DAILY',
+        'symbol': symbol,
+        'outputsize': 'full' if full else 'compact'
+    }
+    response = alpha_vantage.client().request(params, timeout=30, max_wait=KEY_WAIT_SEC)
+    data = response.json()
+    series = data.get('Time Series (Daily)')
+    if not series:
+        raise RuntimeError(data.get('Information') or data.get('Note') or data.get('Error Message') or 'No time series in response')
+    return [
+        (day, float(bar['2. high']), float(bar['3. low']), float(bar['4. close']))
+        for day, bar in sorted(series.items())
+    ]
+
+
+def append_bars(item, bars):
+    """Append bars newer than the stored series and update the precomputed stats.
+
+    The 52-week extremes resume from the stored deques, so each new bar costs
+    O(1) amortized however long the stored series is.
+    """
+    dates = list(item.get('dates', []))
+    closes = [float(value) for value in item.get('closes', [])]
+    extremes = SlidingExtremes(WEEK52_DAYS, item.get('max_deque', []), item.get('min_deque', []))
+    last_date = dates[-1] if dates else ''
+    appended = 0
+    for day, high, low, close in bars:
+        if day <= last_date:
+            continue
+        extremes.push(day, high, low)
+        dates.append(day)
+        closes.append(close)
+        appended += 1
+    if not dates:
+        return item, 0
+
+    cutoff = (date.fromisoformat(dates[-1]) - timedelta(days=RETAIN_DAYS)).isoformat()
+    start = next((i for i, day in enumerate(dates) if day > cutoff), len(dates))
+    dates, closes = dates[start:], closes[start:]
+
+    high_date, high = extremes.high
+    low_date, low = extremes.low
+    stats = {
+        'as_of': dates[-1],
+        'last_close': _to_decimal(closes[-1]),
+        'week52_high': _to_decimal(high),
+        'week52_high_date': high_date,
+        'week52_low': _to_decimal(low),
+        'week52_low_date': low_date,
+        'returns': {label: _to_decimal(value) for label, value in trailing_returns(dates, closes).items()}
+    }
+    return {
+        'symbol': item['symbol'],
+        'dates': dates,
+        'closes': [_to_decimal(close) for close in closes],
+        'max_deque': [[day, _to_decimal(value)] for day, value in extremes.max_deque],
+        'min_deque': [[day, _to_decimal(value)] for day, value in extremes.min_deque],
+        'stats': stats,
+        'bars_updated': int(time.time())
+    }, appended
+
+
+def _store_price_stats(symbol, stats, body):
+    """SET price_stats on the cache item, with the cached overview_body rewritten to match.
+
+    The body is replaced only if it is still the one the stats were overlaid
+    on; a refresh that wrote a new body in between is re-read and overlaid.
+    """
+    for _ in range(BODY_WRITE_ATTEMPTS):
+        if body is None:
+            # Nothing cached to rewrite; data_api overlays the stats when it builds the body
+            company_overview_table.update_item(
+                Key={'symbol': symbol},
+                UpdateExpression='SET price_stats = :s',
+                ExpressionAttributeValues={':s': stats}
+            )
+            return
+        try:
+            company_overview_table.update_item(
+                Key={'symbol': symbol},
+                UpdateExpression='SET price_stats = :s, overview_body = :b',
+                ConditionExpression='overview_body = :seen',
+                ExpressionAttributeValues={':s': stats, ':b': with_price_stats(body, stats), ':seen': body}
+            )
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+        item = company_overview_table.get_item(
+            Key={'symbol': symbol}, ProjectionExpression='overview_body', ConsistentRead=True
+        ).get('Item') or {}
+        body = item.get('overview_body')
+    logger.warning(f"overview_body for {symbol} kept changing; stored price_stats only")
+    company_overview_table.update_item(
+        Key={'symbol': symbol},
+        UpdateExpression='SET price_stats = :s',
+        ExpressionAttributeValues={':s': stats}
+    )
+
+
+def _universe(event):
+    """Symbols to keep bars for: those in the data_api cache, plus any passed in"""
+    symbols = {symbol.upper() for symbol in event.get('symbols', [])}
+    if not event.get('symbols_only'):
+        scan_params = {'ProjectionExpression': 'symbol'}
+        while True:
+            response = company_overview_table.scan(**scan_params)
+            symbols.update(item['symbol'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return sorted(symbols)
+
+
+def lambda_handler(event, context):
+    try:
+        # Budgets are per key
+        call_budget = int(event.get('call_budget') or int(os.environ.get('PRICE_CALL_BUDGET', 25)) * alpha_vantage.key_count())
+        symbols = _universe(event)
+
+        stored = {symbol: {'symbol': symbol} for symbol in symbols}
+        for item in batch_get(
+            dynamodb, price_bars_table,
+            [{'symbol': symbol} for symbol in symbols],
+            projection='symbol, dates, closes, max_deque, min_deque'
+        ):
+            stored[item['symbol']] = item
+
+        # Least recently updated first, so every symbol is covered across runs
+        queue = sorted(symbols, key=lambda symbol: (stored[symbol].get('dates') or [''])[-1])[:call_budget]
+        bodies = {
+            item['symbol']: item['overview_body']
+            for item in batch_get(
+                dynamodb, company_overview_table,
+                [{'symbol': symbol} for symbol in queue],
+                projection='symbol, overview_body'
+            )
+            if 'overview_body' in item
+        }
+        updated = []
+        for symbol in queue:
+            if context and context.get_remaining_time_in_millis() < 5000:
+                logger.info(f"Stopping price update at {symbol}: invocation almost out of time")
+                break
+            item = stored[symbol]
+            last_date = (item.get('dates') or [None])[-1]
+            # Backfill a year on first sight or after a gap compact can't cover
+            full = not last_date or (date.today() - date.fromisoformat(last_date)).days > COMPACT_BARS
+            try:
+                bars = _fetch_daily_bars(symbol, full)
+            except Exception as e:
+                logger.error(f"Daily bars fetch failed for {symbol}: {str(e)}")
+                continue
+            if full:
+                cutoff = (date.today() - timedelta(days=RETAIN_DAYS)).isoformat()
+                bars = [bar for bar in bars if bar[0] > cutoff]
+            new_item, appended = append_bars(item, bars)
+            if not appended:
+                continue
+            price_bars_table.put_item(Item=new_item)
+            _store_price_stats(symbol, new_item['stats'], bodies.get(symbol))
+            updated.append(symbol)
+
+        logger.info(f"Appended daily bars for {len(updated)} of {len(symbols)} symbols")
+        return {
+            'statusCode': 200,
+            'body': f'Updated price stats for {len(updated)} symbols'
+        }
+
+    except Exception as e:
+        logger.error(f"Price bar update failed: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': f'Price bar update failed: {str(e)}'
+        }
@@ -0,0 +1,81 @@
+"""Incremental price statistics over a stored daily bar series.
+
+SlidingExtremes keeps the trailing-window high and low in two monotonic
+deques: each bar is pushed and evicted at most once, so appending a bar is
+O(1) amortized and the current extremes are read from the deque fronts.
+The deques are small and serializable, so they are stored with the series
+and resumed on the next append instead of rescanning a year of bars.
+"""
+import calendar
+from bisect import bisect_right
+from collections import deque
+from datetime import date, timedelta
+
+WEEK52_DAYS = 365
+# Trailing return horizons in calendar months
+RETURN_MONTHS = {'1M': 1, '3M': 3, '1Y': 12}
+
+
+def _months_before(day, months):
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    month += 1
+    # Clamp e.g. May 31 -> Feb 28
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+class SlidingExtremes:
+    """High and low over the trailing `window_days` calendar days"""
+
+    def __init__(self, window_days=WEEK52_DAYS, max_deque=(), min_deque=()):
+        self.window_days = window_days
+        # (date, value) pairs; values strictly decreasing / increasing front to back
+        self.max_deque = deque((str(d), float(v)) for d, v in max_deque)
+        self.min_deque = deque((str(d), float(v)) for d, v in min_deque)
+
+    def push(self, day, high, low):
+        """Append one bar (days must be pushed in increasing order)"""
+        while self.max_deque and self.max_deque[-1][1] <= high:
+            self.max_deque.pop()
+        self.max_deque.append((day, high))
+        while self.min_deque and self.min_deque[-1][1] >= low:
+            self.min_deque.pop()
+        self.min_deque.append((day, low))
+        cutoff = (date.fromisoformat(day) - timedelta(days=self.window_days)).isoformat()
+        while self.max_deque[0][0] <= cutoff:
+            self.max_deque.popleft()
+        while self.min_deque[0][0] <= cutoff:
+            self.min_deque.popleft()
+
+    @property
+    def high(self):
+        return self.max_deque[0] if self.max_deque else (None, None)
+
+    @property
+    def low(self):
+        return self.min_deque[0] if self.min_deque else (None, None)
+
+
+def close_on_or_before(dates, closes, day):
+    """Last close at or before day (dates ascending), or None"""
+    position = bisect_right(dates, day)
+    return closes[position - 1] if position else None
+
+
+def trailing_returns(dates, closes):
+    """1M/3M/YTD/1Y close-to-close returns as of the last bar"""
+    if not dates:
+        return {}
+    last_day = date.fromisoformat(dates[-1])
+    last_close = closes[-1]
+    bases = {label: _months_before(last_day, months).isoformat() for label, months in RETURN_MONTHS.items()}
+    # YTD is measured from the previous year's final close
+    bases['YTD'] = date(last_day.year - 1, 12, 31).isoformat()
+    returns = {}
+    for label, base_day in bases.items():
+        # A base before the first stored bar would silently shorten the horizon
+        if base_day < dates[0]:
+            returns[label] = None
+            continue
+        base = close_on_or_before(dates, closes, base_day)
+        returns[label] = (last_close / base - 1) if base else None
+    return returns
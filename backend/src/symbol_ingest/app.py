@@ -1,6 +1,6 @@
 import os
 import boto3
-import requests
+import alpha_vantage
 import json
 import logging
 from datetime import datetime
@@ -10,10 +10,13 @@ logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['SYMBOLS_TABLE'])
+lambda_client = boto3.client('lambda')
+
+# How long a call may wait for a pooled key to come off its rate window
+KEY_WAIT_SEC = 20
 
 def lambda_handler(event, context):
     try:
-        API_KEY = os.environ['ALPHA_VANTAGE_API_KEY']
         items_to_write = []
         
         # Get symbols from event or default to mining stocks
@@ -28,8 +31,7 @@ def lambda_handler(event, context):
         
         for symbol in symbols:
             # Get company overview
-            overview_url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={API_KEY}"
-            response = requests.get(overview_url)
+            response = alpha_vantage.client().request({'function': 'OVERVIEW', 'symbol': symbol}, max_wait=KEY_WAIT_SEC)
             data = response.json()
             
             # Skip if no data
@@ -50,7 +52,8 @@ def lambda_handler(event, context):
             }
             items_to_write.append(item)
         
-        # Write items to DynamoDB
+        # Write items to DynamoDB. The prefix search index and the symbol snapshot
+        # are derived from the table's stream by change_stream
         with table.batch_writer() as batch:
             for item in items_to_write:
                 try:
@@ -61,6 +64,21 @@ def lambda_handler(event, context):
                     logger.error(f"Error details: {str(e)}")
                     continue
         
+        # Kick off the cache warming stage in data_api once the universe is fresh
+        warm_function = os.environ.get('CACHE_WARM_FUNCTION')
+        if warm_function:
+            try:
+                lambda_client.invoke(
+                    FunctionName=warm_function,
+                    InvocationType='Event',
+                    Payload=json.dumps({
+                        'action': 'warm_cache',
+                        'symbols': [item['symbol'] for item in items_to_write]
+                    })
+                )
+            except Exception as e:
+                logger.error(f"Failed to trigger cache warm: {str(e)}")
+        
         return {
             'statusCode': 200,
             'body': f'Successfully ingested {len(items_to_write)} stocks'
@@ -0,0 +1,45 @@
+"""Shared setup for the backend unit tests.
+
+Every function under src/ is its own deployment package with a top-level
+app.py. The function directories and the SharedLayer go on sys.path for
+their other (uniquely named) modules, and each app is loaded by path under
+a per-function name through the load_app fixture. Handlers read their table
+names at import; the placeholders below are never called unless a test
+mocks AWS (moto) itself.
+"""
+import os
+import sys
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+
+for _name in ('SYMBOLS_TABLE', 'METRICS_TABLE', 'COMPANY_OVERVIEW_TABLE', 'SEARCH_INDEX_TABLE', 'POPULARITY_TABLE',
+              'MINING_OPERATING_TABLE', 'NEWS_TABLE', 'WATCHLIST_TABLE', 'SENSITIVITY_TABLE', 'CORPORATE_EVENTS_TABLE',
+              'CACHE_CONTROL_TABLE', 'PRICE_BARS_TABLE', 'COMMODITY_SERIES_TABLE', 'SNAPSHOT_BUCKET'):
+    os.environ.setdefault(_name, f"test-{_name.lower().replace('_', '-')}")
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('ALPHA_VANTAGE_API_KEY', 'test-key')
+
+for _directory in [SRC / 'layers' / 'shared', *sorted(path.parent for path in SRC.glob('*/app.py'))]:
+    sys.path.insert(0, str(_directory))
+
+
+def _load_app(function):
+    name = f"{function}_app"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, SRC / function / 'app.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+@pytest.fixture(scope='session')
+def load_app():
+    """load_app('data_api') -> that function's app module"""
+    return _load_app
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+import requests
+
+import alpha_vantage
+from alpha_vantage import ERROR, OK, RATE_LIMITED, Client, KeyPool, RateLimitedError, rate_limit_message
+
+DAILY = 'Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day.'
+BURST = 'Please consider spreading out your free API requests more sparingly (1 request per second).'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.content = json.dumps(payload).encode()
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _ready_in(pool):
+    return {row['key']: row['ready_in_sec'] for row in pool.stats()}
+
+
+def test_keys_are_deduplicated_and_required(clock):
+    assert len(KeyPool(['k1', 'k2', 'k1', ''], clock=clock)) == 2
+    with pytest.raises(ValueError):
+        KeyPool(['', ''])
+
+
+def test_calls_go_to_the_least_loaded_key(clock):
+    pool = KeyPool(['key-0001', 'key-0002'], requests_per_minute=2, clock=clock)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first, second} == {'key-0001', 'key-0002'}
+    pool.release(first, OK)
+    clock.now += 1
+    # Both keys have one call in the window; the one used longest ago goes next
+    assert pool.acquire() == first
+    assert pool.acquire() == second
+    with pytest.raises(RateLimitedError):
+        pool.acquire()
+    # The window slides: the first two calls age out after a minute
+    clock.now += 59.5
+    assert {pool.acquire(), pool.acquire()} == {'key-0001', 'key-0002'}
+
+
+def test_rate_limits_cool_down_with_backoff(clock):
+    pool = KeyPool(['key-0001', 'key-0002'], clock=clock)
+    key = pool.acquire()
+    pool.release(key, RATE_LIMITED, BURST)
+    assert _ready_in(pool)['...0001'] == 15
+    other = pool.acquire()
+    assert other == 'key-0002'
+    pool.release(other, OK)
+
+    clock.now += 15
+    pool.release(pool.acquire(), RATE_LIMITED, BURST)  # key-0001 again: second strike doubles the rest
+    assert _ready_in(pool)['...0001'] == 30
+    pool.release(pool.acquire(), OK)
+
+    clock.now += 30
+    assert pool.acquire() == 'key-0001'
+    pool.release('key-0001', OK)
+    # A success clears the strikes
+    pool.release(pool.acquire(), RATE_LIMITED, BURST)
+    assert max(_ready_in(pool).values()) == 15
+
+
+def test_daily_limit_rests_until_midnight_utc(clock, monkeypatch):
+    monkeypatch.setattr(alpha_vantage.time, 'time', lambda: 20 * 86400 + 22 * 3600)
+    pool = KeyPool(['key-0001'], clock=clock)
+    pool.release(pool.acquire(), RATE_LIMITED, DAILY)
+    assert _ready_in(pool)['...0001'] == 2 * 3600
+    with pytest.raises(RateLimitedError):
+        pool.acquire(max_wait=60)
+
+
+def test_repeated_errors_rest_a_key(clock):
+    pool = KeyPool(['key-0001'], clock=clock)
+    for _ in range(alpha_vantage.ERROR_STRIKES - 1):
+        pool.release(pool.acquire(), ERROR)
+    assert _ready_in(pool)['...0001'] == 0
+    pool.release(pool.acquire(), ERROR)
+    assert _ready_in(pool)['...0001'] == alpha_vantage.ERROR_COOLDOWN_SEC
+    assert pool.stats()[0]['errors'] == alpha_vantage.ERROR_STRIKES
+
+
+def test_rate_limit_message_detection():
+    assert rate_limit_message(FakeResponse({'Information': BURST})) == BURST
+    assert rate_limit_message(FakeResponse({'Note': DAILY})) == DAILY
+    assert rate_limit_message(FakeResponse({'Information': 'The **demo** API key is for demo purposes only.'})) is None
+    assert rate_limit_message(FakeResponse({'Information': BURST}, status_code=503)) is None
+    assert rate_limit_message(FakeResponse(['rate limit'])) is None
+    assert rate_limit_message(FakeResponse({'Symbol': 'AEM', 'Description': 'rate limit ' * 300})) is None
+
+
+def test_client_retries_a_rate_limited_call_on_another_key(clock, monkeypatch):
+    calls = []
+
+    def fake_get(url, params, timeout):
+        calls.append(params['apikey'])
+        return FakeResponse({'Information': BURST} if params['apikey'] == 'key-0001' else {'Symbol': 'AEM'})
+
+    monkeypatch.setattr(alpha_vantage.requests, 'get', fake_get)
+    client = Client(KeyPool(['key-0001', 'key-0002'], clock=clock))
+    assert client.request({'function': 'OVERVIEW', 'symbol': 'AEM'}).json() == {'Symbol': 'AEM'}
+    assert calls == ['key-0001', 'key-0002']
+    # key-0001 is resting, so the next call goes straight to key-0002
+    client.request({'function': 'OVERVIEW', 'symbol': 'NEM'})
+    assert calls[-1] == 'key-0002'
+
+
+def test_client_gives_up_when_every_key_is_limited(clock, monkeypatch):
+    monkeypatch.setattr(alpha_vantage.requests, 'get', lambda url, params, timeout: FakeResponse({'Note': BURST}))
+    client = Client(KeyPool(['key-0001', 'key-0002'], clock=clock))
+    with pytest.raises(RateLimitedError):
+        client.request({'function': 'OVERVIEW', 'symbol': 'AEM'})
+
+
+def test_client_releases_the_key_on_transport_errors(clock, monkeypatch):
+    def fail(url, params, timeout):
+        raise requests.exceptions.ConnectionError('reset')
+
+    monkeypatch.setattr(alpha_vantage.requests, 'get', fail)
+    pool = KeyPool(['key-0001'], clock=clock)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        Client(pool).request({'function': 'OVERVIEW'})
+    assert pool.stats()[0]['in_flight'] == 0 and pool.stats()[0]['errors'] == 1
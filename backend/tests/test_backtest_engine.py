@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import engine
+
+NAN = np.nan
+
+
+def _dates(count, start='2026-01-02'):
+    first = date.fromisoformat(start)
+    return [(first + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+def _financials(reported, shares, equity, net_income, current_assets=300, current_liabilities=100):
+    balance = {
+        'fiscalDateEnding': '2025-12-31', 'reportedDate': reported, 'commonStockSharesOutstanding': shares,
+        'totalShareholderEquity': equity, 'totalCurrentAssets': current_assets,
+        'totalCurrentLiabilities': current_liabilities, 'totalLiabilities': 150, 'longTermDebt': 50
+    }
+    # Four quarters of net income, all published together, so TTM is available from `reported`
+    income = [
+        {'fiscalDateEnding': f"2025-{month:02d}-28", 'reportedDate': reported, 'netIncome': net_income / 4,
+         'totalRevenue': 1000}
+        for month in (3, 6, 9, 12)
+    ]
+    return {'balanceSheet': {'quarterlyReports': [balance]}, 'incomeStatement': {'quarterlyReports': income}}
+
+
+def _panel():
+    dates = _dates(10)
+    prices = [
+        {'symbol': 'CHEAP', 'dates': dates, 'closes': [10 + i for i in range(10)]},
+        {'symbol': 'DEAR', 'dates': dates, 'closes': [100] * 10},
+        # Missing the first two days and halted on the sixth
+        {'symbol': 'LATE', 'dates': dates[2:5] + dates[6:], 'closes': [20, 21, 22, 24, 25, 26, 27]},
+    ]
+    statements = [
+        {'symbol': 'CHEAP', 'financials': _financials(dates[3], shares=10, equity=200, net_income=40)},
+        {'symbol': 'DEAR', 'financials': _financials(dates[0], shares=10, equity=100, net_income=10)},
+        {'symbol': 'LATE', 'financials': _financials(dates[0], shares=10, equity=400, net_income=30)},
+    ]
+    return engine.Panel(prices, statements)
+
+
+def test_forward_fill_carries_values_down_each_column():
+    values = np.array([
+        [NAN, 1.0],
+        [2.0, NAN],
+        [NAN, NAN],
+        [3.0, 4.0],
+    ])
+    np.testing.assert_array_equal(engine._forward_fill(values), np.array([
+        [NAN, 1.0],
+        [2.0, 1.0],
+        [2.0, 1.0],
+        [3.0, 4.0],
+    ]))
+
+
+def test_trailing_sums_need_four_quarters():
+    np.testing.assert_array_equal(engine._trailing_sums([1, 2, 3, 4, 5, NAN, 7, 8, 9]),
+                                  [NAN, NAN, NAN, 10, 14, NAN, NAN, NAN, NAN])
+    np.testing.assert_array_equal(engine._trailing_sums([1, 2, 3]), [NAN, NAN, NAN])
+    assert engine._trailing_sums([]).shape == (0,)
+
+
+def test_panel_is_point_in_time_and_fills_prices():
+    panel = _panel()
+    late = panel.symbols.index('LATE')
+    assert np.isnan(panel.closes[:2, late]).all()
+    assert panel.closes[5, late] == 22
+    cheap = panel.symbols.index('CHEAP')
+    # CHEAP's reports were not public before day 3
+    assert np.isnan(panel.metrics['pe'][:3, cheap]).all()
+    assert panel.metrics['pe'][3, cheap] == pytest.approx(13 * 10 / 40)
+    assert panel.metrics['pb'][3, cheap] == pytest.approx(13 * 10 / 200)
+    np.testing.assert_allclose(panel.growth[:, cheap], [(10 + i) / 10 for i in range(10)])
+
+
+def test_select_applies_screens_and_top_n():
+    panel = _panel()
+    row = panel.row('2026-01-06')
+    params = {**engine.DEFAULT_PARAMS, 'max_pb': None, 'max_pe_pb': None}
+    chosen = lambda mask: [symbol for symbol, keep in zip(panel.symbols, mask) if keep]
+    # DEAR fails max_pe (100); LATE (P/E 7.3) and CHEAP (P/E 3.5) pass
+    assert chosen(engine.select(panel, row, params)) == ['CHEAP', 'LATE']
+    assert chosen(engine.select(panel, row, {**params, 'top_n': 1})) == ['CHEAP']
+    assert chosen(engine.select(panel, row, {**params, 'top_n': 1, 'rank_by': 'pb'})) == ['LATE']
+    # Before CHEAP reported and before LATE traded, nothing has the figures to pass
+    assert chosen(engine.select(panel, 0, params)) == []
+
+
+def test_run_holds_the_selection_between_rebalances():
+    panel = _panel()
+    params = {'max_pe': 5, 'max_pb': None, 'max_pe_pb': None, 'rebalance_days': 3, 'cost_bps': 0}
+    result = engine.run(panel, params, start='2026-01-05')
+    # CHEAP is the only pick from its report date on, so equity tracks its price
+    assert result['start'] == '2026-01-05' and result['end'] == '2026-01-11'
+    assert result['total_return'] == pytest.approx(19 / 13 - 1)
+    assert result['rebalances'] == 2 and result['avg_holdings'] == 1
+    assert result['curve'][-1][1] == pytest.approx(19 / 13)
+    assert result['max_drawdown'] == 0
+
+    costly = engine.run(panel, {**params, 'cost_bps': 100}, start='2026-01-05')
+    # Entering costs 1% of the full position; holding the same pick costs nothing more
+    assert costly['total_return'] == pytest.approx(0.99 * 19 / 13 - 1)
+
+
+def test_run_rejects_bad_parameters():
+    panel = _panel()
+    with pytest.raises(ValueError):
+        engine.run(panel, {'rank_by': 'momentum'})
+    with pytest.raises(ValueError):
+        engine.run(panel, {}, start='2026-01-10')
+    with pytest.raises(ValueError):
+        engine.parameter_grid({'max_pe': [10, 15], 'leverage': 2})
+    grid = engine.parameter_grid({'max_pe': [10, 15], 'top_n': 5})
+    assert [(params['max_pe'], params['top_n']) for params in grid] == [(10, 5), (15, 5)]
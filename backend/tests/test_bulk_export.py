@@ -0,0 +1,64 @@
+import io
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+import pytest
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app('bulk_export')
+
+
+def test_flatten_nested_maps(app):
+    item = {
+        'symbol': 'AEM',
+        'overview_data': {'PERatio': Decimal('12.5'), 'Name': 'Agnico'},
+        'price_stats': {'returns': {'1M': Decimal('0.1')}},
+        'tags': ['gold']
+    }
+    assert app._flatten(item, ['overview_data', 'price_stats']) == {
+        'symbol': 'AEM', 'overview_data.PERatio': 12.5, 'overview_data.Name': 'Agnico',
+        'price_stats.returns.1M': 0.1, 'tags': '["gold"]'
+    }
+
+
+def test_spool_collects_late_columns_and_mixed_types(app):
+    rows = [{'symbol': f"S{i}", 'aisc': 1000 + i} for i in range(5)]
+    rows.append({'symbol': 'LATE', 'aisc': 'n/a', 'late': 3, 'empty': None})
+    spool = io.StringIO()
+    columns, types, count = app.spool_rows(iter(rows), spool)
+    assert count == 6
+    assert columns == ['symbol', 'aisc', 'late', 'empty']
+    assert types == {'symbol': 'string', 'aisc': 'string', 'late': 'float64', 'empty': 'string'}
+    assert list(app.read_spool(spool)) == rows
+
+
+def test_parquet_parts_share_the_union_schema(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'PART_ROWS', 2)
+    rows = [{'symbol': 'A', 'aisc': 1000}, {'symbol': 'B', 'aisc': 1100}, {'symbol': 'C', 'aisc': 950, 'late': 2.5}]
+    columns, types, _ = app.spool_rows(iter(rows), io.StringIO())
+    writer = app._PartWriter(str(tmp_path), 'metrics', 'parquet', columns, types)
+    for chunk in ([rows[0], rows[1]], [rows[2]]):
+        writer.write(chunk)
+    parts = writer.finish()
+    assert [part['rows'] for part in parts] == [2, 1]
+    tables = [pq.read_table(part['location']) for part in parts]
+    assert tables[0].schema == tables[1].schema
+    assert tables[1].to_pylist() == [{'symbol': 'C', 'aisc': 950.0, 'late': 2.5}]
+    assert tables[0].to_pylist()[0]['late'] is None
+
+
+def test_value_not_fitting_its_column_fails(app, tmp_path):
+    writer = app._PartWriter(str(tmp_path), 'metrics', 'parquet', ['aisc'], {'aisc': 'float64'})
+    with pytest.raises(ValueError, match='aisc is float64'):
+        writer.write([{'aisc': 'n/a'}])
+
+
+def test_csv_header_covers_every_column(app, tmp_path):
+    rows = [{'symbol': 'A'}, {'symbol': 'B', 'late': 1}]
+    columns, types, _ = app.spool_rows(iter(rows), io.StringIO())
+    writer = app._PartWriter(str(tmp_path), 'symbols', 'csv', columns, types)
+    writer.write(rows)
+    with open(writer.finish()[0]['location']) as f:
+        assert f.read().splitlines() == ['symbol,late', 'A,', 'B,1']
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from symbol_search import search_index_entries
+
+SYMBOLS_ARN = f"arn:aws:dynamodb:us-east-1:123456789012:table/{os.environ['SYMBOLS_TABLE']}/stream/2026-10-01T00:00:00.000"
+
+
+@pytest.fixture(scope='module')
+def change_stream(load_app):
+    return load_app('change_stream')
+
+
+def _record(event, symbol, sequence, old=None, new=None, arn=SYMBOLS_ARN):
+    stream = {'Keys': {'symbol': {'S': symbol}, 'exchange': {'S': 'NYSE'}}, 'SequenceNumber': str(sequence)}
+    if old is not None:
+        stream['OldImage'] = {'symbol': {'S': symbol}, 'exchange': {'S': 'NYSE'}, 'name': {'S': old}}
+    if new is not None:
+        stream['NewImage'] = {'symbol': {'S': symbol}, 'exchange': {'S': 'NYSE'}, 'name': {'S': new}}
+    return {'eventName': event, 'eventSourceARN': arn, 'dynamodb': stream}
+
+
+def test_coalesce_keeps_first_old_and_last_new_image(change_stream):
+    changes = change_stream.coalesce([
+        _record('MODIFY', 'AEM', 1, old='Agnico', new='Agnico Eagle'),
+        _record('INSERT', 'NEM', 2, new='Newmont'),
+        _record('MODIFY', 'AEM', 3, old='Agnico Eagle', new='Agnico Eagle Mines'),
+    ])
+    assert [(change.key['symbol'], change.sequence) for change in changes] == [('AEM', '3'), ('NEM', '2')]
+    aem = changes[0]
+    assert aem.source == 'symbols'
+    assert aem.old['name'] == 'Agnico' and aem.new['name'] == 'Agnico Eagle Mines'
+
+
+def test_coalesce_drops_net_no_ops_and_unknown_tables(change_stream):
+    other = SYMBOLS_ARN.replace(os.environ['SYMBOLS_TABLE'], 'unrelated-table')
+    changes = change_stream.coalesce([
+        _record('INSERT', 'KGC', 1, new='Kinross'),
+        _record('REMOVE', 'KGC', 2, old='Kinross'),
+        _record('MODIFY', 'GOLD', 3, old='Barrick', new='Barrick'),
+        _record('INSERT', 'AU', 4, new='AngloGold', arn=other),
+        _record('REMOVE', 'HMY', 5, old='Harmony'),
+    ])
+    assert [(change.key['symbol'], change.old['name'], change.new) for change in changes] == [('HMY', 'Harmony', None)]
+
+
+def test_snapshot_prefix_ranges_cover_matching_rows(change_stream):
+    rows = [
+        ['NEM', 'Newmont Corporation', 'NYSE'],
+        ['AEM', 'Agnico Eagle Mines', 'NYSE'],
+        ['AEM', 'Agnico Eagle Mines', 'TSX'],
+        ['NG', 'NovaGold Resources', 'NYSE'],
+        ['A', 'Agilent', 'NYSE'],
+        ['AU', 'AngloGold Ashanti', 'NYSE'],
+    ]
+    document = change_stream._snapshot_document(rows)
+    symbols, names, prefix = document['symbols'], document['names'], document['prefix']
+    assert [row[0] for row in symbols] == ['A', 'AEM', 'AEM', 'AU', 'NEM', 'NG']
+    assert [symbols[i][1] for i in names] == [
+        'Agilent', 'Agnico Eagle Mines', 'Agnico Eagle Mines', 'AngloGold Ashanti', 'Newmont Corporation',
+        'NovaGold Resources'
+    ]
+    for key, (symbol_start, symbol_end, name_start, name_end) in prefix.items():
+        assert {row[0] for row in symbols[symbol_start:symbol_end]} == \
+            {row[0] for row in symbols if row[0].lower().startswith(key)}
+        assert sorted(names[name_start:name_end]) == \
+            sorted(i for i in names if symbols[i][1].lower().startswith(key))
+    # Prefixes seen in only one order leave the other range empty
+    assert prefix['ae'][:2] == [1, 3] and prefix['ae'][2] == prefix['ae'][3]
+    assert prefix['ag'] == [0, 0, 0, 3]
+
+
+def test_search_index_entries_cover_symbol_and_name_buckets():
+    entries = search_index_entries({'symbol': 'AEM', 'exchange': 'TSX', 'name': 'Agnico-Eagle Mines'})
+    assert [(entry['bucket'], entry['sort_key']) for entry in entries] == [
+        ('S#a', 'aem#TSX'), ('N#a', 'agnico eagle mines#AEM#TSX'),
+        ('S#ae', 'aem#TSX'), ('N#ag', 'agnico eagle mines#AEM#TSX'),
+    ]
+    assert all(entry['name'] == 'Agnico-Eagle Mines' for entry in entries)
+    assert {entry['bucket'] for entry in search_index_entries({'symbol': 'X', 'exchange': 'NYSE'})} == {'S#x'}
+
+
+def test_views_must_implement_apply(change_stream):
+    class Incomplete(change_stream.DerivedView):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_change_log_names_objects_by_numeric_sequence_range(change_stream, monkeypatch):
+    class FakeS3:
+        def __init__(self):
+            self.keys = []
+
+        def put_object(self, Bucket, Key, Body):
+            self.keys.append(Key)
+
+    s3 = FakeS3()
+    monkeypatch.setattr(change_stream, 's3', s3)
+    # Stream sequence numbers are decimal strings of varying length
+    changes = change_stream.coalesce([
+        _record('INSERT', 'AEM', 99999999999999999999, new='Agnico Eagle'),
+        _record('INSERT', 'NEM', 100000000000000000000, new='Newmont'),
+        _record('INSERT', 'GOLD', 900000000000000000000, new='Barrick'),
+    ])
+    change_stream.ExportChangeLogView('bucket').apply(changes)
+    assert len(s3.keys) == 1
+    assert s3.keys[0].endswith('/99999999999999999999-900000000000000000000.jsonl.gz')
@@ -0,0 +1,66 @@
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture
+def events(load_app, monkeypatch):
+    corporate_events = load_app('corporate_events')
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='events',
+            KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}, {'AttributeName': 'sk', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'pk', 'AttributeType': 'S'},
+                                  {'AttributeName': 'sk', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        cache = dynamodb.create_table(
+            TableName='cache',
+            KeySchema=[{'AttributeName': 'symbol', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'symbol', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        monkeypatch.setattr(corporate_events, 'dynamodb', dynamodb)
+        monkeypatch.setattr(corporate_events, 'events_table', table)
+        monkeypatch.setattr(corporate_events, 'company_overview_table', cache)
+        monkeypatch.setattr(corporate_events.alpha_vantage, 'key_count', lambda: 1)
+        yield corporate_events, table
+
+
+def _run(corporate_events, monkeypatch, clock, failing, budget):
+    fetched = []
+
+    def fetch(function, symbol):
+        fetched.append(symbol)
+        if symbol in failing:
+            raise RuntimeError('Invalid API call')
+        return []
+
+    monkeypatch.setattr(corporate_events, '_fetch', fetch)
+    monkeypatch.setattr(corporate_events.time, 'time', lambda: clock)
+    response = corporate_events.lambda_handler(
+        {'symbols': ['AEM', 'BAD', 'NEM'], 'datasets': ['dividend'], 'call_budget': budget}, None
+    )
+    assert response['statusCode'] == 200
+    return fetched
+
+
+def _summary(table, symbol):
+    return table.get_item(Key={'pk': f"SUMMARY#{symbol}", 'sk': 'SUMMARY'})['Item']
+
+
+def test_failing_symbols_rotate_behind_the_rest(events, monkeypatch):
+    corporate_events, table = events
+    assert _run(corporate_events, monkeypatch, 1000, {'BAD'}, budget=2) == ['AEM', 'BAD']
+    bad = _summary(table, 'BAD')
+    assert bad['dividend_checked'] == 1000 and bad['dividend_errors'] == 1
+    # Nothing was ever fetched for BAD, so there is no aggregate to show
+    assert 'dividends' not in bad
+    assert 'dividends' in _summary(table, 'AEM')
+
+    assert _run(corporate_events, monkeypatch, 2000, {'BAD'}, budget=1) == ['NEM']
+    assert _run(corporate_events, monkeypatch, 3000, {'BAD'}, budget=1) == ['AEM']
+    assert _run(corporate_events, monkeypatch, 4000, set(), budget=1) == ['BAD']
+    bad = _summary(table, 'BAD')
+    assert bad['dividend_errors'] == 0 and 'dividends' in bad
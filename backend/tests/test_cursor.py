@@ -0,0 +1,42 @@
+import base64
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app, monkeypatch):
+    monkeypatch.setenv('CURSOR_SIGNING_KEY', 'cursor-test-secret')
+    return load_app('data_api')
+
+
+def test_round_trip(app):
+    position = {'phase': 'N', 'key': {'bucket': 'N#ag', 'sort_key': 'agnico eagle#AEM#NYSE'}}
+    token = app._encode_cursor(position, 'ag')
+    assert '=' not in token
+    assert app._decode_cursor(token, 'ag') == position
+
+
+def test_rejects_other_query(app):
+    token = app._encode_cursor({'phase': 'S', 'key': None}, 'ag')
+    with pytest.raises(app.InvalidCursorError, match='does not match query'):
+        app._decode_cursor(token, 'au')
+
+
+def test_rejects_tampered_payload(app):
+    raw = bytearray(base64.urlsafe_b64decode(app._encode_cursor({'phase': 'S', 'key': 'a'}, 'ag') + '=='))
+    raw[-3] ^= 1
+    token = base64.urlsafe_b64encode(bytes(raw)).decode('ascii').rstrip('=')
+    with pytest.raises(app.InvalidCursorError, match='signature mismatch'):
+        app._decode_cursor(token, 'ag')
+
+
+def test_rejects_cursor_signed_with_another_key(app, monkeypatch):
+    token = app._encode_cursor({'phase': 'S', 'key': 'a'}, 'ag')
+    monkeypatch.setenv('CURSOR_SIGNING_KEY', 'rotated-secret')
+    with pytest.raises(app.InvalidCursorError, match='signature mismatch'):
+        app._decode_cursor(token, 'ag')
+
+
+def test_rejects_malformed_token(app):
+    with pytest.raises(app.InvalidCursorError):
+        app._decode_cursor('not*base64', 'ag')
@@ -0,0 +1,60 @@
+import boto3
+import pytest
+from moto import mock_aws
+
+import dynamodb_batch
+from dynamodb_batch import batch_get
+
+
+@pytest.fixture
+def table():
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='cache',
+            KeySchema=[{'AttributeName': 'symbol', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'symbol', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        with table.batch_writer() as writer:
+            for i in range(250):
+                writer.put_item(Item={'symbol': f"S{i:03d}", 'name': f"Co {i}", 'size': i})
+        yield dynamodb, table
+
+
+def test_reads_every_chunk_and_skips_missing_keys(table):
+    dynamodb, table = table
+    keys = [{'symbol': f"S{i:03d}"} for i in range(0, 260, 2)]
+    items = batch_get(dynamodb, table, keys, projection='symbol, #n', names={'#n': 'name'})
+    assert sorted(item['symbol'] for item in items) == [f"S{i:03d}" for i in range(0, 250, 2)]
+    assert all(set(item) == {'symbol', 'name'} for item in items)
+    assert batch_get(dynamodb, table, []) == []
+
+
+def test_unprocessed_keys_are_retried_then_given_up(monkeypatch):
+    class Table:
+        table_name = 'cache'
+
+    class Throttled:
+        def __init__(self, rounds):
+            self.rounds = rounds
+            self.calls = 0
+
+        def batch_get_item(self, RequestItems):
+            self.calls += 1
+            keys = RequestItems['cache']['Keys']
+            if self.calls > self.rounds or len(keys) == 1:
+                return {'Responses': {'cache': keys}}
+            # Serve the first key, leave the rest unprocessed
+            return {'Responses': {'cache': keys[:1]}, 'UnprocessedKeys': {'cache': {'Keys': keys[1:]}}}
+
+    monkeypatch.setattr(dynamodb_batch.time, 'sleep', lambda seconds: None)
+    keys = [{'symbol': symbol} for symbol in ('A', 'B', 'C', 'D')]
+    assert batch_get(Throttled(2), Table(), keys) == keys
+    stubborn = Throttled(rounds=10)
+    assert batch_get(stubborn, Table(), keys) == keys
+    assert stubborn.calls == 4
+
+    stubborn = Throttled(rounds=10)
+    many = [{'symbol': str(i)} for i in range(8)]
+    assert len(batch_get(stubborn, Table(), many)) == dynamodb_batch.MAX_ATTEMPTS
@@ -0,0 +1,91 @@
+import pytest
+
+from fuzzy_search import FuzzySearchIndex, bounded_levenshtein, bounded_prefix_distance, max_distance, trigrams
+from symbol_search import normalize_name
+
+ITEMS = [
+    {'symbol': 'AEM', 'exchange': 'NYSE', 'name': 'Agnico Eagle Mines Limited'},
+    {'symbol': 'AG', 'exchange': 'NYSE', 'name': 'First Majestic Silver Corp'},
+    {'symbol': 'AGI', 'exchange': 'NYSE', 'name': 'Alamos Gold Inc'},
+    {'symbol': 'NEM', 'exchange': 'NYSE', 'name': 'Newmont Corporation'},
+    {'symbol': 'GOLD', 'exchange': 'NYSE', 'name': 'Barrick Gold Corporation'},
+    {'symbol': 'KGC', 'exchange': 'NYSE', 'name': 'Kinross Gold Corporation'},
+    {'symbol': 'SAND', 'exchange': 'NYSE', 'name': 'Sandstorm Gold Ltd'},
+    {'symbol': 'FNV', 'exchange': 'NYSE', 'name': 'Franco-Nevada Corporation'},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return FuzzySearchIndex(ITEMS, popularity={'KGC': 5, 'GOLD': 9})
+
+
+def _symbols(results):
+    return [result['symbol'] for result in results]
+
+
+def test_normalize_name_folds_accents_and_punctuation():
+    assert normalize_name('  Société Générale — S.A. ') == 'societe generale s a'
+    assert normalize_name(None) == ''
+
+
+def test_trigrams_are_padded():
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+
+
+@pytest.mark.parametrize('token, edits', [('ag', 0), ('gold', 1), ('agnic', 1), ('newmont', 2)])
+def test_max_distance_grows_with_token_length(token, edits):
+    assert max_distance(token) == edits
+
+
+def test_bounded_levenshtein():
+    assert bounded_levenshtein('newmont', 'newmont', 2) == 0
+    assert bounded_levenshtein('nemwont', 'newmont', 2) == 1  # transposition is one edit
+    assert bounded_levenshtein('kinros', 'kinross', 2) == 1
+    assert bounded_levenshtein('abcdef', 'uvwxyz', 2) == 3  # limit + 1 once past the limit
+    assert bounded_levenshtein('a', 'abcd', 2) == 3
+
+
+def test_bounded_prefix_distance():
+    assert bounded_prefix_distance('agni', 'agnico', 1) == 0
+    assert bounded_prefix_distance('agmi', 'agnico', 1) == 1
+    assert bounded_prefix_distance('xyz', 'agnico', 1) == 2
+
+
+def test_exact_symbol_ranks_first(index):
+    results = index.search('ag', 3)
+    assert results[0] == {**ITEMS[1], 'match': 'exact', 'distance': 0}
+    assert results[1]['symbol'] == 'AGI' and results[1]['match'] == 'symbol_prefix'
+    assert results[2]['symbol'] == 'AEM' and results[2]['match'] == 'name_prefix'
+
+
+def test_name_prefix_and_token_match(index):
+    assert _symbols(index.search('newm')) == ['NEM']
+    results = index.search('eagle')
+    assert _symbols(results) == ['AEM'] and results[0]['match'] == 'token'
+
+
+def test_token_matches_rank_by_popularity(index):
+    results = index.search('gold', 10)
+    assert results[0]['symbol'] == 'GOLD' and results[0]['match'] == 'exact'
+    token_matches = [result['symbol'] for result in results if result['match'] == 'token']
+    # Popularity first (Kinross over the unranked names), then shorter names
+    assert token_matches[0] == 'KGC'
+    assert set(token_matches) == {'KGC', 'AGI', 'SAND'}
+
+
+def test_typos_fall_back_to_fuzzy_matches(index):
+    results = index.search('kinros gold')
+    assert results[0]['symbol'] == 'KGC'
+    assert results[0]['match'] == 'fuzzy' and results[0]['distance'] == 1
+    assert _symbols(index.search('nemwont')) == ['NEM']
+
+
+def test_short_tokens_must_match_exactly(index):
+    assert index.search('xq') == []
+
+
+def test_limit_and_empty_queries(index):
+    assert len(index.search('corp', 2)) == 2
+    assert index.search('   ') == []
+    assert FuzzySearchIndex([]).search('gold') == []
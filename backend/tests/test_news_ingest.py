@@ -0,0 +1,71 @@
+import calendar
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture
+def news(load_app, monkeypatch):
+    news_ingest = load_app('news_ingest')
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='news',
+            KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}, {'AttributeName': 'sk', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'pk', 'AttributeType': 'S'},
+                                  {'AttributeName': 'sk', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        monkeypatch.setattr(news_ingest, 'dynamodb', dynamodb)
+        monkeypatch.setattr(news_ingest, 'news_table', table)
+        monkeypatch.setattr(news_ingest.alpha_vantage, 'key_count', lambda: 1)
+        yield news_ingest, table
+
+
+def _run(news_ingest, monkeypatch, clock, failing, budget):
+    polled = []
+
+    def fetch(symbol, time_from):
+        polled.append(symbol)
+        if symbol in failing:
+            raise RuntimeError('Invalid inputs')
+        return [{'url': f"https://example.com/{symbol}/{clock}", 'time_published': '20261019T120000',
+                 'ticker_sentiment': [{'ticker': symbol, 'relevance_score': '0.9'}],
+                 'overall_sentiment_score': 0}]
+
+    monkeypatch.setattr(news_ingest, '_fetch_news', fetch)
+    monkeypatch.setattr(news_ingest.time, 'time', lambda: clock)
+    response = news_ingest.lambda_handler({'symbols': ['AEM', 'BAD', 'GOLD', 'NEM'], 'call_budget': budget}, None)
+    assert response['statusCode'] == 200
+    return polled
+
+
+def test_failing_tickers_rotate_behind_the_rest(news, monkeypatch):
+    news_ingest, table = news
+    start = calendar.timegm((2026, 10, 19, 12, 30, 0))
+    assert _run(news_ingest, monkeypatch, start, {'BAD'}, budget=2) == ['AEM', 'BAD']
+    cursor = table.get_item(Key={'pk': 'CURSOR#BAD', 'sk': 'CURSOR'})['Item']
+    assert cursor['failures'] == 1 and cursor['checked'] == start and 'time_from' not in cursor
+    assert table.get_item(Key={'pk': 'CURSOR#AEM', 'sk': 'CURSOR'})['Item']['time_from'] == '20261019T1200'
+
+    # Never-polled tickers go next; BAD is backed off behind AEM
+    assert _run(news_ingest, monkeypatch, start + 60, {'BAD'}, budget=3) == ['GOLD', 'NEM', 'AEM']
+    # Past its backoff BAD is due again, after the others; a second failure doubles the backoff
+    later = start + news_ingest.FAILURE_BACKOFF_SEC
+    assert _run(news_ingest, monkeypatch, later, {'BAD'}, budget=4) == ['AEM', 'GOLD', 'NEM', 'BAD']
+    cursor = table.get_item(Key={'pk': 'CURSOR#BAD', 'sk': 'CURSOR'})['Item']
+    assert cursor['failures'] == 2 and cursor['checked'] == later
+    assert _run(news_ingest, monkeypatch, later + 60, set(), budget=3) == ['AEM', 'GOLD', 'NEM']
+    assert _run(news_ingest, monkeypatch, later + 2 * news_ingest.FAILURE_BACKOFF_SEC, set(), budget=4)[-1] == 'BAD'
+
+    # A success clears the failure count
+    cursor = table.get_item(Key={'pk': 'CURSOR#BAD', 'sk': 'CURSOR'})['Item']
+    assert cursor['failures'] == 0 and cursor['time_from'] == '20261019T1200'
+
+
+def test_neutral_sentiment_is_stored(news, monkeypatch):
+    news_ingest, table = news
+    _run(news_ingest, monkeypatch, calendar.timegm((2026, 10, 19, 12, 30, 0)), set(), budget=1)
+    articles = [item for item in table.scan()['Items'] if item['sk'] == 'ARTICLE']
+    assert [article['sentiment_score'] for article in articles] == ['0']
@@ -0,0 +1,30 @@
+import json
+from decimal import Decimal
+
+from overview_body import has_price_stats, with_price_stats
+
+BODY = json.dumps({'sector': 'Mining', '52_week_high': 40.0, '52_week_low': 20.0})
+STATS = {
+    'as_of': '2026-10-16', 'week52_high': Decimal('45.5'), 'week52_low': Decimal('21'),
+    'returns': {'1M': Decimal('0.025'), '1Y': None}
+}
+
+
+def test_overlays_stats_over_the_payload_range():
+    overview = json.loads(with_price_stats(BODY, STATS))
+    assert overview == {
+        'sector': 'Mining', '52_week_high': 45.5, '52_week_low': 21,
+        'returns': {'1M': 0.025, '1Y': None}, 'price_as_of': '2026-10-16'
+    }
+
+
+def test_without_stats_the_body_is_unchanged():
+    assert with_price_stats(BODY, None) is BODY
+    assert with_price_stats(BODY, {}) is BODY
+
+
+def test_has_price_stats_checks_the_as_of_date():
+    overlaid = with_price_stats(BODY, STATS)
+    assert has_price_stats(overlaid, STATS)
+    assert not has_price_stats(BODY, STATS)
+    assert not has_price_stats(overlaid, {**STATS, 'as_of': '2026-10-17'})
@@ -0,0 +1,71 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app, monkeypatch):
+    app = load_app('data_api')
+    monkeypatch.setattr(app, '_fuzzy_index', None)
+    monkeypatch.setattr(app, '_symbol_snapshot', {'hash': None, 'body': None, 'checked': 0})
+    monkeypatch.setattr(app, '_popularity_counts', lambda days: {})
+    return app
+
+
+class SlowStore:
+    def __init__(self):
+        self.scans = 0
+        self.lock = threading.Lock()
+
+    def scan_symbols(self, attributes=None, **kwargs):
+        with self.lock:
+            self.scans += 1
+        time.sleep(0.05)
+        return [{'symbol': 'AEM', 'exchange': 'NYSE', 'name': 'Agnico Eagle Mines'}], None
+
+
+def _together(function, threads=8):
+    barrier = threading.Barrier(threads)
+
+    def call():
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(threads) as pool:
+        return [future.result() for future in [pool.submit(call) for _ in range(threads)]]
+
+
+def test_concurrent_first_requests_build_the_fuzzy_index_once(app, monkeypatch):
+    store = SlowStore()
+    monkeypatch.setattr(app, 'store', store)
+    indexes = _together(app._get_fuzzy_index)
+    assert store.scans == 1
+    assert all(index is indexes[0] for index in indexes)
+    app._clear_process_caches()
+    assert app._get_fuzzy_index() is not indexes[0] and store.scans == 2
+
+
+def test_concurrent_snapshot_reads_see_one_consistent_snapshot(app, monkeypatch):
+    reads = []
+
+    class Body:
+        def __init__(self, data):
+            self.data = data
+
+        def read(self):
+            time.sleep(0.02)
+            return self.data
+
+    class FakeS3:
+        def get_object(self, Bucket, Key):
+            reads.append(Key)
+            if Key.endswith('latest.json'):
+                return {'Body': Body(b'{"hash": "h1", "key": "snapshots/symbol-universe/h1.json.gz"}')}
+            return {'Body': Body(b'gzip-h1')}
+
+    monkeypatch.setattr(app, 's3', FakeS3())
+    monkeypatch.setenv('SNAPSHOT_BUCKET', 'bucket')
+    assert set(_together(app._latest_symbol_snapshot)) == {('h1', b'gzip-h1')}
+    assert len(reads) == 2
@@ -0,0 +1,55 @@
+import sys
+import time
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def app(load_app, monkeypatch, tmp_path):
+    app = load_app('data_api')
+    monkeypatch.setattr(app, 'store', storage.SQLiteStorage(str(tmp_path / 'cache.sqlite3')))
+    monkeypatch.setattr(app.alpha_vantage, 'key_count', lambda: 1)
+    monkeypatch.setattr(app, '_fetch_earnings_calendar', lambda: {
+        'AEM': ('2099-02-12', '2098-12-31'),
+        'NEM': ('2099-02-20', '2098-12-31')
+    })
+    return app
+
+
+@pytest.fixture
+def cache_admin(app, monkeypatch):
+    # cache_admin imports data_api's handler module under its deployed name
+    monkeypatch.setitem(sys.modules, 'app', app)
+    monkeypatch.delitem(sys.modules, 'cache_admin', raising=False)
+    import cache_admin
+    monkeypatch.setattr(cache_admin, 'bump_version', lambda reason: 1)
+    return cache_admin
+
+
+def _cache(app, symbol, now):
+    index = {'incomeStatement': {'quarterlyReports': ['2026-09-30']}}
+    app.store.update_cache(symbol, set_fields={
+        'symbol': symbol, 'financials_index': index, 'financials_updated': now - 3600,
+        'financials_valid_until': now + 86400, 'last_updated': now - 3600
+    })
+
+
+def test_schedule_run_keeps_invalidated_statements_stale(app, cache_admin):
+    now = int(time.time())
+    for symbol in ('AEM', 'NEM'):
+        _cache(app, symbol, now)
+    assert cache_admin.invalidate(['AEM'], ['financials'])['invalidated'] == 1
+    assert not app._financials_fresh(app.store.get_cache('AEM'), now)
+
+    response = app._refresh_schedule({}, None)
+    assert response['statusCode'] == 200
+
+    aem, nem = app.store.get_cache('AEM'), app.store.get_cache('NEM')
+    # The calendar still applies to the untouched symbol
+    assert nem['financials_valid_until'] == app._date_epoch('2099-02-20') + app.EARNINGS_GRACE_SEC
+    assert app._financials_fresh(nem, now)
+    assert aem['next_report_date'] == '2099-02-12'
+    assert not app._financials_fresh(aem, now)
+    assert not app._financials_fresh(aem, int(time.time()) + 60)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from rolling import RollingMoments, align, log_returns
+
+NAN = np.nan
+
+
+def _pairwise(y, x, min_observations=2):
+    """Reference beta and correlation for one column pair, over rows where both exist"""
+    both = ~np.isnan(y) & ~np.isnan(x)
+    if both.sum() < min_observations:
+        return NAN, NAN
+    y, x = y[both], x[both]
+    cov = np.cov(y, x, bias=True)
+    return cov[0, 1] / cov[1, 1], np.corrcoef(y, x)[0, 1]
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(11)
+    x = rng.normal(0, 0.01, (60, 2))
+    y = np.column_stack([1.5 * x[:, 0] + rng.normal(0, 0.002, 60), rng.normal(0, 0.01, 60), -x[:, 1]])
+    x[[5, 17], 0] = NAN
+    y[[3, 40], 1] = NAN
+    return y, x
+
+
+def test_sliding_window_matches_direct_computation(returns):
+    y, x = returns
+    window = 20
+    moments = RollingMoments(['A', 'B', 'C'], ['gold', 'silver'])
+    moments.add(y[:window], x[:window])
+    for end in range(window, len(y) + 1, 7):
+        if end > window:
+            moments.add(y[end - 7:end], x[end - 7:end])
+            moments.add(y[end - 7 - window:end - window], x[end - 7 - window:end - window], sign=-1.0)
+        beta, corr = moments.beta(), moments.correlation()
+        for i in range(3):
+            for j in range(2):
+                expected_beta, expected_corr = _pairwise(y[end - window:end, i], x[end - window:end, j])
+                assert beta[i, j] == pytest.approx(expected_beta, abs=1e-9)
+                assert corr[i, j] == pytest.approx(expected_corr, abs=1e-9)
+    assert moments.correlation()[2, 1] == pytest.approx(-1.0)
+
+
+def test_too_few_observations_give_nan():
+    moments = RollingMoments(['A'], ['gold'])
+    moments.add(np.array([[0.01], [NAN], [0.02]]), np.array([[0.005], [0.01], [NAN]]))
+    assert moments.observations()[0, 0] == 1
+    assert np.isnan(moments.beta()[0, 0]) and np.isnan(moments.correlation()[0, 0])
+    assert moments.beta(min_observations=1).shape == (1, 1)
+
+
+def test_subset_and_assign_round_trip(returns):
+    y, x = returns
+    moments = RollingMoments(['A', 'B', 'C'], ['gold', 'silver'])
+    moments.add(y, x)
+    part = moments.subset([0, 2])
+    assert part.symbols == ['A', 'C']
+    np.testing.assert_allclose(part.beta(), moments.beta()[[0, 2]])
+
+    rebuilt = RollingMoments(['A', 'B', 'C'], ['gold', 'silver'])
+    rebuilt.assign([0, 2], part)
+    np.testing.assert_allclose(rebuilt.beta()[[0, 2]], moments.beta()[[0, 2]])
+    assert (rebuilt.observations()[1] == 0).all()
+
+
+def test_align_forward_fills_onto_the_calendar():
+    calendar = ['2026-10-12', '2026-10-13', '2026-10-14', '2026-10-15']
+    levels = align(calendar, [
+        {'2026-10-13': 10.0, '2026-10-15': 12.0, '2026-10-16': 99.0},
+        {'2026-10-12': 5.0},
+    ])
+    np.testing.assert_array_equal(levels, [[NAN, 5], [10, 5], [10, 5], [12, 5]])
+    assert np.isnan(align(calendar, [{'2026-10-13': 10.0}], fill=False)[2, 0])
+
+
+def test_log_returns_skip_gaps_and_bad_levels():
+    levels = np.array([[100.0, 1.0], [110.0, 0.0], [NAN, 2.0], [121.0, 4.0]])
+    returns = log_returns(levels)
+    assert np.isnan(returns[0]).all()
+    assert returns[1, 0] == pytest.approx(np.log(1.1))
+    # A zero level and a missing level have no defined return
+    assert np.isnan(returns[1, 1]) and np.isnan(returns[2, 1]) and np.isnan(returns[2, 0])
+    assert returns[3, 1] == pytest.approx(np.log(2))
@@ -0,0 +1,69 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import server
+
+POOL = 'us-east-1_TestPool'
+CLIENT = 'test-client'
+ISSUER = f"https://cognito-idp.us-east-1.amazonaws.com/{POOL}"
+
+
+class FakeKeys:
+    def __init__(self, public_key):
+        self.public_key = public_key
+
+    def get_signing_key_from_jwt(self, token):
+        return type('SigningKey', (), {'key': self.public_key})()
+
+
+@pytest.fixture
+def private_key(monkeypatch):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    monkeypatch.setattr(server, 'COGNITO_USER_POOL_ID', POOL)
+    monkeypatch.setattr(server, 'COGNITO_CLIENT_ID', CLIENT)
+    monkeypatch.setattr(server, '_jwks_client', FakeKeys(key.public_key()))
+    return key
+
+
+def _token(key, **overrides):
+    claims = {
+        'sub': 'user-1', 'aud': CLIENT, 'iss': ISSUER, 'token_use': 'id', 'exp': int(time.time()) + 300,
+        'cognito:groups': ['admins', 'editors'], **overrides
+    }
+    return jwt.encode(claims, key, algorithm='RS256')
+
+
+def _claims(token):
+    event = server.build_event('GET', '/watchlist', '', [('Authorization', f"Bearer {token}")], b'')
+    return ((event['requestContext'].get('authorizer') or {}).get('jwt') or {}).get('claims')
+
+
+def test_valid_id_tokens_become_authorizer_claims(private_key):
+    claims = _claims(_token(private_key))
+    assert claims['sub'] == 'user-1'
+    # Passed through like the HTTP API does, so the handler's parsing applies unchanged
+    assert claims['cognito:groups'] == '[admins editors]'
+
+
+@pytest.mark.parametrize('overrides', [
+    {'aud': 'other-client'},
+    {'iss': 'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_Other'},
+    {'exp': int(time.time()) - 60},
+    {'token_use': 'access'},
+])
+def test_invalid_tokens_are_ignored(private_key, overrides):
+    assert _claims(_token(private_key, **overrides)) is None
+
+
+def test_tokens_signed_by_another_key_are_ignored(private_key):
+    other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    assert _claims(_token(other)) is None
+    assert _claims('not-a-jwt') is None
+
+
+def test_no_claims_without_a_configured_pool(private_key, monkeypatch):
+    monkeypatch.setattr(server, 'COGNITO_USER_POOL_ID', None)
+    assert _claims(_token(private_key)) is None
@@ -0,0 +1,152 @@
+"""Both storage backends must behave like DynamoDB does through boto3."""
+from decimal import Decimal
+
+import boto3
+import pytest
+from moto import mock_aws
+
+import storage
+
+
+def _table(dynamodb, name, keys):
+    dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{'AttributeName': key, 'KeyType': kind} for key, kind in zip(keys, ('HASH', 'RANGE'))],
+        AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'} for key in keys],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+@pytest.fixture(params=['dynamodb', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        yield storage.SQLiteStorage(str(tmp_path / 'store.sqlite3'))
+        return
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        _table(dynamodb, 'symbols', ['symbol', 'exchange'])
+        for name in ('cache', 'metrics'):
+            _table(dynamodb, name, ['symbol'])
+        yield storage.DynamoDBStorage(dynamodb, 'symbols', 'cache', 'metrics')
+
+
+FINANCIALS = {
+    'symbol': 'AEM',
+    'incomeStatement': {
+        'annualReports': [
+            {'fiscalDateEnding': f"{2025 - i}-12-31", 'totalRevenue': Decimal(100 - i), 'netIncome': None}
+            for i in range(3)
+        ],
+        'quarterlyReports': []
+    }
+}
+
+
+def test_symbol_listings_and_paged_scan(store):
+    store.put_symbols([
+        {'symbol': f"S{i:02d}", 'exchange': exchange, 'name': f"Co {i}"}
+        for i in range(7) for exchange in ('NYSE', 'TSX')
+    ])
+    assert {item['exchange'] for item in store.symbol_listings('S03')} == {'NYSE', 'TSX'}
+    assert store.get_symbol_listing('S03', 'TSX')['name'] == 'Co 3'
+    assert store.get_symbol_listing('S03', 'LSE') is None
+
+    seen, start_key = [], None
+    while True:
+        items, start_key = store.scan_symbols(limit=4, start_key=start_key, attributes=['symbol', 'exchange'])
+        assert len(items) <= 4 and all(set(item) == {'symbol', 'exchange'} for item in items)
+        seen.extend((item['symbol'], item['exchange']) for item in items)
+        if not start_key:
+            break
+    assert sorted(seen) == sorted({(f"S{i:02d}", exchange) for i in range(7) for exchange in ('NYSE', 'TSX')})
+
+
+def test_cache_updates_touch_only_named_attributes(store):
+    assert store.get_cache('AEM') is None
+    store.update_cache('AEM', set_fields={'overview_data': {'PERatio': Decimal('12.5')}, 'overview_updated': 100})
+    store.update_cache('AEM', set_fields={'financials': FINANCIALS, 'financials_gzip': b'\x1f\x8b'})
+    store.update_cache('AEM', set_fields={'overview_updated': 200}, remove_fields=['financials_gzip'])
+    item = store.get_cache('AEM')
+    assert item['overview_updated'] == 200 and isinstance(item['overview_updated'], Decimal)
+    assert item['overview_data'] == {'PERatio': Decimal('12.5')}
+    assert 'financials_gzip' not in item
+    assert store.get_cache('AEM', ['overview_updated']) == {'overview_updated': 200}
+    # Removing an attribute that isn't there is not an error
+    store.update_cache('AEM', remove_fields=['financials_gzip'])
+
+
+def test_binary_attributes_round_trip(store):
+    store.update_cache('AEM', set_fields={'financials_gzip': b'\x1f\x8b\x00'})
+    assert bytes(getattr(value := store.get_cache('AEM')['financials_gzip'], 'value', value)) == b'\x1f\x8b\x00'
+
+
+def test_financials_report_selection(store):
+    if isinstance(store, storage.DynamoDBStorage):
+        pytest.skip('moto does not project list elements the way DynamoDB does')
+    store.update_cache('AEM', set_fields={'financials': FINANCIALS})
+    positions = {('incomeStatement', 'annualReports'): [0, 2]}
+    selected = store.get_financials_reports('AEM', positions, ['fiscalDateEnding', 'totalRevenue'])
+    assert selected['incomeStatement']['annualReports'] == [
+        {'fiscalDateEnding': '2025-12-31', 'totalRevenue': 100},
+        {'fiscalDateEnding': '2023-12-31', 'totalRevenue': 98}
+    ]
+    assert store.get_financials_reports('AEM', {}, None) == {}
+
+
+def test_scan_cache_projects_attributes(store):
+    for symbol in ('AEM', 'NEM', 'GOLD'):
+        store.update_cache(symbol, set_fields={'overview_updated': 1, 'overview_body': '{}'})
+    items = list(store.scan_cache(['symbol', 'overview_updated']))
+    assert sorted(item['symbol'] for item in items) == ['AEM', 'GOLD', 'NEM']
+    assert all(set(item) == {'symbol', 'overview_updated'} for item in items)
+
+
+def test_caches_and_metrics_read_together(store):
+    store.update_cache('AEM', set_fields={'overview_body': '{}', 'price_stats': {'as_of': '2026-10-16'}})
+    store.put_metrics([{'symbol': 'AEM', 'aisc': Decimal('1234.5')}])
+    found = store.get_caches_and_metrics(['AEM', 'NEM', 'AEM'], ['price_stats'])
+    assert list(found) == ['AEM', 'NEM']
+    cache, metrics = found['AEM']
+    assert cache['price_stats'] == {'as_of': '2026-10-16'} and 'overview_body' not in cache
+    assert metrics == {'symbol': 'AEM', 'aisc': Decimal('1234.5')}
+    assert found['NEM'] == ({}, None)
+    assert store.get_cache_and_metrics('AEM')[1] == metrics
+
+
+def test_scan_metrics(store):
+    assert list(store.scan_metrics()) == []
+    store.put_metrics([{'symbol': symbol, 'aisc': Decimal(i)} for i, symbol in enumerate(['NEM', 'AEM'])])
+    assert sorted((item['symbol'], item['aisc']) for item in store.scan_metrics()) == [('AEM', 1), ('NEM', 0)]
+
+
+def test_backends_must_implement_the_interface():
+    class Partial(storage.StorageBackend):
+        def get_cache(self, symbol, attributes=None):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_sync_copies_dynamodb_into_sqlite(tmp_path):
+    import sync_sqlite
+
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        _table(dynamodb, 'symbols', ['symbol', 'exchange'])
+        for name in ('cache', 'metrics'):
+            _table(dynamodb, name, ['symbol'])
+        source = storage.DynamoDBStorage(dynamodb, 'symbols', 'cache', 'metrics')
+        source.put_symbols([{'symbol': f"S{i:04d}", 'exchange': 'NYSE', 'name': f"Co {i}"} for i in range(1203)])
+        source.put_metrics([{'symbol': 'S0001', 'aisc': Decimal('1234.5')}])
+        source.update_cache('S0001', set_fields={'overview_updated': 100, 'overview_body': '{}'})
+
+        destination = storage.SQLiteStorage(str(tmp_path / 'local.sqlite3'))
+        assert sync_sqlite.sync(source, destination) == {'symbols': 1203, 'metrics': 1}
+        assert destination.get_cache('S0001') is None
+        assert sync_sqlite.sync(source, destination, cache=True) == {'symbols': 1203, 'metrics': 1, 'cache': 1}
+
+    assert len(destination.scan_symbols()[0]) == 1203
+    assert destination.get_symbol_listing('S1202', 'NYSE')['name'] == 'Co 1202'
+    assert destination.get_metrics('S0001') == {'symbol': 'S0001', 'aisc': Decimal('1234.5')}
+    assert destination.get_cache('S0001') == {'symbol': 'S0001', 'overview_updated': 100, 'overview_body': '{}'}
@@ -0,0 +1,66 @@
+"""Checks on template.yaml that sam validate doesn't make"""
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+TEMPLATE = Path(__file__).resolve().parent.parent / 'template.yaml'
+
+
+class _Loader(yaml.SafeLoader):
+    pass
+
+
+def _tag(loader, suffix, node):
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node)
+    else:
+        value = loader.construct_mapping(node)
+    return {suffix: value}
+
+
+_Loader.add_multi_constructor('!', _tag)
+
+
+@pytest.fixture(scope='module')
+def resources():
+    return yaml.load(TEMPLATE.read_text(), Loader=_Loader)['Resources']
+
+
+def _routes(resources):
+    for name, resource in resources.items():
+        for event_name, event in (resource.get('Properties', {}).get('Events') or {}).items():
+            if event['Type'] == 'HttpApi':
+                yield name, event_name, event['Properties']
+
+
+def test_every_route_is_on_the_dashboard_api(resources):
+    # The frontend has a single REACT_APP_API_URL, the DashboardEndpoint output
+    routes = list(_routes(resources))
+    assert routes
+    assert [(name, event) for name, event, properties in routes
+            if properties.get('ApiId') != {'Ref': 'DashboardApi'}] == []
+
+
+@pytest.mark.parametrize('prefix', ['/watchlist', '/admin/'])
+def test_user_routes_require_the_cognito_authorizer(resources, prefix):
+    # Admin routes read the cognito:groups claim, which only this API's JWT authorizer supplies
+    authorizers = resources['DashboardApi']['Properties']['Auth']['Authorizers']
+    protected = [properties for _, _, properties in _routes(resources) if properties['Path'].startswith(prefix)]
+    assert protected
+    for properties in protected:
+        assert properties['Auth']['Authorizer'] in authorizers
+
+
+def test_admin_group_matches_the_handler(resources, load_app, monkeypatch):
+    # cache_admin imports data_api's handler module under its deployed name
+    monkeypatch.setitem(sys.modules, 'app', load_app('data_api'))
+    monkeypatch.delitem(sys.modules, 'cache_admin', raising=False)
+    import cache_admin
+    group = resources['DataApiFunction']['Properties']['Environment']['Variables']['ADMIN_GROUP']
+    claims = {'sub': 'admin-1', 'cognito:groups': f"[{group} editors]"}
+    assert cache_admin.admin_user({'requestContext': {'authorizer': {'jwt': {'claims': claims}}}}) == 'admin-1'
+    assert cache_admin.admin_user({'requestContext': {}}) is None
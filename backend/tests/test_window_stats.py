@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from window_stats import SlidingExtremes, _months_before, close_on_or_before, trailing_returns
+
+
+def _bars(count, seed=3, start=date(2024, 1, 1)):
+    """Weekday bars from a random walk: (day, high, low, close)"""
+    rng = random.Random(seed)
+    bars, day, price = [], start, 100.0
+    while len(bars) < count:
+        if day.weekday() < 5:
+            price = max(1.0, price * (1 + rng.gauss(0, 0.02)))
+            bars.append((day.isoformat(), round(price * 1.01, 4), round(price * 0.99, 4), round(price, 4)))
+        day += timedelta(days=1)
+    return bars
+
+
+def _brute_force(bars, day, window_days):
+    cutoff = (date.fromisoformat(day) - timedelta(days=window_days)).isoformat()
+    window = [bar for bar in bars if cutoff < bar[0] <= day]
+    return max(bar[1] for bar in window), min(bar[2] for bar in window)
+
+
+def test_extremes_match_a_rescan_after_every_bar():
+    bars = _bars(600)
+    extremes = SlidingExtremes(window_days=90)
+    for day, high, low, _ in bars:
+        extremes.push(day, high, low)
+        assert (extremes.high[1], extremes.low[1]) == _brute_force(bars, day, 90)
+        # The deque fronts are the extremes; values stay monotonic behind them
+        highs = [value for _, value in extremes.max_deque]
+        lows = [value for _, value in extremes.min_deque]
+        assert highs == sorted(highs, reverse=True) and lows == sorted(lows)
+
+
+def test_resuming_from_stored_deques_matches_one_pass():
+    bars = _bars(400)
+    continuous = SlidingExtremes()
+    for day, high, low, _ in bars:
+        continuous.push(day, high, low)
+    first = SlidingExtremes()
+    for day, high, low, _ in bars[:250]:
+        first.push(day, high, low)
+    resumed = SlidingExtremes(max_deque=list(first.max_deque), min_deque=list(first.min_deque))
+    for day, high, low, _ in bars[250:]:
+        resumed.push(day, high, low)
+    assert resumed.high == continuous.high and resumed.low == continuous.low
+    assert list(resumed.max_deque) == list(continuous.max_deque)
+
+
+def test_extremes_when_empty():
+    assert SlidingExtremes().high == (None, None)
+
+
+def test_months_before_clamps_to_month_end():
+    assert _months_before(date(2026, 5, 31), 3) == date(2026, 2, 28)
+    assert _months_before(date(2026, 1, 15), 1) == date(2025, 12, 15)
+
+
+def test_close_on_or_before():
+    dates, closes = ['2026-01-02', '2026-01-05'], [10.0, 11.0]
+    assert close_on_or_before(dates, closes, '2026-01-04') == 10.0
+    assert close_on_or_before(dates, closes, '2026-01-05') == 11.0
+    assert close_on_or_before(dates, closes, '2026-01-01') is None
+
+
+def test_trailing_returns():
+    dates = ['2025-09-30', '2025-12-31', '2026-02-27', '2026-03-30', '2026-03-31']
+    closes = [50.0, 80.0, 90.0, 99.0, 100.0]
+    returns = trailing_returns(dates, closes)
+    assert returns['YTD'] == pytest.approx(100 / 80 - 1)
+    # 2026-02-28 isn't a bar; the close on or before it is used
+    assert returns['1M'] == pytest.approx(100 / 90 - 1)
+    assert returns['3M'] == pytest.approx(100 / 80 - 1)
+    # The 1Y base predates the stored series
+    assert returns['1Y'] is None
+    assert trailing_returns([], []) == {}
+
+
+def test_append_bars_resumes_stored_state(load_app):
+    app = load_app('price_bars')
+    bars = _bars(300)
+    once, appended = app.append_bars({'symbol': 'AEM'}, bars)
+    assert appended == 300
+    partial, _ = app.append_bars({'symbol': 'AEM'}, bars[:200])
+    # Overlapping bars already stored are skipped
+    resumed, appended = app.append_bars(partial, bars[150:])
+    assert appended == 100
+    for key in ('dates', 'closes', 'max_deque', 'min_deque'):
+        assert resumed[key] == once[key]
+    assert resumed['stats'] == once['stats']
+    high, low = _brute_force(bars, bars[-1][0], 365)
+    assert float(once['stats']['week52_high']) == pytest.approx(high)
+    assert float(once['stats']['week52_low']) == pytest.approx(low)
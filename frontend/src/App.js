@@ -2,7 +2,8 @@ import React, { useState, useEffect } from 'react';
 import {
   getFinancials,
   getNews,
-  getCompanyOverview
+  getCompanyOverview,
+  getDashboard
 } from './services/api';
 import {
   getWatchlist,
@@ -83,22 +84,32 @@ function App() {
     });
     
     try {
-      // Fetch all data in parallel with error handling per endpoint
-      const [financials, news, overview] = await Promise.all([
-        getFinancials(stock.symbol).catch(err => {
-          setApiErrors(prev => ({...prev, financials: err.message}));
+      // Overview and financials arrive together in the dashboard bundle
+      const [dashboard, news] = await Promise.all([
+        getDashboard(stock.symbol).catch(err => {
+          setApiErrors(prev => ({...prev, financials: err.message, overview: err.message}));
           return null;
         }),
         getNews(stock.symbol).catch(err => {
           setApiErrors(prev => ({...prev, news: err.message}));
           return null;
-        }),
-        getCompanyOverview(stock.symbol).catch(err => {
-          setApiErrors(prev => ({...prev, overview: err.message}));
-          return null;
         })
       ]);
       
+      const bundleErrors = dashboard?.errors || {};
+      if (bundleErrors.financials || bundleErrors.overview) {
+        setApiErrors(prev => ({
+          ...prev,
+          financials: bundleErrors.financials || prev.financials,
+          overview: bundleErrors.overview || prev.overview
+        }));
+      }
+      const financials = dashboard?.financials ? {
+        incomeStatement: dashboard.financials.incomeStatement,
+        balanceSheet: dashboard.financials.balanceSheet
+      } : null;
+      const overview = dashboard?.overview || null;
+      
       setSelectedStock({
         info: stock,
         financials,
@@ -18,9 +18,14 @@ const NewsFeed = ({ news }) => {
                   <p className="mt-1 text-xs text-gray-500">
                     {new Date(item.date).toLocaleDateString()}
                   </p>
-                  <button className="mt-2 text-xs font-medium text-amber-600 hover:text-amber-800">
+                  <a
+                    href={item.url}
+                    target="_blank"
+                    rel="noopener noreferrer"
+                    className="mt-2 inline-block text-xs font-medium text-amber-600 hover:text-amber-800"
+                  >
                     Read full story →
-                  </button>
+                  </a>
                 </div>
               </div>
             </div>
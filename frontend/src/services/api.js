@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { searchSnapshot } from './symbolSnapshot';
 
 // Create API instance with enhanced logging
 const api = axios.create({
@@ -73,10 +74,32 @@ const apiRequest = async (url) => {
 };
 
 
+// Downloaded once per session; the ETag makes later page loads a conditional 304
+let symbolSnapshot = null;
+const loadSymbolSnapshot = () => {
+  if (!symbolSnapshot) {
+    symbolSnapshot = api.get('/symbols/snapshot')
+      .then(response => response.data)
+      .catch(error => {
+        symbolSnapshot = null;
+        throw error;
+      });
+  }
+  return symbolSnapshot;
+};
+
 export const searchSymbols = async (query) => {
   console.log(`[API] Searching symbols: ${query}`);
+  // Prefix matches are resolved locally from the snapshot without a request
+  try {
+    const local = searchSnapshot(await loadSymbolSnapshot(), query, 10);
+    if (local.length > 0) return local;
+  } catch (error) {
+    console.warn('[API] Symbol snapshot unavailable, searching on the server', error);
+  }
   try {
-    const response = await api.get('/symbols', { params: { query } });
+    // Fuzzy mode ranks exact, prefix and typo-tolerant name matches
+    const response = await api.get('/symbols', { params: { query, mode: 'fuzzy', limit: 10 } });
     // Handle both array response and object with results property
     return Array.isArray(response.data) ? response.data : (response.data.results || []);
   } catch (error) {
@@ -93,9 +116,11 @@ export const getCompanyOverview = async (symbol) => {
     throw error; // Propagate to caller for UI handling
   }
 };
-export const getFinancials = async (symbol) => {
+// Optional slice narrows the payload, e.g. { period: 'annual', from: '2019', fields: 'totalRevenue,netIncome' }
+export const getFinancials = async (symbol, slice = {}) => {
   try {
-    const data = await apiRequest(`/financials?symbol=${symbol}`);
+    const params = new URLSearchParams({ symbol, ...slice });
+    const data = await apiRequest(`/financials?${params.toString()}`);
     return {
       incomeStatement: data.incomeStatement,
       balanceSheet: data.balanceSheet
@@ -107,29 +132,67 @@ export const getFinancials = async (symbol) => {
 };
 
 
+// One request for symbol info, overview, annual financials and metrics.
+// Parts that failed server-side are listed in `errors` rather than thrown.
+export const getDashboard = async (symbol, slice = {}) => {
+  const params = new URLSearchParams(slice);
+  const query = params.toString();
+  return apiRequest(`/dashboard/${symbol}${query ? `?${query}` : ''}`);
+};
+
+export const getMiningMetrics = async (symbol) => {
+  try {
+    return await apiRequest(`/mining-metrics/${symbol}`);
+  } catch (error) {
+    console.error(`[API] Failed to get mining metrics for ${symbol}`, error);
+    return null;
+  }
+};
+
+// Rolling beta/correlation vs commodity, FX and crypto series, keyed by window
+// (daily-60, daily-250, monthly-12)
+export const getSensitivity = async (symbol) => {
+  try {
+    return await apiRequest(`/sensitivity/${symbol}`);
+  } catch (error) {
+    console.error(`[API] Failed to get commodity sensitivity for ${symbol}`, error);
+    return null;
+  }
+};
+
+// Insider trades over the last `months` (side: 'buy' | 'sell'), with net buying per window
+export const getInsiderTransactions = async (symbol, { months = 12, side } = {}) => {
+  try {
+    const params = new URLSearchParams({ months, ...(side ? { side } : {}) });
+    return await apiRequest(`/insiders/${symbol}?${params.toString()}`);
+  } catch (error) {
+    console.error(`[API] Failed to get insider transactions for ${symbol}`, error);
+    return null;
+  }
+};
+
+// Dividend history for the last `years`, with trailing yield and growth streaks
+export const getDividends = async (symbol, years = 10) => {
+  try {
+    return await apiRequest(`/dividends/${symbol}?years=${years}`);
+  } catch (error) {
+    console.error(`[API] Failed to get dividends for ${symbol}`, error);
+    return null;
+  }
+};
+
 export const getNews = async (symbol) => {
-  // In a real app, this would call your news endpoint
-  return [
-    { 
-      id: 1, 
-      title: `${symbol} Announces Major Gold Discovery at Northern Site`, 
-      summary: 'Initial assays show high-grade mineralization across multiple drill holes',
-      date: '2023-05-15',
-      source: 'Mining Journal'
-    },
-    { 
-      id: 2, 
-      title: `${symbol} Reports Record Quarterly Production`, 
-      summary: 'Company exceeds guidance with 15% production increase year-over-year',
-      date: '2023-04-28',
-      source: 'Resource World'
-    },
-    { 
-      id: 3, 
-      title: `${symbol} Secures $50M Financing for Mine Expansion`, 
-      summary: 'Funds will be used to increase processing capacity by 40%',
-      date: '2023-04-10',
-      source: 'Finance Metals'
-    }
-  ];
+  try {
+    const data = await apiRequest(`/news/${symbol}?limit=20`);
+    // time_published is YYYYMMDDTHHMMSS (UTC)
+    return (data.results || []).map(article => ({
+      ...article,
+      date: article.time_published
+        ? `${article.time_published.slice(0, 4)}-${article.time_published.slice(4, 6)}-${article.time_published.slice(6, 8)}`
+        : null
+    }));
+  } catch (error) {
+    console.error(`[API] Failed to get news for ${symbol}`, error);
+    return [];
+  }
 };
@@ -0,0 +1,56 @@
+// Client-side search over the symbol universe snapshot served by /symbols/snapshot.
+// Snapshot layout (built by change_stream's SymbolSnapshotView):
+//   symbols: [[symbol, name, exchange], ...] sorted by symbol
+//   names:   row positions sorted by normalized name
+//   prefix:  { 'ag': [symbolStart, symbolEnd, nameStart, nameEnd], ... } for 1-2 character prefixes
+
+// Must match normalize_name in backend/src/layers/shared/symbol_search.py
+export const normalizeName = (name) =>
+  (name || '')
+    .normalize('NFKD')
+    .replace(/[^\x00-\x7f]/g, '')
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim();
+
+const nameKeys = new WeakMap();
+
+const normalizedNames = (snapshot) => {
+  if (!nameKeys.has(snapshot)) {
+    nameKeys.set(snapshot, snapshot.symbols.map(row => normalizeName(row[1])));
+  }
+  return nameKeys.get(snapshot);
+};
+
+// Symbol prefix matches first, then company name prefix matches, like the server's prefix search
+export const searchSnapshot = (snapshot, query, limit = 10) => {
+  const symbolQuery = query.trim().toLowerCase();
+  const nameQuery = normalizeName(query);
+  if (!snapshot || !symbolQuery) return [];
+
+  const results = [];
+  const seen = new Set();
+  const add = (row) => {
+    if (seen.has(row) || results.length >= limit) return;
+    seen.add(row);
+    const [symbol, name, exchange] = snapshot.symbols[row];
+    results.push({ symbol, name, exchange });
+  };
+
+  const symbolRange = snapshot.prefix[symbolQuery.slice(0, 2)];
+  if (symbolRange) {
+    for (let row = symbolRange[0]; row < symbolRange[1] && results.length < limit; row++) {
+      if (snapshot.symbols[row][0].toLowerCase().startsWith(symbolQuery)) add(row);
+    }
+  }
+
+  const nameRange = nameQuery && snapshot.prefix[nameQuery.slice(0, 2)];
+  if (nameRange) {
+    const names = normalizedNames(snapshot);
+    for (let position = nameRange[2]; position < nameRange[3] && results.length < limit; position++) {
+      const row = snapshot.names[position];
+      if (names[row].startsWith(nameQuery)) add(row);
+    }
+  }
+  return results;
+};
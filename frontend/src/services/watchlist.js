@@ -1,8 +1,13 @@
 import { API } from '@aws-amplify/api';
+import { configureApi } from './apiConfig';
+
+// The watchlist routes require the signed-in user's Cognito ID token
 
 export const addToWatchlist = async (symbol, name) => {
   try {
+    const { headers } = await configureApi();
     await API.post('miningApi', '/watchlist', {
+      headers,
       body: { symbol, name }
     });
     return true;
@@ -14,7 +19,9 @@ export const addToWatchlist = async (symbol, name) => {
 
 export const removeFromWatchlist = async (symbol) => {
   try {
+    const { headers } = await configureApi();
     await API.del('miningApi', '/watchlist', {
+      headers,
       body: { symbol }
     });
     return true;
@@ -24,12 +31,14 @@ export const removeFromWatchlist = async (symbol) => {
   }
 };
 
+// Entries come back hydrated: { symbol, name, added_at, quote, overview, metrics }
 export const getWatchlist = async () => {
   try {
-    const response = await API.get('miningApi', '/watchlist');
+    const { headers } = await configureApi();
+    const response = await API.get('miningApi', '/watchlist', { headers });
     return response;
   } catch (error) {
     console.error('Error fetching watchlist:', error);
     return [];
   }
-};
\ No newline at end of file
+};